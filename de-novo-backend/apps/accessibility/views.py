@@ -92,25 +92,26 @@ class ApplyPresetView(APIView):
         user = request.user
         settings = preset.settings
         
-        # Update user accessibility settings
-        if 'font_size' in settings:
-            user.font_size = settings['font_size']
-        if 'high_contrast' in settings:
-            user.high_contrast = settings['high_contrast']
-        if 'color_blind_mode' in settings:
-            user.color_blind_mode = settings['color_blind_mode']
-        if 'tts_enabled' in settings:
-            user.tts_enabled = settings['tts_enabled']
-        if 'tts_voice' in settings:
-            user.tts_voice = settings['tts_voice']
-        if 'tts_speed' in settings:
-            user.tts_speed = settings['tts_speed']
-        if 'stt_enabled' in settings:
-            user.stt_enabled = settings['stt_enabled']
-        if 'stt_language' in settings:
-            user.stt_language = settings['stt_language']
+        # Update user accessibility settings. Presets say 'tts_speed' for
+        # what the user model calls tts_rate.
+        preset_fields = {
+            'font_size': 'font_size',
+            'high_contrast': 'high_contrast',
+            'color_blind_mode': 'color_blind_mode',
+            'tts_enabled': 'tts_enabled',
+            'tts_voice': 'tts_voice',
+            'tts_speed': 'tts_rate',
+            'stt_enabled': 'stt_enabled',
+            'stt_language': 'stt_language',
+        }
+        update_fields = []
+        for key, field in preset_fields.items():
+            if key in settings:
+                setattr(user, field, settings[key])
+                update_fields.append(field)
         
-        user.save()
+        if update_fields:
+            user.save(update_fields=update_fields)
         
         return Response({
             'success': True,
@@ -6,6 +6,8 @@ Provides AI-powered assistance for platform navigation and message composition.
 import os
 import json
 
+from services.gcp_client import genai_options
+
 # Try to import Google AI
 try:
     import google.generativeai as genai
@@ -30,7 +32,7 @@ class GemmaAssistant:
         
         if GENAI_AVAILABLE and self.api_key:
             try:
-                genai.configure(api_key=self.api_key)
+                genai.configure(api_key=self.api_key, **genai_options())
                 # Using Gemini 1.5 Flash for faster responses
                 self.model = genai.GenerativeModel('gemini-1.5-flash')
             except Exception as e:
@@ -0,0 +1,62 @@
+"""
+Run the local Google Cloud / Gemini API emulator for offline tests and benchmarks.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from services.gcp_emulator import SERVICES, parse_latency, run_emulator
+
+
+def per_service(values, convert, option):
+    """Parse repeated SERVICE=VALUE options into a dict."""
+    result = {}
+    for value in values or []:
+        service, _, setting = value.partition('=')
+        if service not in SERVICES or not setting:
+            raise CommandError(f"--{option} expects SERVICE=VALUE with SERVICE one of {', '.join(SERVICES)}")
+        result[service] = convert(setting)
+    return result
+
+
+class Command(BaseCommand):
+    help = 'Serve deterministic stand-ins for the Speech, TTS, Vision, NLP and Gemini APIs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8085)
+        parser.add_argument('--latency', default='fixed:0',
+                            help='fixed:MS, uniform:MIN,MAX, normal:MEAN,SD or lognormal:MEDIAN,SIGMA')
+        parser.add_argument('--service-latency', action='append', metavar='SERVICE=SPEC',
+                            help='latency for one service, e.g. nlp=lognormal:60,0.4 (repeatable)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='share of calls answered with 503')
+        parser.add_argument('--service-error-rate', action='append', metavar='SERVICE=RATE')
+        parser.add_argument('--rate-limit', type=float, default=0.0,
+                            help='requests/s per service before 429s (0: unlimited)')
+        parser.add_argument('--service-rate-limit', action='append', metavar='SERVICE=RPS')
+        parser.add_argument('--seed', type=int, default=1, help='seed for latency and error sampling')
+
+    def handle(self, *args, **options):
+        try:
+            parse_latency(options['latency'])
+            service_latency = per_service(options['service_latency'], str, 'service-latency')
+            for spec in service_latency.values():
+                parse_latency(spec)
+            service_error_rate = per_service(options['service_error_rate'], float, 'service-error-rate')
+            service_rate_limit = per_service(options['service_rate_limit'], float, 'service-rate-limit')
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        url = f"http://{options['host']}:{options['port']}"
+        self.stdout.write(f'GCP emulator serving {url}')
+        self.stdout.write(f'Use GCP_API_BASE_URL={url} GEMINI_API_BASE_URL={url} and any non-empty API keys')
+        run_emulator(
+            host=options['host'],
+            port=options['port'],
+            latency=options['latency'],
+            service_latency=service_latency,
+            error_rate=options['error_rate'],
+            service_error_rate=service_error_rate,
+            rate_limit=options['rate_limit'],
+            service_rate_limit=service_rate_limit,
+            seed=options['seed'],
+        )
@@ -4,14 +4,40 @@ Detects multiple faces to alert users about privacy concerns.
 """
 
 import base64
+import concurrent.futures
+from django.conf import settings
+from services.frame_prep import frame_preprocessor
 from services.gcp_client import gcp_client
+from services.vision_batcher import face_batcher
+
+
+def _scale_bounds(bounds: dict, factor: float) -> dict:
+    """Map a boundingPoly from the downscaled frame back to the original."""
+    return {
+        'vertices': [
+            {axis: round(value * factor) for axis, value in vertex.items()}
+            for vertex in bounds.get('vertices', [])
+        ]
+    }
 
 
 class PeepingTomDetector:
     """
     Face detection for privacy protection using Cloud Vision API.
+    Frames are downscaled before upload (services/frame_prep.py), and frames
+    from concurrent callers are batched into shared annotate requests
+    (services/vision_batcher.py).
     """
     
+    def _timeout(self) -> float:
+        """
+        Seconds to wait for a batched result: the batching window plus the
+        Vision deadline. A frame still queued for a request slot after that is
+        dropped by the batcher, so it is not sent (or billed) after the caller
+        has given up.
+        """
+        return getattr(settings, 'VISION_BATCH_MAX_WAIT_MS', 20) / 1000 + gcp_client.deadline_for('vision')
+    
     def detect_faces(self, image_content: bytes) -> dict:
         """
         Detect faces in an image.
@@ -31,17 +57,26 @@ class PeepingTomDetector:
                 'alert': False
             }
         
-        # Use the centralized GCP client
-        result = gcp_client.detect_faces(image_content)
+        image_content, preprocessing = frame_preprocessor.prepare(image_content)
+        
+        try:
+            result = face_batcher.detect(image_content, timeout=self._timeout())
+        except concurrent.futures.TimeoutError:
+            result = {'error': 'Face detection timed out'}
         
         if result.get('success'):
             face_count = result.get('face_count', 0)
+            faces = result.get('faces', [])
+            if preprocessing['scale'] != 1.0:
+                factor = 1 / preprocessing['scale']
+                faces = [{**face, 'bounds': _scale_bounds(face['bounds'], factor)} for face in faces]
             return {
                 'success': True,
-                'faces': result.get('faces', []),
+                'faces': faces,
                 'face_count': face_count,
                 'alert': face_count > 1,  # Alert if more than one face
-                'alert_message': f"Warning: {face_count} faces detected!" if face_count > 1 else None
+                'alert_message': f"Warning: {face_count} faces detected!" if face_count > 1 else None,
+                'preprocessing': preprocessing
             }
         else:
             return {
@@ -49,7 +84,8 @@ class PeepingTomDetector:
                 'error': result.get('error', 'Face detection failed'),
                 'faces': [],
                 'face_count': 0,
-                'alert': False
+                'alert': False,
+                'preprocessing': preprocessing
             }
     
     def detect_from_base64(self, image_base64: str) -> dict:
@@ -115,7 +151,8 @@ class PeepingTomDetector:
             'risk_level': risk_level,
             'risk_message': risk_message,
             'should_alert': face_count > 1,
-            'faces': result.get('faces', [])
+            'faces': result.get('faces', []),
+            'preprocessing': result.get('preprocessing')
         }
 
 
@@ -3,8 +3,21 @@ Sentiment Analyzer using Google Cloud Natural Language API and Gemini.
 Analyzes message sentiment to provide emotional context.
 """
 
+import asyncio
+import concurrent.futures
+import logging
 import os
-from services.gcp_client import gcp_client
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from services.circuit_breaker import OPEN
+from services.gcp_client import gcp_client, genai_options
+from services.sentiment_batcher import sentiment_batcher
+
+logger = logging.getLogger(__name__)
+
+# Late Cloud NLP results are applied here, off the batcher's event loop
+_late_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix='sentiment-late')
+_late_tasks = set()  # Keeps pending async deliveries referenced until they finish
 
 # Try to import Gemini
 try:
@@ -44,58 +57,174 @@ class SentimentAnalyzer:
         api_key = os.getenv('GOOGLE_API_KEY')
         if api_key:
             try:
-                genai.configure(api_key=api_key)
+                genai.configure(api_key=api_key, **genai_options())
                 self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
             except Exception as e:
                 print(f"Failed to setup Gemini: {e}")
     
-    def analyze(self, text: str, use_gemini: bool = False) -> dict:
+    def _budget(self) -> float:
+        """Seconds to wait for Cloud NLP before answering with the local fallback."""
+        return getattr(settings, 'NLP_SENTIMENT_BUDGET_MS', 500) / 1000
+    
+    def analyze(self, text: str, use_gemini: bool = False, on_late_result=None) -> dict:
         """
         Analyze sentiment of text.
         
+        Cloud NLP gets a latency budget (NLP_SENTIMENT_BUDGET_MS). If it has
+        not answered by then, or its circuit breaker is open, the rule-based
+        result is returned with 'pending': True. When the remote result
+        arrives later, `on_late_result(result)` is called with it from a
+        worker thread. Callers that store the result should use
+        analyze_deferred() instead, so the late result cannot land first.
+        
         Args:
             text: Text to analyze
             use_gemini: Use Gemini for detailed analysis (slower but more accurate)
+            on_late_result: Optional callback for a Cloud NLP result that missed the budget
             
         Returns:
             dict with sentiment analysis results
         """
+        result, late = self.analyze_deferred(text, use_gemini)
+        if late is not None and on_late_result is not None:
+            self.on_late(late, on_late_result)
+        return result
+    
+    def analyze_deferred(self, text: str, use_gemini: bool = False):
+        """
+        analyze() that returns (result, late) instead of taking a callback.
+        `late` is None unless the result is the pending fallback; pass it to
+        on_late() once the fallback has been stored and announced, so the
+        remote result can neither be overwritten by it nor sent before it.
+        """
         if not text or not text.strip():
-            return {
-                'success': False,
-                'error': 'No text provided',
-                'sentiment': 'neutral',
-                'emoji': '😐'
-            }
+            return self._empty_result(), None
         
-        # Try Cloud Natural Language API first (fast and accurate)
-        nlp_result = gcp_client.analyze_sentiment_nlp(text)
+        if self._nlp_unavailable():
+            return self._fallback(text, use_gemini), None
         
-        if nlp_result.get('success'):
-            score = nlp_result.get('score', 0)
-            magnitude = nlp_result.get('magnitude', 0)
-            
-            # Determine sentiment and emoji
-            if score >= 0.5:
-                sentiment = 'very_positive' if magnitude > 1 else 'positive'
-            elif score >= 0.1:
-                sentiment = 'positive'
-            elif score <= -0.5:
-                sentiment = 'very_negative' if magnitude > 1 else 'negative'
-            elif score <= -0.1:
-                sentiment = 'negative'
-            else:
-                sentiment = 'neutral'
-            
-            return {
-                'success': True,
-                'sentiment': sentiment,
-                'score': score,
-                'magnitude': magnitude,
-                'emoji': self.EMOTION_EMOJIS.get(sentiment, '😐'),
-                'source': 'cloud_nlp'
-            }
+        # Try Cloud Natural Language API first (fast and accurate); concurrent
+        # calls are batched (services/sentiment_batcher.py)
+        future = sentiment_batcher.submit(text)
+        try:
+            nlp_result = future.result(self._budget())
+        except concurrent.futures.TimeoutError:
+            return self._pending_result(text), future
+        return self._from_nlp(nlp_result) or self._fallback(text, use_gemini), None
+    
+    def on_late(self, late: concurrent.futures.Future, callback):
+        """Call `callback(result)` from a worker thread when a pending Cloud NLP call succeeds."""
+        late.add_done_callback(lambda f: _late_executor.submit(self._deliver_late, f, callback))
+    
+    async def analyze_async(self, text: str, use_gemini: bool = False, on_late_result=None) -> dict:
+        """
+        analyze() for async callers: the Cloud NLP call is awaited, not run in
+        a thread. `on_late_result` is a coroutine function, awaited on this
+        event loop when a result that missed the budget arrives.
+        """
+        result, late = await self.analyze_async_deferred(text, use_gemini)
+        if late is not None and on_late_result is not None:
+            self.on_late_async(late, on_late_result)
+        return result
+    
+    async def analyze_async_deferred(self, text: str, use_gemini: bool = False):
+        """analyze_deferred() for async callers; pass `late` to on_late_async()."""
+        if not text or not text.strip():
+            return self._empty_result(), None
+        
+        if self._nlp_unavailable():
+            return await self._fallback_async(text, use_gemini), None
+        
+        future = asyncio.wrap_future(sentiment_batcher.submit(text))
+        try:
+            nlp_result = await asyncio.wait_for(asyncio.shield(future), self._budget())
+        except asyncio.TimeoutError:
+            return self._pending_result(text), future
+        return self._from_nlp(nlp_result) or await self._fallback_async(text, use_gemini), None
+    
+    def on_late_async(self, late: asyncio.Future, callback):
+        """Await `callback(result)` on this event loop when a pending Cloud NLP call succeeds."""
+        task = asyncio.ensure_future(self._deliver_late_async(late, callback))
+        _late_tasks.add(task)
+        task.add_done_callback(_late_tasks.discard)
+    
+    def _nlp_unavailable(self) -> bool:
+        """Cloud NLP's circuit breaker is open: skip straight to the fallback."""
+        return gcp_client.breakers['nlp'].state == OPEN
+    
+    async def _fallback_async(self, text: str, use_gemini: bool) -> dict:
+        if use_gemini and self.gemini_model:
+            return await sync_to_async(self._analyze_with_gemini, thread_sensitive=False)(text)
+        return self._rule_based_analysis(text)
+    
+    def _pending_result(self, text: str) -> dict:
+        """Local answer while Cloud NLP is still working (or its breaker is open)."""
+        result = self._rule_based_analysis(text)
+        result['pending'] = True
+        return result
+    
+    def _deliver_late(self, future: concurrent.futures.Future, callback):
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = self._from_nlp(future.result())
+        if result is None:
+            return
+        try:
+            callback(result)
+        except Exception as e:
+            logger.warning(f"Applying late sentiment result failed: {type(e).__name__}")
+    
+    async def _deliver_late_async(self, future, callback):
+        try:
+            nlp_result = await future
+        except Exception:
+            return
+        result = self._from_nlp(nlp_result)
+        if result is None:
+            return
+        try:
+            await callback(result)
+        except Exception as e:
+            logger.warning(f"Applying late sentiment result failed: {type(e).__name__}")
+    
+    def _empty_result(self) -> dict:
+        return {
+            'success': False,
+            'error': 'No text provided',
+            'sentiment': 'neutral',
+            'emoji': '😐'
+        }
+    
+    def _from_nlp(self, nlp_result: dict):
+        """Map a Cloud NLP result to our sentiment labels (None if the call failed)."""
+        if not nlp_result.get('success'):
+            return None
+        
+        score = nlp_result.get('score', 0)
+        magnitude = nlp_result.get('magnitude', 0)
+        
+        # Determine sentiment and emoji
+        if score >= 0.5:
+            sentiment = 'very_positive' if magnitude > 1 else 'positive'
+        elif score >= 0.1:
+            sentiment = 'positive'
+        elif score <= -0.5:
+            sentiment = 'very_negative' if magnitude > 1 else 'negative'
+        elif score <= -0.1:
+            sentiment = 'negative'
+        else:
+            sentiment = 'neutral'
         
+        return {
+            'success': True,
+            'sentiment': sentiment,
+            'score': score,
+            'magnitude': magnitude,
+            'emoji': self.EMOTION_EMOJIS.get(sentiment, '😐'),
+            'source': 'cloud_nlp'
+        }
+    
+    def _fallback(self, text: str, use_gemini: bool) -> dict:
         # Use Gemini for detailed analysis if requested or NLP failed
         if use_gemini and self.gemini_model:
             return self._analyze_with_gemini(text)
@@ -1,11 +1,23 @@
 """
 Speech-to-Text service using Google Cloud Speech-to-Text API.
 Transcribes audio for accessibility features.
+
+Recordings longer than STT_CHUNK_SECONDS are split (services/audio_chunks.py)
+and the chunks are transcribed concurrently, so long recordings take about
+as long as one chunk.
 """
 
 import base64
+import concurrent.futures
+from django.conf import settings
+from services import audio_chunks
 from services.gcp_client import gcp_client
 
+# Chunk requests from all recordings share these workers (the concurrency cap)
+_chunk_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=getattr(settings, 'STT_MAX_CONCURRENCY', 8), thread_name_prefix='stt-chunk'
+)
+
 
 class SpeechToTextService:
     """
@@ -50,6 +62,10 @@ class SpeechToTextService:
                 'full_transcript': ''
             }
         
+        chunked = self._transcribe_chunked(audio_content, language_code, encoding, sample_rate)
+        if chunked is not None:
+            return chunked
+        
         # Use the centralized GCP client
         result = gcp_client.speech_to_text(
             audio_content=audio_content,
@@ -75,6 +91,73 @@ class SpeechToTextService:
                 'full_transcript': ''
             }
     
+    def _should_split(self, audio_content: bytes, encoding: str, sample_rate: int) -> bool:
+        """Whether the audio may be longer than one chunk (decoding is not free)."""
+        window = getattr(settings, 'STT_CHUNK_SECONDS', 50)
+        if encoding == 'LINEAR16':
+            if audio_content[:4] == b'RIFF':
+                # The header has the real rate; the caller's may be a default
+                seconds = audio_chunks.wav_duration(audio_content)
+                return seconds is not None and seconds > window
+            return len(audio_content) > window * sample_rate * audio_chunks.SAMPLE_WIDTH
+        # Speech codecs can run as low as 6 kbps, so only files too small to
+        # last a window even at 4 kbps skip decoding; the rest are measured
+        return len(audio_content) > window * audio_chunks.MIN_COMPRESSED_BYTES_PER_SECOND
+    
+    def _transcribe_chunked(self, audio_content: bytes, language_code: str,
+                            encoding: str, sample_rate: int):
+        """
+        Transcribe long audio chunk by chunk, or return None when it fits in
+        one request or cannot be split here.
+        """
+        if not self._should_split(audio_content, encoding, sample_rate):
+            return None
+        decoded = audio_chunks.read_pcm(audio_content, encoding, sample_rate)
+        if decoded is None:
+            return None
+        pcm, rate = decoded
+        chunks = audio_chunks.plan_chunks(
+            pcm, rate,
+            window=getattr(settings, 'STT_CHUNK_SECONDS', 50),
+            overlap=getattr(settings, 'STT_CHUNK_OVERLAP_SECONDS', 1.0),
+            silence_rms=getattr(settings, 'STT_SILENCE_RMS', 500),
+        )
+        if len(chunks) < 2:
+            return None
+        
+        width = audio_chunks.SAMPLE_WIDTH
+        futures = [
+            _chunk_executor.submit(
+                gcp_client.speech_to_text,
+                pcm[start * width:end * width], language_code, 'LINEAR16', rate
+            )
+            for start, end, _ in chunks
+        ]
+        results = [future.result() for future in futures]
+        
+        failed = [result for result in results if not result.get('success')]
+        if failed:
+            return {
+                'success': False,
+                'error': failed[0].get('error', 'Transcription failed'),
+                'results': [],
+                'full_transcript': ''
+            }
+        
+        return {
+            'success': True,
+            'results': [{
+                'transcript': result.get('transcript', ''),
+                'confidence': result.get('confidence', 0.0),
+                'start': round(start / rate, 2),
+                'end': round(end / rate, 2)
+            } for (start, end, _), result in zip(chunks, results)],
+            'full_transcript': audio_chunks.stitch_transcripts([
+                (result.get('transcript', ''), overlaps)
+                for (_, _, overlaps), result in zip(chunks, results)
+            ])
+        }
+    
     def transcribe_base64(self, audio_base64: str, language_code: str = 'en-US',
                           encoding: str = 'WEBM_OPUS', sample_rate: int = 48000) -> dict:
         """
@@ -1,8 +1,12 @@
 """
 Text-to-Speech service using Google Cloud Text-to-Speech API.
 Converts text messages to speech for visually impaired users.
+Synthesized audio is kept in a disk cache (services/audio_cache.py).
 """
 
+import base64
+
+from services.audio_cache import tts_audio_cache
 from services.gcp_client import gcp_client
 
 
@@ -76,6 +80,56 @@ class TextToSpeechService:
         
         return result
     
+    def synthesize_cached(self, text: str, language_code: str = 'en-US',
+                          voice_name: str = None, speaking_rate: float = 1.0,
+                          include_audio: bool = False) -> dict:
+        """
+        Convert text to speech through the disk audio cache.
+        
+        Identical requests are synthesized once. Returns the cache key of the
+        MP3 (see services.audio_cache.sign_key) instead of base64 audio.
+        With include_audio, the MP3 bytes are returned as `audio` too, read
+        in the same step so a concurrent eviction cannot lose them.
+        
+        Returns:
+            dict with key, cached (bool), success status (and audio)
+        """
+        if not text or not text.strip():
+            return {
+                'success': False,
+                'error': 'No text provided',
+                'key': None
+            }
+        
+        text = text[:5000].strip()
+        key = tts_audio_cache.make_key(text, language_code, voice_name, speaking_rate)
+        if include_audio:
+            audio = tts_audio_cache.read(key)
+            if audio is not None:
+                return {'success': True, 'key': key, 'cached': True, 'audio': audio}
+        elif tts_audio_cache.exists(key):
+            return {'success': True, 'key': key, 'cached': True}
+        
+        result = self.synthesize(
+            text=text,
+            language_code=language_code,
+            voice_name=voice_name,
+            speaking_rate=speaking_rate
+        )
+        if not result.get('success') or not result.get('audio_content'):
+            return {
+                'success': False,
+                'error': result.get('error', 'No audio returned'),
+                'key': None
+            }
+        
+        audio = base64.b64decode(result['audio_content'])
+        tts_audio_cache.put(key, audio)
+        response = {'success': True, 'key': key, 'cached': False}
+        if include_audio:
+            response['audio'] = audio
+        return response
+    
     def get_voices(self, language_code: str = None) -> list:
         """
         Get available voices.
@@ -2,13 +2,14 @@
 URL routes for AI Services app.
 """
 
-from django.urls import path
+from django.urls import path, re_path
 from . import views
 
 urlpatterns = [
     # Text-to-Speech
     path('tts/', views.TextToSpeechView.as_view(), name='tts'),
     path('tts/voices/', views.TTSVoicesView.as_view(), name='tts_voices'),
+    re_path(r'^tts/audio/(?P<token>[0-9a-f]{64}:[\w-]+:[\w-]+)\.mp3$', views.TTSAudioView.as_view(), name='tts_audio'),
     
     # Speech-to-Text
     path('stt/', views.SpeechToTextView.as_view(), name='stt'),
@@ -26,4 +27,6 @@ urlpatterns = [
     
     # Service Status
     path('status/', views.AIServicesStatusView.as_view(), name='ai_status'),
+    path('metrics/http/', views.GCPHTTPStatsView.as_view(), name='gcp_http_stats'),
+    path('metrics/cache/', views.GCPCacheStatsView.as_view(), name='gcp_cache_stats'),
 ]
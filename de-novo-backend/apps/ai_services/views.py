@@ -2,18 +2,27 @@
 Views for AI Services app.
 """
 
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.urls import reverse
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 import base64
+import re
 
 from .text_to_speech import text_to_speech
 from .speech_to_text import speech_to_text
 from .sentiment_analyzer import sentiment_analyzer
 from .gemma_assistant import gemma_assistant
 from .peeping_tom_detector import peeping_tom_detector
-from services.gcp_client import gcp_client
+from services.gcp_client import gcp_client, get_breaker_states, get_cache_stats, get_http_stats
+from services.gcp_async_client import get_async_http_stats
+from services.audio_cache import sign_key, tts_audio_cache, unsign_token
+from services.frame_prep import get_frame_prep_stats
+from services.sentiment_batcher import get_batch_stats
+from services.vision_batcher import get_vision_batch_stats
 
 
 class TextToSpeechView(APIView):
@@ -31,20 +40,29 @@ class TextToSpeechView(APIView):
                 'error': {'message': 'Text is required'}
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        result = text_to_speech.synthesize(
+        # Clients that cannot fetch a URL can still ask for the audio inline
+        inline = bool(request.data.get('inline'))
+        result = text_to_speech.synthesize_cached(
             text=text,
             language_code=language_code,
             voice_name=voice_name,
-            speaking_rate=speaking_rate
+            speaking_rate=speaking_rate,
+            include_audio=inline
         )
         
         if result.get('success'):
+            token, expires_in = sign_key(result['key'], settings.TTS_AUDIO_URL_MAX_AGE)
+            data = {
+                'audio_url': request.build_absolute_uri(reverse('tts_audio', kwargs={'token': token})),
+                'format': 'mp3',
+                'cached': result['cached'],
+                'expires_in': expires_in,
+            }
+            if inline:
+                data['audio_content'] = base64.b64encode(result['audio']).decode('ascii')
             return Response({
                 'success': True,
-                'data': {
-                    'audio_content': result.get('audio_content'),
-                    'format': 'mp3'
-                }
+                'data': data
             })
         else:
             return Response({
@@ -53,6 +71,63 @@ class TextToSpeechView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class TTSAudioView(APIView):
+    """
+    Serve cached synthesized speech as audio/mpeg.
+    
+    The URL carries a token signed by /api/ai/tts/ that expires after
+    TTS_AUDIO_URL_MAX_AGE seconds, so it works directly as an <audio> source
+    without an auth header but cannot be guessed from the text. The content
+    for a key never changes, so browsers may keep it (but not shared caches).
+    """
+    
+    permission_classes = []
+    
+    def get(self, request, token):
+        max_age = settings.TTS_AUDIO_URL_MAX_AGE
+        key = unsign_token(token, max_age)
+        if key is None:
+            raise Http404('Audio link expired; request it again from /api/ai/tts/')
+        # The lookup was counted when the URL was handed out
+        audio = tts_audio_cache.read(key, count=False)
+        if audio is None:
+            raise Http404('Audio not found; request it again from /api/ai/tts/')
+        
+        etag = f'"{key}"'
+        headers = {
+            'Cache-Control': f'private, max-age={max_age}, immutable',
+            'ETag': etag,
+            'Accept-Ranges': 'bytes',
+        }
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = self._ranged(request, audio)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+    
+    def _ranged(self, request, audio: bytes) -> HttpResponse:
+        # Single byte ranges only; Safari will not play media without them
+        match = re.fullmatch(r'bytes=(\d*)-(\d*)', request.META.get('HTTP_RANGE', '').strip())
+        if not match or match.groups() == ('', ''):
+            return HttpResponse(audio, content_type='audio/mpeg')
+        size = len(audio)
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+        if start >= size or start > end:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        response = HttpResponse(audio[start:end + 1], content_type='audio/mpeg',
+                                status=status.HTTP_206_PARTIAL_CONTENT)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        return response
+
+
 class TTSVoicesView(APIView):
     """List available TTS voices."""
     
@@ -250,6 +325,40 @@ class AIServicesStatusView(APIView):
             'success': True,
             'data': {
                 'services': status_data,
+                'breakers': get_breaker_states(),
                 'message': 'All configured services are available' if all(status_data.values()) else 'Some services may be unavailable'
             }
         })
+
+
+class GCPHTTPStatsView(APIView):
+    """Cloud API connection pool and retry counters for this worker process (admin only)."""
+    
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response({
+            'success': True,
+            'data': {
+                'sync': get_http_stats(),
+                'async': get_async_http_stats(),
+                'nlp_batching': get_batch_stats(),
+                'vision_batching': get_vision_batch_stats(),
+                'vision_preprocessing': get_frame_prep_stats(),
+            }
+        })
+
+
+class GCPCacheStatsView(APIView):
+    """Cloud API result cache hit/miss counters for this worker process (admin only)."""
+    
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response({
+            'success': True,
+            'data': {
+                **get_cache_stats(),
+                'tts_audio': tts_audio_cache.stats(),
+            }
+        })
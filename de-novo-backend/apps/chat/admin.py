@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Conversation, Message, MessageReadReceipt, VoiceMessage
+from .models import Conversation, KeyRotationCheckpoint, Message, MessageReadReceipt, VoiceMessage
 
 
 @admin.register(Conversation)
@@ -14,7 +14,7 @@ class ConversationAdmin(admin.ModelAdmin):
 class MessageAdmin(admin.ModelAdmin):
     list_display = ['id', 'sender', 'message_type', 'sentiment', 'created_at', 'is_deleted']
     list_filter = ['message_type', 'sentiment', 'is_deleted', 'created_at']
-    search_fields = ['content', 'sender__username']
+    search_fields = ['sender__username']  # content is encrypted at rest
 
 
 @admin.register(MessageReadReceipt)
@@ -27,3 +27,10 @@ class MessageReadReceiptAdmin(admin.ModelAdmin):
 class VoiceMessageAdmin(admin.ModelAdmin):
     list_display = ['id', 'message', 'duration', 'created_at']
     list_filter = ['created_at']
+
+
+@admin.register(KeyRotationCheckpoint)
+class KeyRotationCheckpointAdmin(admin.ModelAdmin):
+    list_display = ['job', 'phase', 'partition', 'rows_scanned', 'rows_rewritten', 'is_complete', 'updated_at']
+    list_filter = ['phase', 'is_complete']
+    search_fields = ['job']
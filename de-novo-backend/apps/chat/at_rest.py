@@ -0,0 +1,260 @@
+"""
+At-rest encryption for message content.
+
+Each conversation has a random AES-256 data key (ConversationKey), stored
+wrapped by a master key from settings (MESSAGE_MASTER_KEYS, selected by
+MESSAGE_MASTER_KEY_ID). Unwrapped data keys live in a bounded in-process
+LRU, so reading and writing messages costs one AES-GCM operation.
+
+Sealed values are stored as text:
+    enc:v1:<conversation key id>:<base64(nonce | AES-GCM ciphertext)>
+
+Rows written before encryption was enabled stay readable as plaintext
+until `manage.py encrypt_message_content` seals them.
+"""
+
+import base64
+import collections
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, transaction
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+logger = logging.getLogger(__name__)
+
+SEALED_PREFIX = 'enc:v1:'
+ACTIVE_KEY_TTL = 60  # Seconds before a process re-checks a conversation's active key
+
+
+class DataKeyCache:
+    """
+    Bounded LRU of unwrapped data keys (by ConversationKey id) and of each
+    conversation's active key id.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._keys = collections.OrderedDict()    # key_id -> AESGCM
+        self._active = collections.OrderedDict()  # conversation_id -> (key_id, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _bound(self, table):
+        while len(table) > self.max_size:
+            table.popitem(last=False)
+
+    def get_key(self, key_id):
+        with self._lock:
+            aesgcm = self._keys.get(key_id)
+            if aesgcm is None:
+                self.misses += 1
+                return None
+            self._keys.move_to_end(key_id)
+            self.hits += 1
+            return aesgcm
+
+    def put_key(self, key_id, aesgcm):
+        with self._lock:
+            self._keys[key_id] = aesgcm
+            self._keys.move_to_end(key_id)
+            self._bound(self._keys)
+
+    def get_active(self, conversation_id):
+        with self._lock:
+            entry = self._active.get(conversation_id)
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            self._active.move_to_end(conversation_id)
+            return entry[0]
+
+    def set_active(self, conversation_id, key_id):
+        with self._lock:
+            self._active[conversation_id] = (key_id, time.monotonic() + ACTIVE_KEY_TTL)
+            self._active.move_to_end(conversation_id)
+            self._bound(self._active)
+
+    def forget_conversation(self, conversation_id):
+        with self._lock:
+            self._active.pop(conversation_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            self._active.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'keys': len(self._keys),
+                'active_conversations': len(self._active),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# Global instance
+data_key_cache = DataKeyCache(getattr(settings, 'MESSAGE_DATA_KEY_CACHE_SIZE', 1024))
+
+
+# ── Master keys ──────────────────────────────────────────────────────────────
+
+def master_keys() -> dict:
+    """Configured master keys as {key id: AESGCM}."""
+    keys = {}
+    for key_id, encoded in getattr(settings, 'MESSAGE_MASTER_KEYS', {}).items():
+        raw = base64.b64decode(encoded)
+        if len(raw) != 32:
+            raise ValueError(f"Master key '{key_id}' must be 32 bytes (base64 encoded)")
+        keys[str(key_id)] = AESGCM(raw)
+    return keys
+
+
+def active_master_key_id():
+    return str(getattr(settings, 'MESSAGE_MASTER_KEY_ID', '') or '')
+
+
+def is_enabled() -> bool:
+    """True when new content should be sealed."""
+    key_id = active_master_key_id()
+    return bool(key_id) and key_id in getattr(settings, 'MESSAGE_MASTER_KEYS', {})
+
+
+def wrap_data_key(data_key: bytes, conversation_id, master_key_id: str = None):
+    """Wrap a data key with a master key. Returns (wrapped text, master key id)."""
+    master_key_id = master_key_id or active_master_key_id()
+    nonce = os.urandom(12)
+    aad = f'conversation:{conversation_id}'.encode('utf-8')
+    sealed = master_keys()[master_key_id].encrypt(nonce, data_key, aad)
+    return base64.b64encode(nonce + sealed).decode('ascii'), master_key_id
+
+
+def unwrap_data_key(conversation_key) -> bytes:
+    """Recover the raw data key of a ConversationKey row."""
+    raw = base64.b64decode(conversation_key.wrapped_key)
+    aad = f'conversation:{conversation_key.conversation_id}'.encode('utf-8')
+    master = master_keys().get(conversation_key.master_key_id)
+    if master is None:
+        raise LookupError(f"Master key '{conversation_key.master_key_id}' is not configured")
+    return master.decrypt(raw[:12], raw[12:], aad)
+
+
+# ── Data keys ────────────────────────────────────────────────────────────────
+
+def _load_key(key_id):
+    aesgcm = data_key_cache.get_key(key_id)
+    if aesgcm is None:
+        from .models import ConversationKey
+        conversation_key = ConversationKey.objects.get(pk=key_id)
+        aesgcm = AESGCM(unwrap_data_key(conversation_key))
+        data_key_cache.put_key(key_id, aesgcm)
+    return aesgcm
+
+
+def create_data_key(conversation_id):
+    """
+    Create a new active data key for a conversation, retiring the current one.
+    Old keys stay readable. Returns the new ConversationKey.
+    """
+    from .models import ConversationKey
+
+    data_key = AESGCM.generate_key(bit_length=256)
+    wrapped, master_key_id = wrap_data_key(data_key, conversation_id)
+    with transaction.atomic():
+        ConversationKey.objects.filter(
+            conversation_id=conversation_id, is_active=True
+        ).update(is_active=False)
+        conversation_key = ConversationKey.objects.create(
+            conversation_id=conversation_id,
+            wrapped_key=wrapped,
+            master_key_id=master_key_id,
+        )
+    data_key_cache.put_key(conversation_key.pk, AESGCM(data_key))
+    data_key_cache.set_active(conversation_id, conversation_key.pk)
+    return conversation_key
+
+
+def active_key(conversation_id):
+    """Return (key id, AESGCM) for sealing new content in a conversation."""
+    key_id = data_key_cache.get_active(conversation_id)
+    if key_id is None:
+        from .models import ConversationKey
+        key_id = ConversationKey.objects.filter(
+            conversation_id=conversation_id, is_active=True
+        ).values_list('pk', flat=True).first()
+        if key_id is None:
+            try:
+                key_id = create_data_key(conversation_id).pk
+            except IntegrityError:
+                # Another writer created it first
+                key_id = ConversationKey.objects.filter(
+                    conversation_id=conversation_id, is_active=True
+                ).values_list('pk', flat=True).get()
+        data_key_cache.set_active(conversation_id, key_id)
+    return key_id, _load_key(key_id)
+
+
+# ── Sealing ──────────────────────────────────────────────────────────────────
+
+def is_sealed(value) -> bool:
+    return isinstance(value, str) and value.startswith(SEALED_PREFIX)
+
+
+def sealed_key_id(value):
+    """ConversationKey id a sealed value was written with (None for plaintext)."""
+    if not is_sealed(value):
+        return None
+    key_id = value[len(SEALED_PREFIX):].partition(':')[0]
+    return int(key_id) if key_id.isdigit() else None
+
+
+def seal(conversation_id, plaintext: str) -> str:
+    """Encrypt text with the conversation's active data key."""
+    return seal_with_key(*active_key(conversation_id), plaintext)
+
+
+def seal_with_key(key_id, aesgcm, plaintext: str) -> str:
+    """Encrypt text with a specific data key."""
+    nonce = os.urandom(12)
+    aad = f'{SEALED_PREFIX}{key_id}'.encode('utf-8')
+    sealed = aesgcm.encrypt(nonce, plaintext.encode('utf-8'), aad)
+    return f'{SEALED_PREFIX}{key_id}:' + base64.b64encode(nonce + sealed).decode('ascii')
+
+
+def unseal(value: str) -> str:
+    """Decrypt a sealed value (raises ValueError, LookupError or InvalidTag)."""
+    key_id, _, payload = value[len(SEALED_PREFIX):].partition(':')
+    raw = base64.b64decode(payload, validate=True)
+    aad = f'{SEALED_PREFIX}{key_id}'.encode('utf-8')
+    return _load_key(int(key_id)).decrypt(raw[:12], raw[12:], aad).decode('utf-8')
+
+
+def seal_for_storage(conversation_id, text: str) -> str:
+    """Value to write for `text`: sealed when at-rest encryption is enabled."""
+    if not text or not is_enabled() or conversation_id is None:
+        return text
+    return seal(conversation_id, text)
+
+
+def open_from_storage(value):
+    """Plaintext for a stored value; legacy plaintext rows pass through."""
+    if not is_sealed(value):
+        return value
+    try:
+        return unseal(value)
+    except (ValueError, LookupError, InvalidTag, ObjectDoesNotExist) as e:
+        # Unreadable (missing master key, damaged row): keep the ciphertext, never guess
+        logger.error(f"Could not decrypt stored message content: {type(e).__name__}")
+        return value
+
+
+def get_data_key_stats():
+    """Get data key cache counters for this process."""
+    return data_key_cache.stats()
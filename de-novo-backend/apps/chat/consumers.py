@@ -6,15 +6,20 @@ import json
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 
+from .outbound import OutboundQueue
+
 logger = logging.getLogger(__name__)
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
     """
     WebSocket consumer for real-time chat functionality.
-    Handles messages, typing indicators, and read receipts.
+    Handles messages, edits, deletes, typing indicators, and read receipts.
+    Channel-layer events go through a bounded OutboundQueue rather than
+    straight to the socket, so slow clients cannot grow buffers unbounded.
     """
     
     async def connect(self):
@@ -34,6 +39,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
         
+        self.outbound = OutboundQueue(self.send)
+        
         # Join conversation group
         await self.channel_layer.group_add(
             self.room_group_name,
@@ -57,6 +64,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection."""
+        if hasattr(self, 'outbound'):
+            self.outbound.close()
+        
         if hasattr(self, 'room_group_name'):
             # Notify others that user left
             await self.channel_layer.group_send(
@@ -90,6 +100,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 await self.handle_typing(data)
             elif message_type == 'read':
                 await self.handle_read_receipt(data)
+            elif message_type == 'edit':
+                await self.handle_edit(data)
+            elif message_type == 'delete':
+                await self.handle_delete(data)
             elif message_type == 'ping':
                 await self.send(text_data=json.dumps({'type': 'pong'}))
         except json.JSONDecodeError:
@@ -109,6 +123,20 @@ class ChatConsumer(AsyncWebsocketConsumer):
         # Save message to database
         message_data = await self.save_message(content, message_type)
         
+        # Analyze sentiment on the event loop (no worker thread held during the API call).
+        # A Cloud NLP answer that misses the latency budget is applied when it arrives.
+        from apps.ai_services.sentiment_analyzer import sentiment_analyzer
+        late = None
+        try:
+            from .realtime import sentiment_fields
+            
+            result, late = await sentiment_analyzer.analyze_async_deferred(content)
+            sentiment_data = sentiment_fields(result)
+            await self.save_sentiment(message_data['id'], sentiment_data)
+            message_data.update(sentiment_data)
+        except Exception as e:
+            logger.warning(f"Sentiment analysis error in consumer: {type(e).__name__}")
+        
         # Broadcast to group
         await self.channel_layer.group_send(
             self.room_group_name,
@@ -117,6 +145,21 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 'message': message_data
             }
         )
+        
+        # The late result is stored and sent only after the fallback and the message itself
+        if late is not None:
+            async def apply_late(late_result, message_id=message_data['id']):
+                await self.apply_late_sentiment(message_id, late_result)
+            
+            sentiment_analyzer.on_late_async(late, apply_late)
+    
+    async def apply_late_sentiment(self, message_id, result):
+        """Store and broadcast a Cloud NLP result that arrived after the message was sent."""
+        from .realtime import sentiment_event, sentiment_fields
+        
+        fields = sentiment_fields(result)
+        if await self.save_sentiment(message_id, fields, unedited_only=True):
+            await self.channel_layer.group_send(self.room_group_name, sentiment_event(message_id, fields))
     
     async def handle_typing(self, data):
         """Handle typing indicator."""
@@ -148,52 +191,100 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 }
             )
     
+    async def handle_edit(self, data):
+        """Handle edit of one of the user's own text messages."""
+        message_id = data.get('message_id')
+        content = data.get('content', '')
+        if not message_id or not content:
+            return
+        
+        edited = await self.edit_message(message_id, content)
+        if edited is None:
+            await self.send_error('Message not found or you cannot edit it')
+            return
+        
+        event, follow_up = edited
+        await self.channel_layer.group_send(self.room_group_name, event)
+        follow_up()
+    
+    async def handle_delete(self, data):
+        """Handle soft delete of one of the user's own messages."""
+        message_id = data.get('message_id')
+        if not message_id:
+            return
+        
+        event = await self.delete_message(message_id)
+        if event is None:
+            await self.send_error('Message not found or you cannot delete it')
+            return
+        
+        await self.channel_layer.group_send(self.room_group_name, event)
+    
+    async def send_error(self, message):
+        """Send an error frame straight to this socket."""
+        await self.send(text_data=json.dumps({
+            'type': 'error',
+            'message': message
+        }))
+    
     # Event handlers (called when receiving from channel layer)
     
     async def chat_message(self, event):
-        """Send message to WebSocket."""
-        await self.send(text_data=json.dumps({
+        """Queue message for the WebSocket."""
+        self.outbound.put({
             'type': 'message',
             'message': event['message']
-        }))
+        })
+    
+    async def message_updated(self, event):
+        """Queue edit delta for the WebSocket."""
+        self.outbound.put(dict(event))
+    
+    async def sentiment_updated(self, event):
+        """Queue late sentiment delta for the WebSocket."""
+        self.outbound.put(dict(event))
+    
+    async def message_deleted(self, event):
+        """Queue delete delta for the WebSocket."""
+        self.outbound.put(dict(event))
     
     async def typing_indicator(self, event):
-        """Send typing indicator to WebSocket."""
+        """Queue typing indicator for the WebSocket."""
         # Don't send to the user who is typing
         if event['user_id'] != self.user.id:
-            await self.send(text_data=json.dumps({
+            self.outbound.put({
                 'type': 'typing',
                 'user_id': event['user_id'],
                 'username': event['username'],
                 'is_typing': event['is_typing']
-            }))
+            })
     
     async def read_receipt(self, event):
-        """Send read receipt to WebSocket."""
-        await self.send(text_data=json.dumps({
+        """Queue read receipt for the WebSocket."""
+        self.outbound.put({
             'type': 'read',
             'message_id': event['message_id'],
             'reader_id': event['reader_id'],
             'reader_username': event['reader_username']
-        }))
+        })
     
     async def user_joined(self, event):
-        """Send user joined notification."""
+        """Queue user joined notification."""
         if event['user_id'] != self.user.id:
-            await self.send(text_data=json.dumps({
+            self.outbound.put({
                 'type': 'user_joined',
                 'user_id': event['user_id'],
                 'username': event['username']
-            }))
+            })
     
     async def user_left(self, event):
-        """Send user left notification."""
+        """Queue user left notification."""
         if event['user_id'] != self.user.id:
-            await self.send(text_data=json.dumps({
+            self.outbound.put({
                 'type': 'user_left',
                 'user_id': event['user_id'],
                 'username': event['username']
-            }))
+            })
     
     # Database operations
     
@@ -226,23 +317,6 @@ class ChatConsumer(AsyncWebsocketConsumer):
         conversation.last_message_sender = self.user
         conversation.save()
         
-        # Analyze sentiment
-        sentiment_data = {}
-        try:
-            from apps.ai_services.sentiment_analyzer import sentiment_analyzer
-            result = sentiment_analyzer.analyze(content)
-            message.sentiment = result.get('sentiment')
-            message.sentiment_score = result.get('score')
-            message.emotion = result.get('emotion', '')
-            message.save()
-            sentiment_data = {
-                'sentiment': message.sentiment,
-                'sentiment_score': message.sentiment_score,
-                'emotion': message.emotion
-            }
-        except Exception as e:
-            logger.warning(f"Sentiment analysis error in consumer: {type(e).__name__}")
-        
         return {
             'id': str(message.id),
             'sender_id': self.user.id,
@@ -251,9 +325,52 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'content': content,
             'message_type': message_type,
             'created_at': message.created_at.isoformat(),
-            **sentiment_data
         }
     
+    @database_sync_to_async
+    def save_sentiment(self, message_id, sentiment_data, unedited_only=False):
+        """Store sentiment analysis results on a saved message; returns rows updated."""
+        from .models import Message
+        messages = Message.objects.filter(id=message_id)
+        if unedited_only:
+            messages = messages.filter(edited_at__isnull=True)
+        return messages.update(**sentiment_data)
+    
+    @database_sync_to_async
+    def edit_message(self, message_id, content):
+        """Edit a message; returns (delta event, follow_up) or None if not allowed."""
+        from .models import Message
+        from .realtime import edit_message
+        
+        try:
+            message = Message.objects.get(
+                id=message_id,
+                conversation_id=self.conversation_id,
+                sender=self.user,
+                message_type='text',
+                is_deleted=False
+            )
+        except (Message.DoesNotExist, ValueError, ValidationError):
+            return None
+        return edit_message(message, content)
+    
+    @database_sync_to_async
+    def delete_message(self, message_id):
+        """Soft-delete a message; returns the delta event or None if not allowed."""
+        from .models import Message
+        from .realtime import delete_message
+        
+        try:
+            message = Message.objects.get(
+                id=message_id,
+                conversation_id=self.conversation_id,
+                sender=self.user,
+                is_deleted=False
+            )
+        except (Message.DoesNotExist, ValueError, ValidationError):
+            return None
+        return delete_message(message)
+    
     @database_sync_to_async
     def mark_message_read(self, message_id):
         """Mark a message as read."""
@@ -0,0 +1,37 @@
+"""
+Model fields for chat content encrypted at rest (see at_rest.py).
+"""
+
+from django.db import models
+
+from . import at_rest
+
+
+class EncryptedTextField(models.TextField):
+    """
+    TextField sealed with the owning conversation's data key on save and
+    opened transparently on load. The instance attribute always holds
+    plaintext.
+
+    `conversation_attr` names the instance attribute holding the
+    conversation id ('conversation_id' on Message, 'id' on Conversation).
+    Queryset update() bypasses sealing: pass at_rest.seal_for_storage(...)
+    explicitly there. Sealed columns cannot be searched or filtered by content.
+    """
+
+    def __init__(self, *args, conversation_attr='conversation_id', **kwargs):
+        self.conversation_attr = conversation_attr
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.conversation_attr != 'conversation_id':
+            kwargs['conversation_attr'] = self.conversation_attr
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        return at_rest.open_from_storage(value)
+
+    def pre_save(self, model_instance, add):
+        value = super().pre_save(model_instance, add)
+        return at_rest.seal_for_storage(getattr(model_instance, self.conversation_attr), value)
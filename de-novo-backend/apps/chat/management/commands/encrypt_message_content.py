@@ -0,0 +1,76 @@
+"""
+Seal existing plaintext message content with per-conversation data keys.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, TextField
+
+from apps.chat import at_rest
+from apps.chat.models import Conversation, Message
+
+
+def _raw(field_name):
+    # A plain TextField output skips EncryptedTextField.from_db_value, exposing the stored value
+    return ExpressionWrapper(F(field_name), output_field=TextField())
+
+
+class Command(BaseCommand):
+    help = 'Encrypt plaintext message content at rest, in primary-key batches (safe to re-run).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='count rows without writing')
+
+    def handle(self, *args, **options):
+        if not at_rest.is_enabled():
+            raise CommandError('Configure MESSAGE_MASTER_KEYS and MESSAGE_MASTER_KEY_ID first.')
+
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        sealed = self.seal_table(
+            Message, 'conversation_id', ['content', 'transcription'], batch_size, dry_run
+        )
+        self.stdout.write(f"Messages: {sealed} rows {'to seal' if dry_run else 'sealed'}")
+
+        sealed = self.seal_table(
+            Conversation, 'id', ['last_message_text'], batch_size, dry_run
+        )
+        self.stdout.write(f"Conversation previews: {sealed} rows {'to seal' if dry_run else 'sealed'}")
+
+    def seal_table(self, model, conversation_attr, fields, batch_size, dry_run):
+        raw_names = [f'raw_{name}' for name in fields]
+        queryset = model.objects.order_by('pk').annotate(
+            **{raw: _raw(name) for raw, name in zip(raw_names, fields)}
+        )
+
+        last_pk = None
+        total = 0
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            rows = list(batch.values_list('pk', conversation_attr, *raw_names)[:batch_size])
+            if not rows:
+                return total
+            last_pk = rows[-1][0]
+
+            updates = []
+            for pk, conversation_id, *values in rows:
+                if all(not value or at_rest.is_sealed(value) for value in values):
+                    continue
+                if dry_run:
+                    updates.append(pk)
+                    continue
+                instance = model(pk=pk)
+                for name, value in zip(fields, values):
+                    if value and not at_rest.is_sealed(value):
+                        value = at_rest.seal(conversation_id, value)
+                    setattr(instance, name, value)
+                updates.append(instance)
+
+            if updates and not dry_run:
+                # bulk_update writes the values as given (no pre_save), i.e. already sealed
+                with transaction.atomic():
+                    model.objects.bulk_update(updates, fields)
+            total += len(updates)
+            self.stdout.write(f"  {model.__name__}: {total} rows through pk {last_pk}")
@@ -0,0 +1,130 @@
+"""
+Rotate at-rest encryption keys and re-encrypt message content (resumable).
+"""
+
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.chat import at_rest, rotation
+from apps.chat.models import KeyRotationCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-wrap conversation keys onto MESSAGE_MASTER_KEY_ID and re-encrypt content '
+        'not sealed under the active keys. Re-run with the same --job to resume.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', required=True, help='job name; checkpoints are kept under it')
+        parser.add_argument('--data-keys', action='store_true',
+                            help='also replace each conversation data key before re-encrypting')
+        parser.add_argument('--conversation', action='append', default=[], metavar='ID',
+                            help='limit to a conversation (repeatable)')
+        parser.add_argument('--workers', type=int, default=1, help='worker processes for re-encryption')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-rate', type=float, default=0,
+                            help='rows per second across all workers (0 = unthrottled)')
+        parser.add_argument('--progress-interval', type=float, default=5.0, help='seconds between reports')
+        parser.add_argument('--status', action='store_true', help='report progress and exit')
+
+    def handle(self, *args, **options):
+        if not at_rest.is_enabled():
+            raise CommandError('Configure MESSAGE_MASTER_KEYS and MESSAGE_MASTER_KEY_ID first.')
+        try:
+            conversation_ids = [str(uuid.UUID(value)) for value in options['conversation']]
+        except ValueError as e:
+            raise CommandError(f'Invalid conversation id: {e}')
+
+        job = options['job']
+        phases = [rotation.PHASE_MASTER_KEYS]
+        if options['data_keys']:
+            phases.append(rotation.PHASE_DATA_KEYS)
+        phases += [rotation.PHASE_MESSAGES, rotation.PHASE_PREVIEWS]
+
+        if options['status']:
+            for phase in phases:
+                self.report(rotation.phase_status(job, phase, conversation_ids))
+            self.report_master_keys()
+            return
+
+        if options['data_keys'] and self.started_without_data_keys(job):
+            raise CommandError(f'Job {job} began re-encrypting without --data-keys; start a new job.')
+
+        self.stdout.write(f"Job {job}: master key {at_rest.active_master_key_id()}, "
+                          f"{options['workers']} worker(s), phases {', '.join(phases)}")
+        for phase in phases:
+            if phase == rotation.PHASE_MESSAGES and options['data_keys']:
+                self.wait_for_new_keys(job)
+
+            total = rotation.phase_queryset(phase, conversation_ids).count()
+            last_report = [0.0]
+
+            def progress(job, phase, total=total, last_report=last_report):
+                now = time.monotonic()
+                if now - last_report[0] >= options['progress_interval']:
+                    last_report[0] = now
+                    self.report(rotation.phase_status(job, phase, rows_total=total))
+
+            rotation.run_phase(
+                job, phase, conversation_ids,
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                max_rate=options['max_rate'],
+                progress=progress,
+                poll_interval=options['progress_interval'],
+            )
+            self.report(rotation.phase_status(job, phase, rows_total=total))
+
+        self.report_master_keys()
+
+    def started_without_data_keys(self, job):
+        checkpoints = KeyRotationCheckpoint.objects.filter(job=job)
+        return (
+            checkpoints.filter(phase__in=rotation.RESEAL_PHASES).exists()
+            and not checkpoints.filter(phase=rotation.PHASE_DATA_KEYS, is_complete=True).exists()
+        )
+
+    def wait_for_new_keys(self, job):
+        """
+        Other processes cache a conversation's active key for up to
+        ACTIVE_KEY_TTL seconds. Wait that long after the last new key so
+        nothing is written under a retired key once re-encryption starts.
+        """
+        finished = KeyRotationCheckpoint.objects.filter(
+            job=job, phase=rotation.PHASE_DATA_KEYS
+        ).order_by('-updated_at').values_list('updated_at', flat=True).first()
+        if finished is None:
+            return
+        delay = at_rest.ACTIVE_KEY_TTL - (timezone.now() - finished).total_seconds()
+        if delay > 0:
+            self.stdout.write(f"Waiting {delay:.0f}s for running processes to pick up the new keys")
+            time.sleep(delay)
+
+    def report(self, status):
+        line = (f"  {status['phase']:<12} {status['rows_scanned']:>10,}/{status['rows_total']:,} scanned, "
+                f"{status['rows_rewritten']:,} rewritten")
+        if status['rows_conflicted']:
+            line += f", {status['rows_conflicted']:,} changed concurrently"
+        if status['rows_per_second']:
+            line += f", {status['rows_per_second']:,.0f} rows/s"
+        if status['eta_seconds'] is not None:
+            line += f", ETA {status['eta_seconds']}s"
+        if status['complete']:
+            line += ' (complete)'
+        elif not status['partitions']:
+            line += ' (not started)'
+        self.stdout.write(line)
+
+    def report_master_keys(self):
+        counts = rotation.keys_by_master()
+        active = at_rest.active_master_key_id()
+        self.stdout.write('Conversation keys by master key: ' + (
+            ', '.join(f"{key_id}={count:,}" for key_id, count in sorted(counts.items())) or 'none'
+        ))
+        retired = [key_id for key_id in counts if key_id != active]
+        if retired:
+            self.stdout.write(f"Keep master key(s) {', '.join(sorted(retired))} configured until they reach 0.")
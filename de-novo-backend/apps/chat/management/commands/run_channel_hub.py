@@ -0,0 +1,30 @@
+"""
+Run the local channel hub used by HubChannelLayer (CHANNEL_BACKEND=hub).
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from de_novo.hub_channel_layer import run_hub
+
+
+class Command(BaseCommand):
+    help = 'Run the broker-less channel hub shared by all ASGI workers on this host.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', default='default', help='CHANNEL_LAYERS alias to serve')
+        parser.add_argument('--path', help='Unix socket path (defaults to the layer CONFIG)')
+
+    def handle(self, *args, **options):
+        layer = getattr(settings, 'CHANNEL_LAYERS', {}).get(options['alias'])
+        if layer is None:
+            raise CommandError(f"No channel layer named {options['alias']!r}")
+
+        config = dict(layer.get('CONFIG', {}))
+        for option in ('connect_timeout', 'request_timeout'):
+            config.pop(option, None)  # Client-only options
+        if options['path']:
+            config['path'] = options['path']
+
+        self.stdout.write(f"Channel hub serving {config.get('path', 'default socket')}")
+        run_hub(**config)
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:35
+
+import apps.chat.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='conversation',
+            name='last_message_text',
+            field=apps.chat.fields.EncryptedTextField(blank=True, conversation_attr='id'),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='content',
+            field=apps.chat.fields.EncryptedTextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='transcription',
+            field=apps.chat.fields.EncryptedTextField(blank=True),
+        ),
+        migrations.CreateModel(
+            name='ConversationKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wrapped_key', models.TextField()),
+                ('master_key_id', models.CharField(max_length=32)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='data_keys', to='chat.conversation')),
+            ],
+            options={
+                'verbose_name': 'Conversation Key',
+                'verbose_name_plural': 'Conversation Keys',
+                'db_table': 'conversation_keys',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('conversation',), name='one_active_key_per_conversation')],
+            },
+        ),
+    ]
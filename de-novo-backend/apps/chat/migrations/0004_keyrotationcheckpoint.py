@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_conversationkey_encrypted_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeyRotationCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.CharField(max_length=64)),
+                ('phase', models.CharField(max_length=16)),
+                ('partition', models.PositiveIntegerField(default=0)),
+                ('lower_pk', models.CharField(blank=True, max_length=36)),
+                ('upper_pk', models.CharField(blank=True, max_length=36)),
+                ('last_pk', models.CharField(blank=True, max_length=36)),
+                ('rows_scanned', models.PositiveBigIntegerField(default=0)),
+                ('rows_rewritten', models.PositiveBigIntegerField(default=0)),
+                ('rows_conflicted', models.PositiveBigIntegerField(default=0)),
+                ('is_complete', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Key Rotation Checkpoint',
+                'verbose_name_plural': 'Key Rotation Checkpoints',
+                'db_table': 'key_rotation_checkpoints',
+                'ordering': ['job', 'id'],
+                'unique_together': {('job', 'phase', 'partition')},
+            },
+        ),
+    ]
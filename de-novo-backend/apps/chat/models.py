@@ -1,12 +1,15 @@
 """
 Chat models for De-Novo platform.
 Stores conversations, messages, and voice messages.
+Message text is encrypted at rest when master keys are configured (at_rest.py).
 """
 
 import uuid
 from django.db import models
 from django.conf import settings
 
+from .fields import EncryptedTextField
+
 
 class Conversation(models.Model):
     """
@@ -39,7 +42,7 @@ class Conversation(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     # Last message preview
-    last_message_text = models.TextField(blank=True)
+    last_message_text = EncryptedTextField(blank=True, conversation_attr='id')
     last_message_at = models.DateTimeField(null=True, blank=True)
     last_message_sender = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -104,11 +107,11 @@ class Message(models.Model):
         choices=MESSAGE_TYPES,
         default='text'
     )
-    content = models.TextField(blank=True)  # Text content
+    content = EncryptedTextField(blank=True)  # Text content
     
     # For voice messages
     voice_duration = models.FloatField(null=True, blank=True)
-    transcription = models.TextField(blank=True)  # STT transcription
+    transcription = EncryptedTextField(blank=True)  # STT transcription
     
     # For file/image messages
     file = models.FileField(upload_to='chat_files/', null=True, blank=True)
@@ -139,6 +142,68 @@ class Message(models.Model):
         return f"Message from {self.sender.username} at {self.created_at}"
 
 
+class ConversationKey(models.Model):
+    """
+    Per-conversation data key for at-rest encryption, wrapped by a master key.
+    Retired keys are kept so older rows stay readable.
+    """
+    
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name='data_keys'
+    )
+    wrapped_key = models.TextField()  # base64(nonce | AES-GCM(master key, data key))
+    master_key_id = models.CharField(max_length=32)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'conversation_keys'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['conversation'],
+                condition=models.Q(is_active=True),
+                name='one_active_key_per_conversation'
+            ),
+        ]
+        verbose_name = 'Conversation Key'
+        verbose_name_plural = 'Conversation Keys'
+    
+    def __str__(self):
+        return f"Key {self.pk} for {self.conversation_id} ({self.master_key_id})"
+
+
+class KeyRotationCheckpoint(models.Model):
+    """
+    Progress of one partition of a key rotation job (rotate_message_keys).
+    A re-run with the same job name resumes after `last_pk`.
+    """
+
+    job = models.CharField(max_length=64)
+    phase = models.CharField(max_length=16)
+    partition = models.PositiveIntegerField(default=0)
+    lower_pk = models.CharField(max_length=36, blank=True)  # Inclusive; blank = unbounded
+    upper_pk = models.CharField(max_length=36, blank=True)  # Exclusive; blank = unbounded
+    last_pk = models.CharField(max_length=36, blank=True)
+    rows_scanned = models.PositiveBigIntegerField(default=0)
+    rows_rewritten = models.PositiveBigIntegerField(default=0)
+    rows_conflicted = models.PositiveBigIntegerField(default=0)  # Changed underneath; left as is
+    is_complete = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'key_rotation_checkpoints'
+        unique_together = ['job', 'phase', 'partition']
+        ordering = ['job', 'id']
+        verbose_name = 'Key Rotation Checkpoint'
+        verbose_name_plural = 'Key Rotation Checkpoints'
+
+    def __str__(self):
+        return f"{self.job} {self.phase}[{self.partition}]"
+
+
 class MessageReadReceipt(models.Model):
     """
     Track which users have read which messages.
@@ -0,0 +1,213 @@
+"""
+Per-connection outbound queue for chat WebSockets.
+
+Channel-layer events are buffered for a short window and flushed to the
+socket as a single frame. The queue is bounded: when it is full, low-value
+events (typing, presence) are dropped first, while chat messages are always
+delivered.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Drop priority of outbound frame types: lower values are dropped first.
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_CRITICAL = 2
+
+EVENT_PRIORITIES = {
+    'typing': PRIORITY_LOW,
+    'user_joined': PRIORITY_LOW,
+    'user_left': PRIORITY_LOW,
+    'read': PRIORITY_NORMAL,
+    'sentiment_updated': PRIORITY_NORMAL,
+    'message': PRIORITY_CRITICAL,
+    'message_updated': PRIORITY_CRITICAL,
+    'message_deleted': PRIORITY_CRITICAL,
+}
+
+
+class OutboundMetrics:
+    """
+    Process-wide counters for all outbound chat queues.
+    Read from request threads, written from the event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connections = 0
+            self.queue_depth = 0
+            self.max_queue_depth = 0
+            self.events_enqueued = 0
+            self.events_sent = 0
+            self.frames_sent = 0
+            self.batched_frames = 0
+            self.dropped = {}
+
+    def connection_opened(self):
+        with self._lock:
+            self.connections += 1
+
+    def connection_closed(self, discarded: int):
+        with self._lock:
+            self.connections -= 1
+            self.queue_depth -= discarded
+
+    def enqueued(self, depth: int):
+        with self._lock:
+            self.events_enqueued += 1
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def dropped_event(self, event_type: str, was_queued: bool):
+        with self._lock:
+            self.dropped[event_type] = self.dropped.get(event_type, 0) + 1
+            if was_queued:
+                self.queue_depth -= 1
+
+    def flushed(self, event_count: int):
+        with self._lock:
+            self.queue_depth -= event_count
+            self.events_sent += event_count
+            self.frames_sent += 1
+            if event_count > 1:
+                self.batched_frames += 1
+
+    def snapshot(self) -> dict:
+        """Return a copy of the current counters."""
+        with self._lock:
+            return {
+                'connections': self.connections,
+                'queue_depth': self.queue_depth,
+                'max_queue_depth': self.max_queue_depth,
+                'events_enqueued': self.events_enqueued,
+                'events_sent': self.events_sent,
+                'frames_sent': self.frames_sent,
+                'batched_frames': self.batched_frames,
+                'dropped': dict(self.dropped),
+                'dropped_total': sum(self.dropped.values()),
+            }
+
+
+class OutboundQueue:
+    """
+    Bounded, batching send buffer for one WebSocket connection.
+
+    Frames queued within `batch_window` seconds of each other are sent
+    together as `{'type': 'batch', 'events': [...]}`; a lone frame is sent
+    unchanged so clients that ignore batching keep working.
+    """
+
+    def __init__(self, send, max_size: int = None, batch_window: float = None,
+                 metrics: OutboundMetrics = None):
+        self._send = send
+        self.max_size = max_size or getattr(settings, 'CHAT_OUTBOUND_MAX_QUEUE', 200)
+        if batch_window is None:
+            batch_window = getattr(settings, 'CHAT_OUTBOUND_BATCH_WINDOW_MS', 25) / 1000
+        self.batch_window = batch_window
+        self.metrics = metrics or outbound_metrics
+
+        self._events = []  # (priority, payload) in arrival order
+        self._flush_task = None
+        self._send_lock = asyncio.Lock()
+        self._closed = False
+        self.metrics.connection_opened()
+
+    def __len__(self):
+        return len(self._events)
+
+    def put(self, payload: dict) -> bool:
+        """
+        Queue a frame for delivery.
+        Returns False if the frame was dropped because the queue is full.
+        """
+        if self._closed:
+            return False
+
+        priority = EVENT_PRIORITIES.get(payload.get('type'), PRIORITY_NORMAL)
+        if len(self._events) >= self.max_size and not self._make_room(priority):
+            self.metrics.dropped_event(payload.get('type', 'unknown'), was_queued=False)
+            return False
+
+        self._events.append((priority, payload))
+        self.metrics.enqueued(len(self._events))
+        self._schedule_flush()
+        return True
+
+    def _make_room(self, priority: int) -> bool:
+        """
+        Evict the oldest lowest-priority frame if it is worth no more than
+        the incoming one. Critical frames are admitted past the bound.
+        """
+        victim = min(range(len(self._events)), key=lambda i: self._events[i][0])
+        victim_priority, victim_payload = self._events[victim]
+
+        if victim_priority < PRIORITY_CRITICAL and victim_priority <= priority:
+            del self._events[victim]
+            self.metrics.dropped_event(victim_payload.get('type', 'unknown'), was_queued=True)
+            return True
+
+        return priority == PRIORITY_CRITICAL
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        # put() does not schedule a new flush while this task is running, so
+        # frames queued during a slow send are picked up by another pass here.
+        while self._events and not self._closed:
+            if self.batch_window > 0:
+                await asyncio.sleep(self.batch_window)
+            await self.flush()
+
+    async def flush(self):
+        """Send everything queued so far as one frame."""
+        # The lock keeps frames in order when a slow send overlaps the next window.
+        async with self._send_lock:
+            events, self._events = self._events, []
+            if not events or self._closed:
+                return
+
+            if len(events) == 1:
+                frame = events[0][1]
+            else:
+                frame = {
+                    'type': 'batch',
+                    'events': [payload for _, payload in events],
+                }
+
+            try:
+                await self._send(text_data=json.dumps(frame))
+            finally:
+                self.metrics.flushed(len(events))
+
+    def close(self):
+        """Discard pending frames and stop the flush timer."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        discarded = len(self._events)
+        self._events = []
+        self.metrics.connection_closed(discarded)
+
+
+# Global instance
+outbound_metrics = OutboundMetrics()
+
+
+def get_outbound_stats():
+    """Get outbound queue metrics for this process."""
+    return outbound_metrics.snapshot()
@@ -0,0 +1,166 @@
+"""
+Message edit/delete operations shared by the REST views and ChatConsumer.
+
+Each operation writes only the columns it changes and returns a compact
+delta event that is broadcast to the conversation group, so clients patch
+their local state instead of refetching the message list.
+"""
+
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .at_rest import seal_for_storage
+from .models import Conversation, Message
+
+logger = logging.getLogger(__name__)
+
+
+def conversation_group(conversation_id) -> str:
+    """Channel-layer group name for a conversation."""
+    return f'chat_{conversation_id}'
+
+
+def edit_message(message: Message, content: str):
+    """
+    Replace a message's text and re-run sentiment analysis.
+    Returns (event, follow_up): the `message_updated` delta event, and a
+    callable to run once that event has been broadcast. It starts delivery
+    of a Cloud NLP result still pending for the new text, which can then
+    neither be overwritten by the edit nor announced before it.
+    """
+    message.content = content
+    message.edited_at = timezone.now()
+    update_fields = ['content', 'edited_at']
+    late = None
+
+    try:
+        from apps.ai_services.sentiment_analyzer import sentiment_analyzer
+        result, late = sentiment_analyzer.analyze_deferred(content)
+        sentiment = sentiment_fields(result)
+        for field, value in sentiment.items():
+            if getattr(message, field) != value:
+                setattr(message, field, value)
+                update_fields.append(field)
+    except Exception as e:
+        logger.warning(f"Sentiment analysis error on edit: {type(e).__name__}")
+
+    message.save(update_fields=update_fields)
+    _refresh_preview(message)
+
+    def follow_up():
+        if late is not None:
+            watch_late_sentiment(message, late)
+
+    event = {
+        'type': 'message_updated',
+        'message_id': str(message.id),
+        'content': message.content,
+        'edited_at': message.edited_at.isoformat(),
+        'sentiment': message.sentiment,
+        'sentiment_score': message.sentiment_score,
+        'emotion': message.emotion,
+    }
+    return event, follow_up
+
+
+def sentiment_fields(result: dict) -> dict:
+    """Message columns for a sentiment_analyzer result."""
+    return {
+        'sentiment': result.get('sentiment'),
+        'sentiment_score': result.get('score'),
+        'emotion': result.get('emotion', ''),
+    }
+
+
+def sentiment_event(message_id, fields: dict) -> dict:
+    """The `sentiment_updated` delta event."""
+    return {
+        'type': 'sentiment_updated',
+        'message_id': str(message_id),
+        **fields,
+    }
+
+
+def apply_late_sentiment(message: Message, result: dict):
+    """
+    Store a Cloud NLP result that arrived after the message was answered with
+    the local fallback, and broadcast it. Skipped if the message was edited
+    in the meantime (the edit analyzed the new text).
+    """
+    close_old_connections()
+    try:
+        fields = sentiment_fields(result)
+        updated = Message.objects.filter(id=message.id, edited_at=message.edited_at).update(**fields)
+        if updated:
+            broadcast(message.conversation_id, sentiment_event(message.id, fields))
+    finally:
+        close_old_connections()
+
+
+def watch_late_sentiment(message: Message, late):
+    """
+    Apply a pending Cloud NLP result (from analyze_deferred) to `message`
+    when it arrives. Call only after the fallback result has been saved.
+    """
+    from apps.ai_services.sentiment_analyzer import sentiment_analyzer
+    sentiment_analyzer.on_late(late, lambda result: apply_late_sentiment(message, result))
+
+
+def delete_message(message: Message) -> dict:
+    """
+    Soft-delete a message.
+    Returns the `message_deleted` delta event.
+    """
+    message.is_deleted = True
+    message.save(update_fields=['is_deleted'])
+    _refresh_preview(message)
+
+    return {
+        'type': 'message_deleted',
+        'message_id': str(message.id),
+    }
+
+
+def _refresh_preview(message: Message):
+    """Update the conversation preview if `message` was the latest one."""
+    latest = Message.objects.filter(
+        conversation_id=message.conversation_id,
+        is_deleted=False
+    ).only(
+        'id', 'content', 'message_type', 'created_at', 'sender_id'
+    ).order_by('-created_at').first()
+
+    if latest is not None and latest.created_at > message.created_at:
+        return  # An older message changed; the preview still shows a newer one
+
+    if latest is None:
+        Conversation.objects.filter(id=message.conversation_id).update(
+            last_message_text='',
+            last_message_at=None,
+            last_message_sender=None
+        )
+    else:
+        if latest.message_type == 'voice':
+            preview = '🎤 Voice message'
+        else:
+            preview = latest.content[:100] if latest.content else ''
+        # update() skips field pre_save, so seal the preview here
+        Conversation.objects.filter(id=message.conversation_id).update(
+            last_message_text=seal_for_storage(message.conversation_id, preview),
+            last_message_at=latest.created_at,
+            last_message_sender_id=latest.sender_id
+        )
+
+
+def broadcast(conversation_id, event: dict):
+    """Send a delta event to every socket in the conversation (sync callers)."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(conversation_group(conversation_id), event)
+    except Exception as e:
+        logger.warning(f"Broadcast to conversation {conversation_id} failed: {type(e).__name__}")
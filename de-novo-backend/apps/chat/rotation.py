@@ -0,0 +1,306 @@
+"""
+Resumable key rotation for message content encrypted at rest.
+
+A job runs up to four phases, each checkpointed per partition in
+KeyRotationCheckpoint so an interrupted job resumes where it stopped:
+
+    master_keys  re-wrap ConversationKey rows onto MESSAGE_MASTER_KEY_ID
+    data_keys    give each targeted conversation a fresh data key (optional)
+    messages     re-seal message content/transcriptions not under the active key
+    previews     the same for Conversation.last_message_text
+
+Rows are visited in primary-key order in batches. The UUID-keyed phases are
+split into key ranges processed by separate worker processes. Old and new
+keys coexist throughout: retired data keys and old master keys stay
+readable, so the application keeps working while a job is in progress.
+"""
+
+import functools
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Count, ExpressionWrapper, F, TextField
+
+from . import at_rest
+from .models import Conversation, ConversationKey, KeyRotationCheckpoint, Message
+
+PHASE_MASTER_KEYS = 'master_keys'
+PHASE_DATA_KEYS = 'data_keys'
+PHASE_MESSAGES = 'messages'
+PHASE_PREVIEWS = 'previews'
+
+# (model, sealed fields, attribute holding the conversation id)
+RESEAL_PHASES = {
+    PHASE_MESSAGES: (Message, ['content', 'transcription'], 'conversation_id'),
+    PHASE_PREVIEWS: (Conversation, ['last_message_text'], 'id'),
+}
+
+
+def _raw(field_name):
+    # A plain TextField output skips EncryptedTextField.from_db_value, exposing the stored value
+    return ExpressionWrapper(F(field_name), output_field=TextField())
+
+
+def uuid_partitions(count: int):
+    """Split the UUID space into `count` [lower, upper) ranges ('' = unbounded)."""
+    bounds = [str(uuid.UUID(int=i * (2 ** 128) // count)) for i in range(1, count)]
+    lowers = [''] + bounds
+    uppers = bounds + ['']
+    return list(zip(lowers, uppers))
+
+
+def get_checkpoints(job: str, phase: str, partitions: int = 1):
+    """
+    Checkpoints for a phase, created on first use. A resumed phase keeps the
+    partitioning it started with, whatever `partitions` is now.
+    """
+    existing = list(KeyRotationCheckpoint.objects.filter(job=job, phase=phase).order_by('partition'))
+    if existing:
+        return existing
+    ranges = uuid_partitions(partitions) if phase in RESEAL_PHASES else [('', '')]
+    with transaction.atomic():
+        for index, (lower, upper) in enumerate(ranges):
+            KeyRotationCheckpoint.objects.get_or_create(
+                job=job, phase=phase, partition=index,
+                defaults={'lower_pk': lower, 'upper_pk': upper},
+            )
+    return list(KeyRotationCheckpoint.objects.filter(job=job, phase=phase).order_by('partition'))
+
+
+def phase_queryset(phase: str, conversation_ids=None):
+    """pk-ordered queryset of the rows a phase visits."""
+    if phase == PHASE_MASTER_KEYS:
+        queryset = ConversationKey.objects.all()
+        if conversation_ids:
+            queryset = queryset.filter(conversation_id__in=conversation_ids)
+        return queryset.order_by('pk')
+
+    if phase == PHASE_DATA_KEYS:
+        queryset = Conversation.objects.all()
+        if conversation_ids:
+            queryset = queryset.filter(pk__in=conversation_ids)
+        return queryset.order_by('pk')
+
+    model, fields, conversation_attr = RESEAL_PHASES[phase]
+    # Load stored values only; decrypting every row on load would be wasted work
+    queryset = model.objects.defer(*fields).annotate(**{f'raw_{name}': _raw(name) for name in fields})
+    if conversation_ids:
+        queryset = queryset.filter(**{f'{conversation_attr}__in': conversation_ids})
+    return queryset.order_by('pk')
+
+
+def _partition_queryset(checkpoint, conversation_ids):
+    queryset = phase_queryset(checkpoint.phase, conversation_ids)
+    if checkpoint.lower_pk:
+        queryset = queryset.filter(pk__gte=checkpoint.lower_pk)
+    if checkpoint.upper_pk:
+        queryset = queryset.filter(pk__lt=checkpoint.upper_pk)
+    return queryset
+
+
+# ── Batch planners ───────────────────────────────────────────────────────────
+# Each returns the writes for a batch as callables returning 1 if applied, or
+# 0 if the row changed since it was read. All reads and crypto happen here,
+# outside the batch transaction, which then only writes.
+
+def _plan_rewrap(rows):
+    """Re-wrap data keys that are not under the active master key."""
+    master_key_id = at_rest.active_master_key_id()
+    writes = []
+    for conversation_key in rows:
+        if conversation_key.master_key_id == master_key_id:
+            continue
+        data_key = at_rest.unwrap_data_key(conversation_key)
+        wrapped, _ = at_rest.wrap_data_key(data_key, conversation_key.conversation_id, master_key_id)
+        queryset = ConversationKey.objects.filter(
+            pk=conversation_key.pk, master_key_id=conversation_key.master_key_id
+        )
+        writes.append(functools.partial(queryset.update, wrapped_key=wrapped, master_key_id=master_key_id))
+    return writes
+
+
+def _create_data_key(conversation_id):
+    at_rest.create_data_key(conversation_id)
+    return 1
+
+
+def _plan_data_keys(rows):
+    """Create a fresh active data key for each conversation."""
+    return [functools.partial(_create_data_key, conversation.pk) for conversation in rows]
+
+
+def _plan_reseal(phase, rows):
+    """Re-seal values that are plaintext or sealed under a retired key."""
+    model, fields, conversation_attr = RESEAL_PHASES[phase]
+    active = dict(
+        ConversationKey.objects.filter(
+            conversation_id__in={getattr(row, conversation_attr) for row in rows}, is_active=True
+        ).values_list('conversation_id', 'pk')
+    )
+    writes = []
+    for row in rows:
+        conversation_id = getattr(row, conversation_attr)
+        raw = {name: getattr(row, f'raw_{name}') for name in fields}
+        stale = {
+            name: value for name, value in raw.items()
+            if value and at_rest.sealed_key_id(value) != active.get(conversation_id)
+        }
+        if not stale:
+            continue
+        if conversation_id not in active:
+            active[conversation_id] = at_rest.active_key(conversation_id)[0]
+        key_id = active[conversation_id]
+        aesgcm = at_rest._load_key(key_id)
+        changes = {}
+        for name, value in stale.items():
+            plaintext = at_rest.unseal(value) if at_rest.is_sealed(value) else value
+            changes[name] = at_rest.seal_with_key(key_id, aesgcm, plaintext)
+        # Only overwrite what was read: a concurrent edit has already re-sealed the row
+        queryset = model.objects.filter(pk=row.pk, **stale)
+        writes.append(functools.partial(queryset.update, **changes))
+    return writes
+
+
+def plan_batch(phase, rows):
+    if phase == PHASE_MASTER_KEYS:
+        return _plan_rewrap(rows)
+    if phase == PHASE_DATA_KEYS:
+        return _plan_data_keys(rows)
+    return _plan_reseal(phase, rows)
+
+
+# ── Runner ───────────────────────────────────────────────────────────────────
+
+def run_partition(checkpoint_id, conversation_ids=None, batch_size=500, max_rate=0, progress=None):
+    """
+    Process one checkpointed partition to completion.
+
+    `max_rate` caps rows scanned per second (0 = unthrottled); the job
+    sleeps between batches to stay under it. `progress(checkpoint)` is
+    called after each batch.
+    """
+    checkpoint = KeyRotationCheckpoint.objects.get(pk=checkpoint_id)
+    queryset = _partition_queryset(checkpoint, conversation_ids)
+    started = time.monotonic()
+    scanned = 0
+
+    while not checkpoint.is_complete:
+        batch = queryset.filter(pk__gt=checkpoint.last_pk) if checkpoint.last_pk else queryset
+        rows = list(batch[:batch_size])
+        if not rows:
+            checkpoint.is_complete = True
+            checkpoint.save(update_fields=['is_complete', 'updated_at'])
+            break
+
+        writes = plan_batch(checkpoint.phase, rows)
+        with transaction.atomic():
+            rewritten = sum(write() for write in writes)
+            conflicted = len(writes) - rewritten
+            checkpoint.last_pk = str(rows[-1].pk)
+            checkpoint.rows_scanned += len(rows)
+            checkpoint.rows_rewritten += rewritten
+            checkpoint.rows_conflicted += conflicted
+            checkpoint.save()
+        if progress:
+            progress(checkpoint)
+
+        scanned += len(rows)
+        if max_rate:
+            delay = scanned / max_rate - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+    return checkpoint.rows_rewritten
+
+
+def _worker_init():
+    import django
+    django.setup()  # No-op under fork; needed where workers are spawned
+    close_old_connections()
+
+
+def _run_in_worker(checkpoint_id, conversation_ids, batch_size, max_rate):
+    try:
+        return run_partition(checkpoint_id, conversation_ids, batch_size, max_rate)
+    finally:
+        connections.close_all()
+
+
+def run_phase(job, phase, conversation_ids=None, workers=1, batch_size=500, max_rate=0,
+              progress=None, poll_interval=5.0):
+    """
+    Run (or resume) a phase. Partitions run in `workers` processes; `max_rate`
+    is the total rows/second budget, shared between them.
+    """
+    checkpoints = get_checkpoints(job, phase, workers if phase in RESEAL_PHASES else 1)
+    pending = [c for c in checkpoints if not c.is_complete]
+    if not pending:
+        return checkpoints
+
+    if len(pending) == 1 or workers <= 1:
+        for checkpoint in pending:
+            run_partition(checkpoint.pk, conversation_ids, batch_size, max_rate,
+                          progress=(lambda _: progress(job, phase)) if progress else None)
+        return get_checkpoints(job, phase)
+
+    per_worker_rate = max_rate / min(workers, len(pending)) if max_rate else 0
+    # Children must not share the parent's database connections
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(pending)),
+        mp_context=multiprocessing.get_context(),
+        initializer=_worker_init,
+    ) as executor:
+        futures = [
+            executor.submit(_run_in_worker, c.pk, conversation_ids, batch_size, per_worker_rate)
+            for c in pending
+        ]
+        while wait(futures, timeout=poll_interval).not_done:
+            if progress:
+                progress(job, phase)
+        for future in futures:
+            future.result()  # Re-raise worker errors
+    return get_checkpoints(job, phase)
+
+
+def phase_status(job: str, phase: str, conversation_ids=None, rows_total=None) -> dict:
+    """
+    Aggregate progress of a phase: rows done, total, rate and ETA.
+    Pass `rows_total` when polling to avoid a COUNT per call.
+    """
+    if rows_total is None:
+        rows_total = phase_queryset(phase, conversation_ids).count()
+    checkpoints = list(KeyRotationCheckpoint.objects.filter(job=job, phase=phase))
+    scanned = sum(c.rows_scanned for c in checkpoints)
+    status = {
+        'phase': phase,
+        'partitions': len(checkpoints),
+        'complete': bool(checkpoints) and all(c.is_complete for c in checkpoints),
+        'rows_scanned': scanned,
+        'rows_rewritten': sum(c.rows_rewritten for c in checkpoints),
+        'rows_conflicted': sum(c.rows_conflicted for c in checkpoints),
+        'rows_total': rows_total,
+        'rows_per_second': None,
+        'eta_seconds': None,
+    }
+    if checkpoints and scanned:
+        started = min(c.created_at for c in checkpoints)
+        updated = max(c.updated_at for c in checkpoints)
+        elapsed = (updated - started).total_seconds()
+        if elapsed > 0:
+            rate = scanned / elapsed
+            status['rows_per_second'] = round(rate, 1)
+            if not status['complete']:
+                status['eta_seconds'] = round(max(0, status['rows_total'] - scanned) / rate)
+    return status
+
+
+def keys_by_master() -> dict:
+    """Count of conversation keys per wrapping master key id."""
+    return dict(
+        ConversationKey.objects.values('master_key_id')
+        .annotate(count=Count('pk')).values_list('master_key_id', 'count')
+    )
@@ -50,6 +50,12 @@ class SendMessageSerializer(serializers.Serializer):
     file = serializers.FileField(required=False)
 
 
+class EditMessageSerializer(serializers.Serializer):
+    """Serializer for editing a text message."""
+    
+    content = serializers.CharField(required=True, allow_blank=False)
+
+
 class ConversationSerializer(serializers.ModelSerializer):
     """Serializer for conversations."""
     
@@ -0,0 +1,108 @@
+import asyncio
+import base64
+import json
+from unittest import IsolatedAsyncioTestCase
+
+from cryptography.exceptions import InvalidTag
+from django.contrib.auth import get_user_model
+from django.db.models import ExpressionWrapper, F, TextField
+from django.test import TestCase, override_settings
+
+from . import at_rest
+from .models import Conversation, Message
+from .outbound import OutboundMetrics, OutboundQueue
+
+MASTER_KEY = base64.b64encode(bytes(range(32))).decode('ascii')
+OTHER_MASTER_KEY = base64.b64encode(bytes(range(32, 64))).decode('ascii')
+
+
+class OutboundQueueTests(IsolatedAsyncioTestCase):
+
+    async def test_frame_queued_during_slow_send_is_flushed(self):
+        sent = []
+
+        async def send(text_data):
+            await asyncio.sleep(0.2)
+            sent.append(json.loads(text_data))
+
+        queue = OutboundQueue(send, batch_window=0.01, metrics=OutboundMetrics())
+        queue.put({'type': 'message', 'id': 1})
+        await asyncio.sleep(0.05)  # First flush is now inside send()
+        queue.put({'type': 'message', 'id': 2})
+        await asyncio.sleep(0.6)
+
+        self.assertEqual([frame['id'] for frame in sent], [1, 2])
+        self.assertEqual(len(queue), 0)
+        queue.close()
+
+
+@override_settings(MESSAGE_MASTER_KEYS={'1': MASTER_KEY}, MESSAGE_MASTER_KEY_ID='1')
+class AtRestEncryptionTests(TestCase):
+
+    def setUp(self):
+        at_rest.data_key_cache.clear()
+        self.addCleanup(at_rest.data_key_cache.clear)
+        self.user = get_user_model().objects.create_user(
+            username='alice', email='alice@example.com', password='pw-123456'
+        )
+        self.conversation = Conversation.objects.create(created_by=self.user)
+
+    def _stored(self, message):
+        # A plain TextField output skips EncryptedTextField.from_db_value
+        return Message.objects.filter(pk=message.pk).annotate(
+            raw=ExpressionWrapper(F('content'), output_field=TextField())
+        ).values_list('raw', flat=True).get()
+
+    def test_round_trip(self):
+        message = Message.objects.create(conversation=self.conversation, sender=self.user, content='hello there')
+
+        stored = self._stored(message)
+        self.assertTrue(at_rest.is_sealed(stored))
+        self.assertNotIn('hello', stored)
+        self.assertEqual(Message.objects.get(pk=message.pk).content, 'hello there')
+
+    def test_legacy_plaintext_passes_through(self):
+        message = Message.objects.create(conversation=self.conversation, sender=self.user, content='x')
+        # update() skips pre_save, so this writes a pre-encryption row
+        Message.objects.filter(pk=message.pk).update(content='written before encryption')
+
+        self.assertEqual(self._stored(message), 'written before encryption')
+        self.assertEqual(Message.objects.get(pk=message.pk).content, 'written before encryption')
+
+    def test_wrong_key_is_not_decrypted(self):
+        message = Message.objects.create(conversation=self.conversation, sender=self.user, content='secret')
+        stored = self._stored(message)
+        at_rest.data_key_cache.clear()
+
+        with override_settings(MESSAGE_MASTER_KEYS={'1': OTHER_MASTER_KEY}):
+            with self.assertRaises(InvalidTag):
+                at_rest.unseal(stored)
+            # Loading keeps the ciphertext rather than returning garbage
+            self.assertEqual(Message.objects.get(pk=message.pk).content, stored)
+
+    def test_tampered_value_is_not_decrypted(self):
+        message = Message.objects.create(conversation=self.conversation, sender=self.user, content='secret')
+        stored = self._stored(message)
+        payload = bytearray(base64.b64decode(stored.rpartition(':')[2]))
+        payload[-1] ^= 1
+        tampered = stored.rpartition(':')[0] + ':' + base64.b64encode(bytes(payload)).decode('ascii')
+
+        with self.assertRaises(InvalidTag):
+            at_rest.unseal(tampered)
+
+    def test_save_does_not_mutate_instance(self):
+        message = Message(conversation=self.conversation, sender=self.user, content='plain text')
+        message.save()
+
+        self.assertEqual(message.content, 'plain text')
+        message.content = 'edited'
+        message.save()
+        self.assertEqual(message.content, 'edited')
+        self.assertEqual(Message.objects.get(pk=message.pk).content, 'edited')
+        self.assertTrue(at_rest.is_sealed(self._stored(message)))
+
+    @override_settings(MESSAGE_MASTER_KEYS={}, MESSAGE_MASTER_KEY_ID='')
+    def test_disabled_stores_plaintext(self):
+        message = Message.objects.create(conversation=self.conversation, sender=self.user, content='plain')
+
+        self.assertEqual(self._stored(message), 'plain')
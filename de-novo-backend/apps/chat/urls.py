@@ -16,9 +16,13 @@ urlpatterns = [
     # Messages
     path('messages/send/', views.SendMessageView.as_view(), name='send_message'),
     path('messages/<uuid:message_id>/read/', views.MarkAsReadView.as_view(), name='mark_read'),
+    path('messages/<uuid:message_id>/edit/', views.EditMessageView.as_view(), name='edit_message'),
     path('messages/<uuid:message_id>/delete/', views.DeleteMessageView.as_view(), name='delete_message'),
     
     # Voice Messages
     path('voice/upload/', views.VoiceMessageUploadView.as_view(), name='voice_upload'),
     path('voice/<uuid:message_id>/transcribe/', views.TranscribeVoiceView.as_view(), name='transcribe_voice'),
+    
+    # Metrics
+    path('metrics/outbound/', views.OutboundMetricsView.as_view(), name='outbound_metrics'),
 ]
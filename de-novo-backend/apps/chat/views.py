@@ -3,6 +3,7 @@ Views for Chat app.
 """
 
 from rest_framework import generics, status
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.utils import timezone
@@ -12,10 +13,13 @@ from .models import Conversation, Message, MessageReadReceipt, VoiceMessage
 from .serializers import (
     ConversationSerializer,
     CreateConversationSerializer,
+    EditMessageSerializer,
     MessageSerializer,
     SendMessageSerializer,
     VoiceUploadSerializer,
 )
+from .outbound import get_outbound_stats
+from .realtime import broadcast, delete_message, edit_message, watch_late_sentiment
 from apps.users.models import User, BlockedUser
 
 
@@ -188,11 +192,14 @@ class SendMessageView(APIView):
         # Analyze sentiment (async in production)
         try:
             from apps.ai_services.sentiment_analyzer import sentiment_analyzer
-            sentiment_result = sentiment_analyzer.analyze(content)
+            sentiment_result, late = sentiment_analyzer.analyze_deferred(content)
             message.sentiment = sentiment_result.get('sentiment')
             message.sentiment_score = sentiment_result.get('score')
             message.emotion = sentiment_result.get('emotion', '')
-            message.save()
+            message.save(update_fields=['sentiment', 'sentiment_score', 'emotion'])
+            # Only now, so the late result cannot be overwritten by the fallback
+            if late is not None:
+                watch_late_sentiment(message, late)
         except Exception as e:
             print(f"Sentiment analysis failed: {e}")
         
@@ -266,18 +273,50 @@ class MarkConversationAsReadView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
 
+class EditMessageView(APIView):
+    """Edit a text message and broadcast the change."""
+    
+    def patch(self, request, message_id):
+        serializer = EditMessageSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            message = Message.objects.get(
+                id=message_id,
+                sender=request.user,
+                message_type='text',
+                is_deleted=False
+            )
+        except Message.DoesNotExist:
+            return Response({
+                'success': False,
+                'error': {'message': 'Message not found or you cannot edit it'}
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        event, follow_up = edit_message(message, serializer.validated_data['content'])
+        broadcast(message.conversation_id, event)
+        follow_up()
+        
+        return Response({
+            'success': True,
+            'data': event,
+            'message': 'Message edited successfully'
+        })
+
+
 class DeleteMessageView(APIView):
-    """Delete a message (soft delete)."""
+    """Delete a message (soft delete) and broadcast the change."""
     
     def delete(self, request, message_id):
         try:
             message = Message.objects.get(
                 id=message_id,
-                sender=request.user
+                sender=request.user,
+                is_deleted=False
             )
             
-            message.is_deleted = True
-            message.save()
+            event = delete_message(message)
+            broadcast(message.conversation_id, event)
             
             return Response({
                 'success': True,
@@ -396,3 +435,15 @@ class TranscribeVoiceView(APIView):
                 'success': False,
                 'error': {'message': 'Message not found'}
             }, status=status.HTTP_404_NOT_FOUND)
+
+
+class OutboundMetricsView(APIView):
+    """WebSocket outbound queue metrics for this worker process (admin only)."""
+    
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response({
+            'success': True,
+            'data': get_outbound_stats()
+        })
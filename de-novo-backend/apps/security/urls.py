@@ -25,4 +25,8 @@ urlpatterns = [
     # Settings & Summary
     path('settings/', views.SecuritySettingsView.as_view(), name='security_settings'),
     path('summary/', views.SecuritySummaryView.as_view(), name='security_summary'),
+    
+    # Metrics (admin)
+    path('metrics/key-pool/', views.KeyPoolStatsView.as_view(), name='key_pool_stats'),
+    path('metrics/key-cache/', views.KeyCacheStatsView.as_view(), name='key_cache_stats'),
 ]
@@ -5,9 +5,12 @@ Views for Security app.
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
 from django.utils import timezone
 from datetime import timedelta
 
+from services.encryption import get_key_cache_stats, get_key_pool_stats
+
 from .models import PrivacyAlert, SessionLog, SecurityEvent, TrustedDevice
 from .serializers import (
     PrivacyAlertSerializer,
@@ -403,3 +406,27 @@ class SecuritySummaryView(APIView):
             score -= 20
         
         return max(0, min(100, score))
+
+
+class KeyPoolStatsView(APIView):
+    """RSA key pool counters for this worker process (admin only)."""
+    
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response({
+            'success': True,
+            'data': get_key_pool_stats()
+        })
+
+
+class KeyCacheStatsView(APIView):
+    """Parsed public/private key cache counters for this worker process (admin only)."""
+    
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response({
+            'success': True,
+            'data': get_key_cache_stats()
+        })
@@ -0,0 +1,72 @@
+"""
+JWT authentication that does not load the User row on every request.
+
+request.user is a real User instance built from the token's user id and a
+short-lived cached snapshot of the fields authentication and permissions
+need (see cache.AUTH). Every other field is deferred; the first access to
+one hydrates all of them with a single query, so views that only use
+request.user.id or filter by request.user never touch the users table.
+"""
+
+from django.conf import settings
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from . import cache as user_cache
+from .models import User
+
+# Model order: from_db() matches values to fields positionally
+SNAPSHOT_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.primary_key or field.attname in user_cache.CACHED_FIELDS[user_cache.AUTH]
+)
+
+
+def load_snapshot(user_id) -> dict:
+    """Read the snapshot fields for one user (raises User.DoesNotExist)."""
+    return User.objects.values(*SNAPSHOT_FIELDS).get(pk=user_id)
+
+
+def user_from_snapshot(snapshot: dict) -> User:
+    """Build a saved-looking User from a snapshot, deferring all other fields."""
+    user = User.from_db(
+        router.db_for_read(User),
+        list(SNAPSHOT_FIELDS),
+        [snapshot[name] for name in SNAPSHOT_FIELDS],
+    )
+    user._hydrate_deferred_together = True
+    return user
+
+
+class SnapshotJWTAuthentication(JWTAuthentication):
+    """
+    Drop-in replacement for simplejwt's JWTAuthentication that serves
+    request.user from the cached snapshot instead of the database.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares against the password hash, which is not cached
+            return super().get_user(validated_token)
+
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        try:
+            _etag, snapshot = user_cache.get_representation(
+                user_cache.AUTH, user_id,
+                lambda: load_snapshot(user_id),
+                ttl=getattr(settings, 'AUTH_SNAPSHOT_TTL', 60),
+            )
+        except User.DoesNotExist as e:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found') from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not snapshot['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return user_from_snapshot(snapshot)
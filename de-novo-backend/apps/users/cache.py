@@ -0,0 +1,123 @@
+"""
+Cached per-user representations: the profile and accessibility settings
+payloads, and the snapshot REST authentication builds request.user from
+(apps/users/authentication.py).
+
+The profile and settings endpoints are read on every app load. Their
+serialized payload is kept in the Django cache together with an ETag (a
+hash of the payload), so a client revalidating with If-None-Match gets a
+304 without the row being serialized again.
+
+Entries are keyed by a per-user version token that the User post_save
+signal replaces whenever a relevant field is saved (profile updates,
+accessibility updates, presets, avatar uploads, presence changes). A
+reader that built its payload from a row that changed underneath it
+stores it under the old version, where nobody will look it up.
+"""
+
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import status
+from rest_framework.response import Response
+
+PROFILE = 'profile'
+ACCESSIBILITY = 'accessibility'
+AUTH = 'auth'
+
+# Model fields each representation is built from
+CACHED_FIELDS = {
+    PROFILE: frozenset({
+        'username', 'email', 'first_name', 'last_name', 'avatar', 'bio',
+        'phone_number', 'date_of_birth', 'disability_type', 'disability_details',
+        'is_online', 'last_seen', 'onboarding_completed', 'public_key',
+    }),
+    ACCESSIBILITY: frozenset({
+        'font_size', 'high_contrast', 'color_blind_mode', 'dark_mode', 'reduce_motion',
+        'tts_enabled', 'tts_voice', 'tts_rate', 'tts_pitch',
+        'stt_enabled', 'stt_language', 'stt_continuous', 'peeping_tom_enabled',
+    }),
+    AUTH: frozenset({
+        'username', 'email', 'first_name', 'last_name',
+        'is_active', 'is_staff', 'is_superuser',
+    }),
+}
+
+
+def _ttl() -> int:
+    return getattr(settings, 'USER_CACHE_TTL', 300)
+
+
+def _version_key(kind: str, user_id) -> str:
+    return f'user:{user_id}:{kind}:version'
+
+
+def _get_version(kind: str, user_id) -> str:
+    key = _version_key(kind, user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, _ttl())
+        version = cache.get(key)
+    return version
+
+
+def make_etag(data) -> str:
+    payload = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+    return '"%s"' % hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def get_representation(kind: str, user_id, build, ttl: int = None):
+    """
+    Return (etag, data) for a user's cached representation,
+    calling `build()` to serialize it on a miss.
+    """
+    key = f'user:{user_id}:{kind}:{_get_version(kind, user_id)}'
+    entry = cache.get(key)
+    if entry is None:
+        data = build()
+        entry = {'etag': make_etag(data), 'data': data}
+        cache.set(key, entry, ttl or _ttl())
+    return entry['etag'], entry['data']
+
+
+def invalidate(user_id, kinds=None):
+    """Drop cached representations for a user (all kinds by default)."""
+    for kind in kinds or CACHED_FIELDS:
+        cache.set(_version_key(kind, user_id), uuid.uuid4().hex, _ttl())
+
+
+def invalidate_for_fields(user_id, update_fields=None):
+    """Invalidate the representations that depend on any of `update_fields`."""
+    if update_fields is None:
+        invalidate(user_id)
+        return
+    kinds = [kind for kind, fields in CACHED_FIELDS.items() if fields.intersection(update_fields)]
+    if kinds:
+        invalidate(user_id, kinds)
+
+
+def etag_matches(request, etag: str) -> bool:
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # Weak comparison, as for GET (RFC 9110 13.1.2)
+    candidates = [tag.strip() for tag in header.split(',')]
+    return any(tag.removeprefix('W/') == etag for tag in candidates)
+
+
+def cached_response(request, kind: str, build) -> Response:
+    """Serve a cached representation, or 304 if the client's copy is current."""
+    etag, data = get_representation(kind, request.user.id, build)
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response({
+        'success': True,
+        'data': data
+    }, headers=headers)
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:19
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of apps.users.search.tokens_for as of this migration, so later
+# tokenizer changes do not change what it writes (sync_search_tokens keeps
+# rows current from the next save on).
+_SPLIT_RE = re.compile(r'[^\w]+|_')
+
+
+def _normalize(text):
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.casefold()
+
+
+def _split_terms(text):
+    return [part for part in _SPLIT_RE.split(_normalize(text)) if part]
+
+
+def tokens_for(username, first_name, last_name):
+    tokens = set()
+    full_username = _normalize(username)
+    if full_username:
+        tokens.add((full_username[:150], 'username'))
+    for part in _split_terms(username):
+        tokens.add((part[:150], 'username'))
+    for part in _split_terms(f'{first_name} {last_name}'):
+        tokens.add((part[:150], 'name'))
+    return tokens
+
+
+def backfill_search_tokens(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    UserSearchToken = apps.get_model('users', 'UserSearchToken')
+
+    batch = []
+    users = User.objects.values_list('id', 'username', 'first_name', 'last_name')
+    for user_id, username, first_name, last_name in users.iterator(chunk_size=2000):
+        for token, kind in tokens_for(username, first_name, last_name):
+            batch.append(UserSearchToken(user_id=user_id, token=token, kind=kind))
+        if len(batch) >= 5000:
+            UserSearchToken.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        UserSearchToken.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=150)),
+                ('kind', models.CharField(choices=[('username', 'Username'), ('name', 'Name')], max_length=10)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Search Token',
+                'verbose_name_plural': 'User Search Tokens',
+                'db_table': 'user_search_tokens',
+            },
+        ),
+        migrations.RunPython(backfill_search_tokens, migrations.RunPython.noop),
+    ]
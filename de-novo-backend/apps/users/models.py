@@ -86,6 +86,15 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
     
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        # Snapshot users from SnapshotJWTAuthentication load every deferred
+        # field on the first miss instead of one query per attribute.
+        if fields and getattr(self, '_hydrate_deferred_together', False):
+            deferred = self.get_deferred_fields()
+            if deferred.issuperset(fields):
+                fields = list(deferred)
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+    
     def get_accessibility_settings(self):
         """Return all accessibility settings as a dictionary."""
         return {
@@ -158,3 +167,31 @@ class BlockedUser(models.Model):
     
     def __str__(self):
         return f"{self.blocker.username} blocked {self.blocked.username}"
+
+
+class UserSearchToken(models.Model):
+    """
+    Normalized username/name tokens backing indexed user search.
+    Maintained by a post_save signal; email is never indexed (SEC-07).
+    """
+    
+    KIND_CHOICES = [
+        ('username', 'Username'),
+        ('name', 'Name'),
+    ]
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='search_tokens'
+    )
+    token = models.CharField(max_length=150, db_index=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    
+    class Meta:
+        db_table = 'user_search_tokens'
+        verbose_name = 'User Search Token'
+        verbose_name_plural = 'User Search Tokens'
+    
+    def __str__(self):
+        return f"{self.token} ({self.kind}) -> {self.user_id}"
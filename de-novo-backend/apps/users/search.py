@@ -0,0 +1,150 @@
+"""
+Indexed user search.
+
+Usernames and names are split into normalized tokens (accent-stripped,
+casefolded) stored in UserSearchToken. A query is answered with index
+prefix scans on that table instead of three `icontains` table scans, then
+ranked: exact matches beat prefixes, usernames beat names, and the
+searcher's contacts are always listed first.
+
+SEC-07: email is never tokenized, so search cannot enumerate addresses.
+"""
+
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+
+MIN_QUERY_LENGTH = 2
+MAX_QUERY_TERMS = 3
+CANDIDATE_LIMIT = 200  # Non-contact token rows considered per term
+CONTACT_BOOST = 1000
+
+SEARCH_FIELDS = frozenset({'username', 'first_name', 'last_name'})
+
+_SPLIT_RE = re.compile(r'[^\w]+|_')
+
+
+def normalize(text: str) -> str:
+    """Casefold and strip accents so 'José' and 'jose' index alike."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.casefold()
+
+
+def split_terms(text: str) -> list:
+    return [part for part in _SPLIT_RE.split(normalize(text)) if part]
+
+
+def tokens_for(username: str, first_name: str, last_name: str) -> set:
+    """Return the (token, kind) pairs that describe a user."""
+    tokens = set()
+    full_username = normalize(username)
+    if full_username:
+        tokens.add((full_username[:150], 'username'))
+    for part in split_terms(username):
+        tokens.add((part[:150], 'username'))
+    for part in split_terms(f'{first_name} {last_name}'):
+        tokens.add((part[:150], 'name'))
+    return tokens
+
+
+def sync_search_tokens(user):
+    """Bring a user's search tokens in line with their current fields."""
+    from .models import UserSearchToken
+
+    wanted = tokens_for(user.username, user.first_name, user.last_name)
+    existing = {
+        (token, kind): pk
+        for pk, token, kind in UserSearchToken.objects.filter(
+            user_id=user.pk
+        ).values_list('pk', 'token', 'kind')
+    }
+
+    stale = [pk for key, pk in existing.items() if key not in wanted]
+    if stale:
+        UserSearchToken.objects.filter(pk__in=stale).delete()
+
+    missing = wanted.difference(existing)
+    if missing:
+        UserSearchToken.objects.bulk_create([
+            UserSearchToken(user_id=user.pk, token=token, kind=kind)
+            for token, kind in missing
+        ])
+
+
+def _prefix_q(term: str) -> Q:
+    if connection.vendor == 'sqlite':
+        # SQLite's LIKE is case-insensitive and cannot use a plain index;
+        # a range over the (already casefolded) tokens can.
+        return Q(token__gte=term, token__lt=term + '\U0010ffff')
+    # PostgreSQL (varchar_pattern_ops index) and MySQL serve LIKE 'x%' from the index
+    return Q(token__startswith=term)
+
+
+def _token_score(term: str, token: str, kind: str) -> int:
+    if token == term:
+        score = 100
+    else:
+        # Closer prefixes rank higher: 'jo' -> 'joe' beats 'jo' -> 'jonathan'
+        score = 50 + int(20 * len(term) / len(token))
+    if kind == 'username':
+        score += 10
+    return score
+
+
+def search_users(query: str, requester, limit: int = 20) -> list:
+    """
+    Return up to `limit` users matching every term of `query`, best first.
+    The requester is never included.
+    """
+    from .models import User, UserContact, UserSearchToken
+
+    terms = split_terms(query)[:MAX_QUERY_TERMS]
+    if not terms or len(''.join(terms)) < MIN_QUERY_LENGTH:
+        return []
+
+    contact_ids = set(UserContact.objects.filter(
+        user=requester,
+        is_blocked=False
+    ).values_list('contact_id', flat=True))
+
+    candidates = None
+    scores = {}
+    best_token = {}  # Tie-breaker that needs no extra query
+    # Most selective (longest) term first keeps later scans small
+    for term in sorted(terms, key=len, reverse=True):
+        rows_qs = UserSearchToken.objects.filter(_prefix_q(term)).exclude(
+            user_id=requester.id
+        ).values_list('user_id', 'token', 'kind')
+
+        if candidates is None:
+            rows = list(rows_qs.order_by('token')[:CANDIDATE_LIMIT])
+            if contact_ids:
+                rows += list(rows_qs.filter(user_id__in=contact_ids))
+        else:
+            rows = list(rows_qs.filter(user_id__in=candidates))
+
+        term_scores = {}
+        for user_id, token, kind in rows:
+            score = _token_score(term, token, kind)
+            if score > term_scores.get(user_id, 0):
+                term_scores[user_id] = score
+                best_token.setdefault(user_id, token)
+
+        candidates = set(term_scores) if candidates is None else candidates & set(term_scores)
+        for user_id in candidates:
+            scores[user_id] = scores.get(user_id, 0) + term_scores[user_id]
+        if not candidates:
+            return []
+
+    for user_id in candidates:
+        if user_id in contact_ids:
+            scores[user_id] += CONTACT_BOOST
+
+    ranked = sorted(candidates, key=lambda uid: (-scores[uid], best_token[uid], uid))[:limit]
+    users = User.objects.only(
+        'id', 'username', 'first_name', 'last_name', 'avatar', 'is_online'
+    ).in_bulk(ranked)
+    return [users[uid] for uid in ranked if uid in users]
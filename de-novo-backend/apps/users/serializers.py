@@ -6,6 +6,7 @@ import logging
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from services.encryption import public_key_type
 from .models import User, UserContact, BlockedUser
 
 logger = logging.getLogger(__name__)
@@ -254,6 +255,13 @@ class UserSearchSerializer(serializers.ModelSerializer):
 
 
 class PublicKeySerializer(serializers.Serializer):
-    """Serializer for updating public key."""
+    """Serializer for updating public key (PEM, RSA-2048+ or X25519)."""
     
     public_key = serializers.CharField(required=True)
+    
+    def validate_public_key(self, value):
+        if public_key_type(value) is None:
+            raise serializers.ValidationError(
+                "Public key must be a PEM encoded RSA (2048+ bit) or X25519 key."
+            )
+        return value
@@ -2,9 +2,11 @@
 Signals for User app.
 """
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from . import cache as user_cache
 from .models import User
+from .search import SEARCH_FIELDS, sync_search_tokens
 
 
 @receiver(post_save, sender=User)
@@ -16,3 +18,23 @@ def user_created(sender, instance, created, **kwargs):
     if created:
         # Log user creation
         print(f"New user created: {instance.username}")
+
+
+@receiver(post_save, sender=User)
+def refresh_search_tokens(sender, instance, update_fields=None, **kwargs):
+    """Keep the user search index in sync with username/name changes."""
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return  # e.g. is_online/last_seen heartbeats
+    sync_search_tokens(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_representations(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached profile/settings payloads that this save made stale."""
+    user_cache.invalidate_for_fields(instance.pk, update_fields)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender, instance, **kwargs):
+    """Stop serving cached snapshots of a deleted account."""
+    user_cache.invalidate(instance.pk)
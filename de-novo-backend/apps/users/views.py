@@ -8,8 +8,11 @@ Fixes applied:
   - API-05: Block/unblock at /contacts/<id>/block/ and /unblock/
   - SEC-06: Rate throttling on login/register
   - SEC-07: UserSearch excludes email, no disability_type in results
+  - UserSearch uses the indexed token search (apps/users/search.py)
   - SEC-08: print() replaced with logging
   - BE-08: UserProfileView uses PublicUserProfileSerializer for others
+  - Profile and accessibility settings are served from a per-user cache
+    with ETags (apps/users/cache.py)
 """
 
 import logging
@@ -19,9 +22,10 @@ from rest_framework.views import APIView
 from rest_framework.throttling import AnonRateThrottle, ScopedRateThrottle
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import logout
-from django.db.models import Q
 
+from . import cache as user_cache
 from .models import User, UserContact, BlockedUser
+from .search import MIN_QUERY_LENGTH, search_users
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
@@ -147,12 +151,10 @@ class ProfileView(generics.RetrieveAPIView):
         return self.request.user
     
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response({
-            'success': True,
-            'data': serializer.data
-        })
+        return user_cache.cached_response(
+            request, user_cache.PROFILE,
+            lambda: dict(self.get_serializer(self.get_object()).data)
+        )
 
 
 class UserProfileView(generics.RetrieveAPIView):
@@ -239,12 +241,10 @@ class AccessibilitySettingsView(generics.RetrieveUpdateAPIView):
         return self.request.user
     
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response({
-            'success': True,
-            'data': serializer.data
-        })
+        return user_cache.cached_response(
+            request, user_cache.ACCESSIBILITY,
+            lambda: dict(self.get_serializer(self.get_object()).data)
+        )
     
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', True)
@@ -427,23 +427,20 @@ class UserSearchView(generics.ListAPIView):
     
     SEC-07: Search by username/name only (no email substring enumeration).
     disability_type is NOT returned in results.
+    Prefix matches on indexed name tokens, ranked with contacts first.
     """
     
     serializer_class = UserSearchSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        query = self.request.query_params.get('q', '')
+        query = self.request.query_params.get('q', '').strip()
         # Require at least 2 chars to prevent broad enumeration
-        if len(query) < 2:
-            return User.objects.none()
+        if len(query) < MIN_QUERY_LENGTH:
+            return []
         
         # SEC-07: Only search by username/name (NOT email) to prevent enumeration
-        return User.objects.filter(
-            Q(username__icontains=query) |
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query)
-        ).exclude(id=self.request.user.id)[:20]
+        return search_users(query, self.request.user, limit=20)
     
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
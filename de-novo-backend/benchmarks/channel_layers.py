@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+"""
+Benchmark channel layer backends: in-memory, local hub and Redis.
+
+Scenarios:
+  point_to_point  one sender, one receiver on a single channel
+  group_fanout    group_send to N member channels in this process
+  cross_process   group_send to members owned by worker subprocesses
+                  (hub and redis only; the in-memory layer cannot do this)
+
+Usage:
+    python benchmarks/channel_layers.py
+    python benchmarks/channel_layers.py --layers hub,redis --redis-url redis://localhost:6379/0
+    python benchmarks/channel_layers.py --json > results.json
+
+A hub is started in a subprocess automatically unless --hub-path points at a
+running one. Redis is skipped when channels_redis is not installed.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings  # noqa: E402
+
+if not settings.configured:
+    settings.configure()
+
+from channels.layers import InMemoryChannelLayer  # noqa: E402
+
+from de_novo.hub_channel_layer import HubChannelLayer, run_hub  # noqa: E402
+
+LAYER_CONFIG = {'capacity': 100000, 'expiry': 60}
+
+
+def make_layer(name, args):
+    if name == 'memory':
+        return InMemoryChannelLayer(**LAYER_CONFIG)
+    if name == 'hub':
+        return HubChannelLayer(path=args.hub_path, **LAYER_CONFIG)
+    if name == 'redis':
+        from channels_redis.core import RedisChannelLayer
+        return RedisChannelLayer(hosts=[args.redis_url], **LAYER_CONFIG)
+    raise ValueError(f'Unknown layer {name}')
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples_ms, deliveries, elapsed):
+    return {
+        'deliveries': deliveries,
+        'elapsed_s': round(elapsed, 4),
+        'deliveries_per_s': round(deliveries / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': round(statistics.fmean(samples_ms), 3) if samples_ms else 0.0,
+            'p50': round(percentile(samples_ms, 50), 3),
+            'p99': round(percentile(samples_ms, 99), 3),
+        },
+    }
+
+
+# ── Scenarios ────────────────────────────────────────────────────────────────
+
+async def point_to_point(layer, messages):
+    channel = await layer.new_channel()
+    latencies = []
+
+    async def consume():
+        for _ in range(messages):
+            message = await layer.receive(channel)
+            latencies.append((time.perf_counter() - message['sent']) * 1000)
+
+    start = time.perf_counter()
+    consumer = asyncio.ensure_future(consume())
+    for i in range(messages):
+        await layer.send(channel, {'type': 'bench', 'seq': i, 'sent': time.perf_counter()})
+    await consumer
+    return summarize(latencies, messages, time.perf_counter() - start)
+
+
+async def group_fanout(layer, messages, members):
+    group = f'bench_{os.getpid()}_{int(time.time() * 1000)}'
+    channels = [await layer.new_channel() for _ in range(members)]
+    for channel in channels:
+        await layer.group_add(group, channel)
+    latencies = []
+
+    async def consume(channel):
+        for _ in range(messages):
+            message = await layer.receive(channel)
+            latencies.append((time.perf_counter() - message['sent']) * 1000)
+
+    start = time.perf_counter()
+    consumers = [asyncio.ensure_future(consume(c)) for c in channels]
+    for i in range(messages):
+        await layer.group_send(group, {'type': 'bench', 'seq': i, 'sent': time.perf_counter()})
+    await asyncio.gather(*consumers)
+    elapsed = time.perf_counter() - start
+
+    for channel in channels:
+        await layer.group_discard(group, channel)
+    return summarize(latencies, messages * members, elapsed)
+
+
+def _worker(layer_name, args, group, members, messages, ready, results):
+    """Subprocess: join `members` channels to the group and time deliveries."""
+
+    async def run():
+        layer = make_layer(layer_name, args)
+        channels = [await layer.new_channel() for _ in range(members)]
+        for channel in channels:
+            await layer.group_add(group, channel)
+        ready.put(True)
+        latencies = []
+
+        async def consume(channel):
+            for _ in range(messages):
+                message = await layer.receive(channel)
+                # perf_counter is not comparable across processes; use wall time
+                latencies.append((time.time() - message['sent_wall']) * 1000)
+
+        await asyncio.gather(*(consume(c) for c in channels))
+        results.put(latencies)
+
+    asyncio.run(run())
+
+
+async def cross_process(layer_name, args, messages, members, processes):
+    group = f'bench_xp_{os.getpid()}_{int(time.time() * 1000)}'
+    ctx = multiprocessing.get_context('spawn')
+    ready, results = ctx.Queue(), ctx.Queue()
+    per_worker = max(1, members // processes)
+    workers = [
+        ctx.Process(target=_worker, args=(layer_name, args, group, per_worker, messages, ready, results))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for _ in workers:
+        ready.get(timeout=30)
+
+    layer = make_layer(layer_name, args)
+    start = time.perf_counter()
+    for i in range(messages):
+        await layer.group_send(group, {'type': 'bench', 'seq': i, 'sent_wall': time.time()})
+
+    latencies = []
+    for _ in workers:
+        latencies.extend(await asyncio.get_running_loop().run_in_executor(None, results.get))
+    elapsed = time.perf_counter() - start
+    for worker in workers:
+        worker.join()
+    return summarize(latencies, len(latencies), elapsed)
+
+
+# ── Driver ───────────────────────────────────────────────────────────────────
+
+async def bench_layer(name, args):
+    layer = make_layer(name, args)
+    results = {
+        'point_to_point': await point_to_point(layer, args.messages),
+        'group_fanout': await group_fanout(layer, args.messages // 10 or 1, args.members),
+    }
+    if name != 'memory' and args.processes > 0:
+        results['cross_process'] = await cross_process(
+            name, args, args.messages // 10 or 1, args.members, args.processes
+        )
+    if hasattr(layer, 'close'):
+        await layer.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--layers', default='memory,hub,redis')
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--members', type=int, default=20, help='group size')
+    parser.add_argument('--processes', type=int, default=2, help='workers for cross_process')
+    parser.add_argument('--hub-path', default=None, help='use a running hub instead of spawning one')
+    parser.add_argument('--redis-url', default=os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    hub_process = None
+    layers = [name.strip() for name in args.layers.split(',') if name.strip()]
+    if 'hub' in layers and not args.hub_path:
+        args.hub_path = os.path.join(tempfile.mkdtemp(), 'hub.sock')
+        hub_process = multiprocessing.get_context('spawn').Process(
+            target=run_hub, kwargs={'path': args.hub_path, **LAYER_CONFIG}, daemon=True
+        )
+        hub_process.start()
+        deadline = time.time() + 10
+        while not os.path.exists(args.hub_path) and time.time() < deadline:
+            time.sleep(0.05)
+
+    report = {}
+    try:
+        for name in layers:
+            if name == 'redis':
+                try:
+                    import channels_redis  # noqa: F401
+                except ImportError:
+                    report[name] = {'skipped': 'channels_redis not installed'}
+                    continue
+            try:
+                report[name] = asyncio.run(bench_layer(name, args))
+            except (OSError, ConnectionError) as e:
+                report[name] = {'skipped': f'{type(e).__name__}: {e}'}
+    finally:
+        if hub_process is not None:
+            hub_process.terminate()
+            hub_process.join()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'layer':<8} {'scenario':<16} {'deliv/s':>12} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, scenarios in report.items():
+        if 'skipped' in scenarios:
+            print(f"{name:<8} skipped: {scenarios['skipped']}")
+            continue
+        for scenario, result in scenarios.items():
+            print(f"{name:<8} {scenario:<16} {result['deliveries_per_s']:>12,.0f} "
+                  f"{result['latency_ms']['p50']:>9.3f} {result['latency_ms']['p99']:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Throughput of encrypt_many/decrypt_many across thread counts.
+
+Compares a serial loop over encrypt_message/decrypt_message with the
+batch APIs at each pool size. Scaling depends on the cores available:
+cryptography releases the GIL inside RSA and AES-GCM, so on an N-core host
+expect up to ~N x for the RSA-bound decrypt path.
+
+Usage:
+    python benchmarks/encryption_batch.py
+    python benchmarks/encryption_batch.py --messages 5000 --threads 1,2,4,8,16 --json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.encryption import EncryptionService  # noqa: E402
+
+
+def rate(count, fn):
+    start = time.perf_counter()
+    results = fn()
+    elapsed = time.perf_counter() - start
+    failures = sum(1 for r in results if isinstance(r, dict) and r.get('success') is False)
+    return {'ops_per_s': round(count / elapsed, 1), 'elapsed_s': round(elapsed, 4), 'errors': failures}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--size', type=int, default=140, help='message length in characters')
+    parser.add_argument('--threads', default='1,2,4,8')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    service = EncryptionService()
+    keys = service._generate_rsa_key_pair()
+    messages = ['x' * args.size] * args.messages
+    payloads = [service.encrypt_message(m, keys['public_key']) for m in messages]
+
+    report = {
+        'cpu_count': os.cpu_count(),
+        'messages': args.messages,
+        'message_size': args.size,
+        'serial': {
+            'encrypt': rate(args.messages, lambda: [
+                service.encrypt_message(m, keys['public_key']) for m in messages
+            ]),
+            'decrypt': rate(args.messages, lambda: [
+                service.decrypt_message(p['encrypted_content'], p['encrypted_key'], p['nonce'], keys['private_key'])
+                for p in payloads
+            ]),
+        },
+        'batch': {},
+    }
+    for threads in [int(t) for t in args.threads.split(',') if t.strip()]:
+        report['batch'][threads] = {
+            'encrypt': rate(args.messages, lambda: service.encrypt_many(messages, keys['public_key'], threads)),
+            'decrypt': rate(args.messages, lambda: service.decrypt_many(payloads, keys['private_key'], threads)),
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.messages:,} messages of {args.size} chars on {report['cpu_count']} CPU(s)")
+    print(f"  {'mode':<12} {'encrypt ops/s':>14} {'decrypt ops/s':>14}")
+    print(f"  {'serial':<12} {report['serial']['encrypt']['ops_per_s']:>14,.0f} "
+          f"{report['serial']['decrypt']['ops_per_s']:>14,.0f}")
+    for threads, result in report['batch'].items():
+        print(f"  {f'{threads} threads':<12} {result['encrypt']['ops_per_s']:>14,.0f} "
+              f"{result['decrypt']['ops_per_s']:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
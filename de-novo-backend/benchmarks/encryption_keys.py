@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: per-message encrypt/decrypt with and without the parsed-key cache.
+
+Every chat message names its key as a PEM string. Without the cache each
+call re-parses the PEM (and, for private keys, rebuilds the RSA key object);
+with it, repeat keys are looked up by fingerprint.
+
+Usage:
+    python benchmarks/encryption_keys.py
+    python benchmarks/encryption_keys.py --messages 5000 --size 140 --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.encryption import EncryptionService  # noqa: E402
+
+
+def time_calls(fn, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    total = sum(samples)
+    return {
+        'ops_per_s': round(count / total, 1),
+        'mean_us': round(statistics.fmean(samples) * 1e6, 1),
+        'p50_us': round(samples[len(samples) // 2] * 1e6, 1),
+        'p99_us': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6, 1),
+    }
+
+
+def run(cache_size, keys, message, count):
+    service = EncryptionService()
+    service.public_keys.max_size = cache_size
+    service.private_keys.max_size = cache_size
+    sample = service.encrypt_message(message, keys['public_key'])
+
+    return {
+        'encrypt': time_calls(lambda: service.encrypt_message(message, keys['public_key']), count),
+        'decrypt': time_calls(lambda: service.decrypt_message(
+            sample['encrypted_content'], sample['encrypted_key'], sample['nonce'], keys['private_key']
+        ), count),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--size', type=int, default=140, help='message length in characters')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    keys = EncryptionService()._generate_rsa_key_pair()
+    message = 'x' * args.size
+
+    report = {
+        'message_size': args.size,
+        'messages': args.messages,
+        'uncached': run(0, keys, message, args.messages),
+        'cached': run(256, keys, message, args.messages),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.messages:,} messages of {args.size} chars, RSA-2048 + AES-256-GCM")
+    for op in ('encrypt', 'decrypt'):
+        before, after = report['uncached'][op], report['cached'][op]
+        print(f"  {op:<8} uncached {before['ops_per_s']:>9,.0f} ops/s (p99 {before['p99_us']:>8.1f} us)   "
+              f"cached {after['ops_per_s']:>9,.0f} ops/s (p99 {after['p99_us']:>8.1f} us)   "
+              f"x{after['ops_per_s'] / before['ops_per_s']:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+"""
+Benchmark suite for services/encryption.py.
+
+Times each operation per key type, payload size and thread count and reports
+ops/s with latency percentiles. Each case runs for a fixed wall-clock time
+after a warm-up. Payloads are seeded, so runs on the same host are comparable.
+
+Operations:
+  keygen                  generate a key pair inline (no pool)
+  encrypt_message         hybrid encrypt for one recipient
+  decrypt_message
+  encrypt_for_recipients  one message for --recipients members (group chat)
+  encrypt_for_storage     AES-256-GCM with a caller-held key
+  decrypt_from_storage
+
+Sizes are message lengths in characters. `mixed` samples a chat-like
+log-normal distribution (median ~80 chars, capped at 64 KiB).
+
+Usage:
+    python benchmarks/encryption_suite.py
+    python benchmarks/encryption_suite.py --ops encrypt_message,decrypt_message --threads 1,4
+    python benchmarks/encryption_suite.py --output results.json
+    python benchmarks/encryption_suite.py --compare results.json   # vs. an earlier run
+"""
+
+import argparse
+import base64
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import string
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cryptography  # noqa: E402
+from cryptography.hazmat.backends.openssl.backend import backend as openssl_backend  # noqa: E402
+
+from services.encryption import KEY_TYPE_RSA, KEY_TYPE_X25519, EncryptionService  # noqa: E402
+
+OPS = [
+    'keygen',
+    'encrypt_message',
+    'decrypt_message',
+    'encrypt_for_recipients',
+    'encrypt_for_storage',
+    'decrypt_from_storage',
+]
+KEYED_OPS = {'keygen', 'encrypt_message', 'decrypt_message', 'encrypt_for_recipients'}
+SIZED_OPS = set(OPS) - {'keygen'}
+KEY_TYPES = {'rsa': KEY_TYPE_RSA, 'x25519': KEY_TYPE_X25519}
+MIXED_SAMPLES = 512
+
+
+def make_messages(size, seed):
+    """Payloads for a size label: a single fixed-size message, or a seeded mixed sample."""
+    rng = random.Random(f'{seed}:{size}')
+    alphabet = string.ascii_letters + string.digits + ' '
+    if size == 'mixed':
+        lengths = [min(64 * 1024, max(1, int(rng.lognormvariate(math.log(80), 1.2))))
+                   for _ in range(MIXED_SAMPLES)]
+    else:
+        lengths = [int(size)]
+    return [''.join(rng.choices(alphabet, k=length)) for length in lengths]
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of sorted samples."""
+    return samples[min(len(samples) - 1, max(0, math.ceil(fraction * len(samples)) - 1))]
+
+
+def measure(call, threads, duration, warmup):
+    """
+    Run `call(i)` from `threads` threads for `duration` seconds after a warm-up.
+    Returns ops/s over the timed window and per-call latency percentiles.
+    """
+    barrier = threading.Barrier(threads + 1)
+    results = [None] * threads
+    errors = []
+
+    def worker(slot):
+        try:
+            index = slot
+            deadline = time.perf_counter() + warmup
+            while time.perf_counter() < deadline:
+                call(index)
+                index += threads
+            barrier.wait()
+            samples = []
+            deadline = time.perf_counter() + duration
+            while True:
+                start = time.perf_counter()
+                call(index)
+                end = time.perf_counter()
+                samples.append(end - start)
+                index += threads
+                if end >= deadline:
+                    break
+            results[slot] = samples
+        except Exception as e:  # Report instead of hanging the barrier
+            errors.append(e)
+            barrier.abort()
+
+    workers = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+    for thread in workers:
+        thread.start()
+    try:
+        barrier.wait()
+    except threading.BrokenBarrierError:
+        pass
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise errors[0]
+
+    samples = sorted(s for thread_samples in results for s in thread_samples)
+    return {
+        'ops': len(samples),
+        'ops_per_s': round(len(samples) / elapsed, 1),
+        'p50_us': round(percentile(samples, 0.50) * 1e6, 1),
+        'p90_us': round(percentile(samples, 0.90) * 1e6, 1),
+        'p99_us': round(percentile(samples, 0.99) * 1e6, 1),
+        'max_us': round(samples[-1] * 1e6, 1),
+    }
+
+
+def build_call(service, op, key_type, messages, recipients):
+    """Return a callable(i) performing one `op` on payload i (setup done here, untimed)."""
+    count = len(messages)
+    generators = {  # Inline generation; the background pool would hide the cost
+        KEY_TYPE_RSA: service._generate_rsa_key_pair,
+        KEY_TYPE_X25519: service._generate_x25519_key_pair,
+    }
+
+    if op == 'keygen':
+        generate = generators[key_type]
+        return lambda i: generate()
+
+    if op in ('encrypt_for_storage', 'decrypt_from_storage'):
+        storage_key = os.urandom(32)
+        if op == 'encrypt_for_storage':
+            return lambda i: service.encrypt_for_storage(messages[i % count], storage_key)
+        encoded_key = base64.b64encode(storage_key).decode('ascii')
+        sealed = [service.encrypt_for_storage(m, storage_key) for m in messages]
+        return lambda i: service.decrypt_from_storage(
+            sealed[i % count]['encrypted_data'], sealed[i % count]['nonce'], encoded_key
+        )
+
+    keys = generators[key_type]()
+
+    if op == 'encrypt_message':
+        return lambda i: service.encrypt_message(messages[i % count], keys['public_key'])
+
+    if op == 'decrypt_message':
+        payloads = [service.encrypt_message(m, keys['public_key']) for m in messages]
+        return lambda i: service.decrypt_message(
+            payloads[i % count]['encrypted_content'],
+            payloads[i % count]['encrypted_key'],
+            payloads[i % count]['nonce'],
+            keys['private_key'],
+            version=payloads[i % count].get('version'),
+        )
+
+    if op == 'encrypt_for_recipients':
+        members = {index: keys['public_key'] for index in range(recipients)}
+        return lambda i: service.encrypt_for_recipients(messages[i % count], members)
+
+    raise ValueError(f'Unknown operation: {op}')
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(args):
+    service = EncryptionService()
+    cases = []
+    for op in args.ops:
+        key_types = args.key_types if op in KEYED_OPS else [None]
+        sizes = args.sizes if op in SIZED_OPS else [None]
+        for key_label in key_types:
+            for size in sizes:
+                messages = make_messages(size, args.seed) if size is not None else ['']
+                call = build_call(service, op, KEY_TYPES.get(key_label), messages, args.recipients)
+                for threads in args.threads:
+                    result = measure(call, threads, args.duration, args.warmup)
+                    case = {'op': op, 'key_type': key_label, 'size': size, 'threads': threads, **result}
+                    cases.append(case)
+                    if not args.json:
+                        print_case(case)
+    return {
+        'suite': 'encryption',
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'cryptography': cryptography.__version__,
+            'openssl': openssl_backend.openssl_version_text(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {
+            'duration_s': args.duration,
+            'warmup_s': args.warmup,
+            'seed': args.seed,
+            'recipients': args.recipients,
+        },
+        'cases': cases,
+    }
+
+
+def case_key(case):
+    return (case['op'], case['key_type'], str(case['size']), case['threads'])
+
+
+def case_label(case):
+    parts = [case['op']]
+    if case['key_type']:
+        parts.append(case['key_type'])
+    if case['size'] is not None:
+        parts.append(f"{case['size']}ch" if str(case['size']).isdigit() else str(case['size']))
+    parts.append(f"{case['threads']}t")
+    return ' '.join(parts)
+
+
+def print_case(case):
+    print(f"  {case_label(case):<44} {case['ops_per_s']:>11,.0f} ops/s   "
+          f"p50 {case['p50_us']:>9,.1f}  p99 {case['p99_us']:>10,.1f} us")
+
+
+def print_comparison(report, baseline, out=sys.stdout):
+    """Print ops/s and p99 change per case against an earlier report."""
+    previous = {case_key(case): case for case in baseline.get('cases', [])}
+    print(f"Compared with {baseline.get('environment', {}).get('commit') or 'baseline'} "
+          f"({baseline.get('created_at', 'unknown date')}):", file=out)
+    for case in report['cases']:
+        before = previous.get(case_key(case))
+        if before is None:
+            continue
+        throughput = (case['ops_per_s'] / before['ops_per_s'] - 1) * 100 if before['ops_per_s'] else 0.0
+        p99 = (case['p99_us'] / before['p99_us'] - 1) * 100 if before['p99_us'] else 0.0
+        print(f"  {case_label(case):<44} ops/s {throughput:>+7.1f}%   p99 {p99:>+7.1f}%", file=out)
+
+
+def parse_list(value, allowed=None):
+    items = [item.strip() for item in value.split(',') if item.strip()]
+    if allowed is not None:
+        unknown = [item for item in items if item not in allowed]
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown value(s): {', '.join(unknown)}")
+    return items
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ops', type=lambda v: parse_list(v, OPS), default=OPS)
+    parser.add_argument('--key-types', type=lambda v: parse_list(v, KEY_TYPES), default=list(KEY_TYPES))
+    parser.add_argument('--sizes', type=parse_list, default=['32', '140', '1024', '16384', 'mixed'],
+                        help='message lengths in characters, or "mixed"')
+    parser.add_argument('--threads', type=lambda v: [int(t) for t in parse_list(v)], default=[1, 2, 4])
+    parser.add_argument('--recipients', type=int, default=8, help='group size for encrypt_for_recipients')
+    parser.add_argument('--duration', type=float, default=0.5, help='timed seconds per case')
+    parser.add_argument('--warmup', type=float, default=0.1, help='untimed seconds per case')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='print the JSON report instead of a table')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--compare', help='JSON report from an earlier run to compare against')
+    args = parser.parse_args(argv)
+
+    if not args.json:
+        print(f"Encryption suite on {os.cpu_count()} CPU(s), {args.duration}s per case")
+    report = run_suite(args)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print_comparison(report, baseline, out=sys.stderr if args.json else sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+"""
+Benchmark sentiment micro-batching against direct Cloud NLP calls.
+
+A stand-in for the Natural Language API runs in a subprocess and answers
+after --latency-ms. Concurrent callers (threads for sync, tasks for async)
+analyze a chat-like stream of texts where --repeat-share of messages are
+common quick phrases. Each scenario reports calls/s, caller latency
+percentiles and how many requests reached the API.
+
+Scenarios:
+  direct   every call is its own API request (gcp_client / async_gcp_client)
+  batched  calls go through SentimentBatcher
+
+The result cache is off unless --cache is given, so only batching is measured.
+
+Usage:
+    python benchmarks/sentiment_batching.py
+    python benchmarks/sentiment_batching.py --callers 64 --max-wait-ms 2,5,10 --latency-ms 80
+    python benchmarks/sentiment_batching.py --json > results.json
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import string
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUICK_PHRASES = [
+    'ok', 'thanks', 'thank you', 'yes', 'no', 'lol', 'see you', 'good night',
+    'on my way', 'sounds good', 'love you', 'sorry', 'haha', 'great', 'call me',
+]
+
+
+def serve_nlp(latency, port_queue, requests):
+    """Minimal analyzeSentiment endpoint with a fixed response time."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            with requests.get_lock():
+                requests.value += 1
+            time.sleep(latency)
+            body = json.dumps({'documentSentiment': {'score': 0.4, 'magnitude': 0.6}}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 1024  # The default backlog of 5 drops connects under load
+
+    server = Server(('127.0.0.1', 0), Handler)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def make_texts(count, repeat_share, seed):
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + ' '
+    return [
+        rng.choice(QUICK_PHRASES) if rng.random() < repeat_share
+        else ''.join(rng.choices(alphabet, k=rng.randint(20, 120)))
+        for _ in range(count)
+    ]
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed, api_requests):
+    return {
+        'calls': len(latencies),
+        'calls_per_s': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'api_requests': api_requests,
+    }
+
+
+def run_threads(analyze, texts, callers):
+    latencies = []
+    lock = threading.Lock()
+
+    def caller(slot):
+        mine = []
+        for text in texts[slot::callers]:
+            started = time.perf_counter()
+            result = analyze(text)
+            mine.append(time.perf_counter() - started)
+            if not result.get('success'):
+                raise RuntimeError(result.get('error'))
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=caller, args=(slot,)) for slot in range(callers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+
+async def run_tasks(analyze_async, texts, callers):
+    latencies = []
+
+    async def caller(slot):
+        for text in texts[slot::callers]:
+            started = time.perf_counter()
+            result = await analyze_async(text)
+            latencies.append(time.perf_counter() - started)
+            if not result.get('success'):
+                raise RuntimeError(result.get('error'))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller(slot) for slot in range(callers)))
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='sync,async')
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--callers', type=int, default=32, help='concurrent threads or tasks')
+    parser.add_argument('--latency-ms', type=float, default=40, help='simulated API response time')
+    parser.add_argument('--repeat-share', type=float, default=0.3, help='fraction of quick-phrase messages')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', default='5', help='comma-separated batching windows')
+    parser.add_argument('--concurrency', type=int, default=32, help='API requests in flight')
+    parser.add_argument('--cache', action='store_true', help='leave the result cache on')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    from django.conf import settings
+    if not settings.configured:
+        settings.configure(GCP_API_KEY='benchmark', NLP_CACHE_TTL=86400 if args.cache else 0)
+    import django
+    django.setup()
+
+    from services.gcp_async_client import async_gcp_client
+    from services.gcp_client import gcp_client
+    from services.sentiment_batcher import SentimentBatcher
+
+    requests = multiprocessing.Value('i', 0)
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=serve_nlp, args=(args.latency_ms / 1000, port_queue, requests), daemon=True
+    )
+    server.start()
+    gcp_client.NLP_URL = f'http://127.0.0.1:{port_queue.get()}/v1/documents:analyzeSentiment'
+
+    texts = make_texts(args.calls, args.repeat_share, args.seed)
+    scenarios = [('direct', None)] + [(f'batched {wait}ms', float(wait)) for wait in args.max_wait_ms.split(',')]
+    results = {}
+    if not args.json:
+        print(f"{args.calls} calls, {args.callers} callers, {args.latency_ms:g}ms API latency, "
+              f"{args.repeat_share:.0%} quick phrases")
+
+    for mode in args.modes.split(','):
+        for name, wait in scenarios:
+            batcher = None
+            if wait is not None:
+                batcher = SentimentBatcher(max_batch=args.batch_size, max_wait_ms=wait,
+                                           max_concurrency=args.concurrency)
+            with requests.get_lock():
+                requests.value = 0
+            if mode == 'sync':
+                analyze = batcher.analyze if batcher else gcp_client.analyze_sentiment_nlp
+                latencies, elapsed = run_threads(analyze, texts, args.callers)
+            else:
+                analyze_async = batcher.analyze_async if batcher else async_gcp_client.analyze_sentiment_nlp
+                latencies, elapsed = asyncio.run(run_tasks(analyze_async, texts, args.callers))
+            summary = summarize(latencies, elapsed, requests.value)
+            if batcher:
+                summary['avg_batch_size'] = batcher.stats()['avg_batch_size']
+            results[f'{mode} {name}'] = summary
+            if not args.json:
+                print(f"  {mode + ' ' + name:<20} {summary['calls_per_s']:>9,.0f} calls/s   "
+                      f"p50 {summary['p50_ms']:>7.1f}  p99 {summary['p99_ms']:>7.1f} ms   "
+                      f"{summary['api_requests']:>6,} API requests")
+
+    server.terminate()
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Benchmark user search: legacy `icontains` scan vs. the indexed token search.
+
+Populates a throwaway test database with synthetic users, then times
+keystroke-style queries (2-5 character prefixes) through both paths.
+
+Usage:
+    python benchmarks/user_search.py                 # 100k users, SQLite in memory
+    python benchmarks/user_search.py --users 1000000 --json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'de_novo.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Q  # noqa: E402
+
+from apps.users.models import User, UserContact, UserSearchToken  # noqa: E402
+from apps.users.search import search_users, tokens_for  # noqa: E402
+
+SYLLABLES = ['ka', 'ri', 'mo', 'ta', 'na', 'le', 'jo', 'sa', 'mi', 'ra', 'de', 'lu',
+             'an', 'el', 'is', 'or', 'be', 'ch', 'fa', 'gu', 'ho', 'zi', 'ya', 'vo']
+
+
+def make_name(rng, parts):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(parts)).capitalize()
+
+
+def populate(count, seed=7, batch_size=5000):
+    rng = random.Random(seed)
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        users = []
+        for i in range(created, created + size):
+            first, last = make_name(rng, 2), make_name(rng, 3)
+            users.append(User(
+                username=f'{first.lower()}_{last.lower()}{i}',
+                first_name=first,
+                last_name=last,
+                password='!',
+            ))
+        users = User.objects.bulk_create(users)
+        UserSearchToken.objects.bulk_create([
+            UserSearchToken(user_id=user.pk, token=token, kind=kind)
+            for user in users
+            for token, kind in tokens_for(user.username, user.first_name, user.last_name)
+        ], batch_size=batch_size)
+        created += size
+    return rng
+
+
+def legacy_search(query, requester):
+    return list(User.objects.filter(
+        Q(username__icontains=query) |
+        Q(first_name__icontains=query) |
+        Q(last_name__icontains=query)
+    ).exclude(id=requester.id)[:20])
+
+
+def time_queries(fn, queries, requester):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query, requester)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'queries': len(samples),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'p50_ms': round(samples[len(samples) // 2], 3),
+        'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--contacts', type=int, default=50)
+    parser.add_argument('--skip-legacy', action='store_true', help='skip the icontains baseline')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    test_db = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        started = time.perf_counter()
+        rng = populate(args.users)
+        populate_s = time.perf_counter() - started
+
+        requester = User.objects.order_by('?').first()
+        contacts = User.objects.exclude(pk=requester.pk).order_by('?')[:args.contacts]
+        UserContact.objects.bulk_create([UserContact(user=requester, contact=c) for c in contacts])
+
+        queries = [
+            make_name(rng, 3).lower()[:rng.randint(2, 5)]
+            for _ in range(args.queries)
+        ]
+
+        report = {
+            'backend': connection.vendor,
+            'users': args.users,
+            'populate_s': round(populate_s, 1),
+            'indexed': time_queries(search_users, queries, requester),
+        }
+        if not args.skip_legacy:
+            report['legacy_icontains'] = time_queries(legacy_search, queries, requester)
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['users']:,} users on {report['backend']} (populated in {report['populate_s']}s)")
+    for name in ('indexed', 'legacy_icontains'):
+        if name in report:
+            r = report[name]
+            print(f"  {name:<17} mean {r['mean_ms']:>8.2f} ms   p50 {r['p50_ms']:>8.2f} ms   p99 {r['p99_ms']:>8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
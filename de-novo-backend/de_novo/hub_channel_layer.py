@@ -0,0 +1,504 @@
+"""
+Broker-less channel layer for running several ASGI workers on one host.
+
+A small hub process (`python manage.py run_channel_hub`) owns every channel
+queue and group and listens on a Unix domain socket. Each worker process
+keeps one multiplexed connection to the hub per event loop, so group
+fan-out reaches consumers in every daphne worker without Redis/RabbitMQ.
+
+Wire format: 4-byte big-endian length followed by a msgpack array.
+    request:  [op, request_id, *args]
+    response: [request_id, status, payload]
+Message bodies are packed once by the sender and forwarded as opaque bytes;
+the hub never decodes them.
+"""
+
+import asyncio
+import logging
+import os
+import struct
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+
+import msgpack
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HUB_PATH = '/tmp/de_novo_channel_hub.sock'
+MAX_FRAME_SIZE = 16 * 1024 * 1024  # Matches the 10MB upload limit plus headroom
+
+# Operations
+OP_SEND = 1
+OP_RECEIVE = 2
+OP_CANCEL = 3
+OP_GROUP_ADD = 4
+OP_GROUP_DISCARD = 5
+OP_GROUP_SEND = 6
+OP_FLUSH = 7
+
+# Response status
+STATUS_OK = 0
+STATUS_FULL = 1
+STATUS_ERROR = 2
+STATUS_CANCELLED = 3
+
+_HEADER = struct.Struct('>I')
+
+
+def _pack_frame(items) -> bytes:
+    body = msgpack.packb(items, use_bin_type=True)
+    return _HEADER.pack(len(body)) + body
+
+
+async def _read_frame(reader):
+    """Read one frame, or return None when the peer has gone away."""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+        (length,) = _HEADER.unpack(header)
+        if length > MAX_FRAME_SIZE:
+            raise ValueError(f'Frame of {length} bytes exceeds limit')
+        body = await reader.readexactly(length)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    return msgpack.unpackb(body, raw=False)
+
+
+# ── Hub (server side) ────────────────────────────────────────────────────────
+
+class _HubPeer:
+    """One connected worker as seen by the hub."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.receives = {}  # request_id -> channel awaiting a message
+        self.closed = False
+
+    def reply(self, request_id, status, payload=None):
+        if not self.closed:
+            self.writer.write(_pack_frame([request_id, status, payload]))
+
+
+class ChannelHub:
+    """
+    In-memory channel and group state shared by every connected worker.
+    Capacity and expiry semantics follow InMemoryChannelLayer.
+    """
+
+    def __init__(self, path: str = DEFAULT_HUB_PATH, expiry: int = 60,
+                 group_expiry: int = 86400, capacity: int = 100,
+                 channel_capacity: dict = None, **kwargs):
+        self.path = str(path)
+        self.expiry = expiry
+        self.group_expiry = group_expiry
+        # Reuse the base layer's glob/regex capacity matching
+        self._capacities = BaseChannelLayer(capacity=capacity)
+        self._capacities.channel_capacity = self._capacities.compile_capacities(
+            channel_capacity or {}
+        )
+
+        self.channels = {}  # channel -> deque[(expires_at, payload)]
+        self.waiters = {}   # channel -> deque[(peer, request_id)]
+        self.groups = {}    # group -> {channel: joined_at}
+        self.peers = set()
+        self._server = None
+        self._sweeper = None
+
+    @classmethod
+    def from_config(cls, config: dict, path: str = None):
+        """Build a hub from a CHANNEL_LAYERS CONFIG dict."""
+        config = dict(config)
+        if path:
+            config['path'] = path
+        return cls(**config)
+
+    # Server lifecycle
+
+    async def start(self):
+        sock_path = Path(self.path)
+        sock_path.parent.mkdir(parents=True, exist_ok=True)
+        if sock_path.exists():
+            if await self._is_live():
+                raise RuntimeError(f'A channel hub is already listening on {self.path}')
+            sock_path.unlink()
+
+        self._server = await asyncio.start_unix_server(self._handle_peer, path=self.path)
+        # Only processes running as the same user may join the hub
+        os.chmod(self.path, 0o600)
+        self._sweeper = asyncio.ensure_future(self._sweep_forever())
+        logger.info(f'Channel hub listening on {self.path}')
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            self._server.close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    async def _is_live(self) -> bool:
+        try:
+            _, writer = await asyncio.open_unix_connection(self.path)
+        except OSError:
+            return False
+        writer.close()
+        return True
+
+    async def _handle_peer(self, reader, writer):
+        peer = _HubPeer(writer)
+        self.peers.add(peer)
+        try:
+            while True:
+                frame = await _read_frame(reader)
+                if frame is None:
+                    break
+                self._dispatch(peer, frame)
+                await writer.drain()
+        except Exception as e:
+            logger.warning(f'Channel hub dropped a peer: {type(e).__name__}: {e}')
+        finally:
+            peer.closed = True
+            self.peers.discard(peer)
+            for request_id, channel in list(peer.receives.items()):
+                self._remove_waiter(channel, peer, request_id)
+            writer.close()
+
+    # Dispatch
+
+    def _dispatch(self, peer, frame):
+        op, request_id, *args = frame
+        if op == OP_SEND:
+            channel, payload = args
+            status = STATUS_OK if self._send(channel, payload) else STATUS_FULL
+            peer.reply(request_id, status)
+        elif op == OP_RECEIVE:
+            self._receive(peer, request_id, args[0])
+        elif op == OP_CANCEL:
+            cancelled_id = args[0]
+            channel = peer.receives.get(cancelled_id)
+            if channel is not None:
+                # Still waiting, so no message was handed out: acknowledge
+                self._remove_waiter(channel, peer, cancelled_id)
+                peer.reply(cancelled_id, STATUS_CANCELLED)
+        elif op == OP_GROUP_ADD:
+            group, channel = args
+            self.groups.setdefault(group, {})[channel] = time.time()
+            peer.reply(request_id, STATUS_OK)
+        elif op == OP_GROUP_DISCARD:
+            group, channel = args
+            members = self.groups.get(group)
+            if members:
+                members.pop(channel, None)
+                if not members:
+                    self.groups.pop(group, None)
+            peer.reply(request_id, STATUS_OK)
+        elif op == OP_GROUP_SEND:
+            group, payload = args
+            for channel in list(self.groups.get(group, {})):
+                self._send(channel, payload)  # Full members silently miss out
+            peer.reply(request_id, STATUS_OK)
+        elif op == OP_FLUSH:
+            self.channels = {}
+            self.groups = {}
+            peer.reply(request_id, STATUS_OK)
+        else:
+            peer.reply(request_id, STATUS_ERROR, f'Unknown op {op}')
+
+    def _send(self, channel, payload) -> bool:
+        """Deliver straight to a waiting receiver, else queue. False if full."""
+        waiters = self.waiters.get(channel)
+        while waiters:
+            peer, request_id = waiters.popleft()
+            if peer.closed or peer.receives.pop(request_id, None) is None:
+                continue
+            if not waiters:
+                self.waiters.pop(channel, None)
+            peer.reply(request_id, STATUS_OK, payload)
+            return True
+        self.waiters.pop(channel, None)
+
+        queue = self.channels.get(channel)
+        if queue is None:
+            queue = self.channels[channel] = deque()
+        else:
+            self._trim_expired(channel, queue)
+        if len(queue) >= self._capacities.get_capacity(channel):
+            return False
+        queue.append((time.time() + self.expiry, payload))
+        return True
+
+    def _receive(self, peer, request_id, channel):
+        queue = self.channels.get(channel)
+        if queue:
+            self._trim_expired(channel, queue)
+        if queue:
+            _, payload = queue.popleft()
+            if not queue:
+                self.channels.pop(channel, None)
+            peer.reply(request_id, STATUS_OK, payload)
+            return
+        peer.receives[request_id] = channel
+        self.waiters.setdefault(channel, deque()).append((peer, request_id))
+
+    def _remove_waiter(self, channel, peer, request_id):
+        peer.receives.pop(request_id, None)
+        waiters = self.waiters.get(channel)
+        if waiters:
+            try:
+                waiters.remove((peer, request_id))
+            except ValueError:
+                pass
+            if not waiters:
+                self.waiters.pop(channel, None)
+
+    # Expiry
+
+    def _trim_expired(self, channel, queue):
+        now = time.time()
+        expired = False
+        while queue and queue[0][0] < now:
+            queue.popleft()
+            expired = True
+        if expired:
+            # A channel that stopped draining is treated as gone
+            for members in self.groups.values():
+                members.pop(channel, None)
+        if not queue:
+            self.channels.pop(channel, None)
+
+    def _sweep(self):
+        for channel, queue in list(self.channels.items()):
+            self._trim_expired(channel, queue)
+        cutoff = time.time() - self.group_expiry
+        for group, members in list(self.groups.items()):
+            for channel, joined_at in list(members.items()):
+                if joined_at < cutoff:
+                    members.pop(channel, None)
+            if not members:
+                self.groups.pop(group, None)
+
+    async def _sweep_forever(self):
+        interval = max(1, min(self.expiry, 10))
+        while True:
+            await asyncio.sleep(interval)
+            self._sweep()
+
+
+def run_hub(path: str = DEFAULT_HUB_PATH, **config):
+    """Run a hub in the current process until interrupted."""
+    hub = ChannelHub(path=path, **config)
+    try:
+        asyncio.run(hub.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+# ── Channel layer (worker side) ──────────────────────────────────────────────
+
+class _HubConnection:
+    """A multiplexed connection from one event loop to the hub."""
+
+    def __init__(self, path: str, request_timeout: float = None):
+        self.path = path
+        self.request_timeout = request_timeout
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._next_id = 0
+        self._pending = {}   # request_id -> Future
+        self._receives = {}  # request_id -> channel, until the hub replies
+        self._stash = {}     # channel -> deque of payloads that arrived late
+        self.closed = False
+
+    async def connect(self, timeout: float):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_unix_connection(self.path), timeout
+        )
+        self._read_task = asyncio.ensure_future(self._read_loop())
+
+    async def request(self, op, *args):
+        if self.closed:
+            raise ConnectionError('Channel hub connection is closed')
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(_pack_frame([op, request_id, *args]))
+
+        async def reply():
+            await self._writer.drain()
+            return await future
+
+        try:
+            # A wedged hub must not block every sender; a late reply is ignored
+            return await asyncio.wait_for(reply(), self.request_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f'Channel hub did not answer within {self.request_timeout}s') from None
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def receive(self, channel):
+        stashed = self._stash.get(channel)
+        if stashed:
+            payload = stashed.popleft()
+            if not stashed:
+                self._stash.pop(channel, None)
+            return payload
+
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._receives[request_id] = channel
+        self._writer.write(_pack_frame([OP_RECEIVE, request_id, channel]))
+        try:
+            await self._writer.drain()
+            _, payload = await future
+        except asyncio.CancelledError:
+            # The hub answers with either the message (stashed by _read_loop)
+            # or a cancel acknowledgement.
+            self._pending.pop(request_id, None)
+            if not self.closed:
+                self._writer.write(_pack_frame([OP_CANCEL, 0, request_id]))
+            raise
+        return payload
+
+    async def _read_loop(self):
+        try:
+            while True:
+                frame = await _read_frame(self._reader)
+                if frame is None:
+                    break
+                request_id, status, payload = frame
+                future = self._pending.pop(request_id, None)
+                channel = self._receives.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_result((status, payload))
+                elif channel is not None and status == STATUS_OK:
+                    self._stash.setdefault(channel, deque()).append(payload)
+        finally:
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError('Channel hub connection lost'))
+        self._pending = {}
+        if self._writer is not None:
+            self._writer.close()
+        if self._read_task is not None and self._read_task is not asyncio.current_task():
+            self._read_task.cancel()
+
+
+class HubChannelLayer(BaseChannelLayer):
+    """
+    Channel layer backed by a local hub process over a Unix domain socket.
+
+    Accepts the same CONFIG keys as InMemoryChannelLayer plus `path`,
+    `connect_timeout` and `request_timeout` (seconds to wait for the hub to
+    answer a send, group or flush request; receive waits are not bounded).
+    Capacity and expiry are enforced by the hub, which reads the same CONFIG
+    when started with `run_channel_hub`.
+    """
+
+    extensions = ['groups', 'flush']
+
+    def __init__(self, path: str = DEFAULT_HUB_PATH, expiry=60, group_expiry=86400,
+                 capacity=100, channel_capacity=None, connect_timeout: float = 5,
+                 request_timeout: float = 5, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, **kwargs)
+        self.channel_capacity = self.compile_capacities(channel_capacity or {})
+        self.group_expiry = group_expiry
+        self.path = str(path)
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self._connections = {}  # event loop -> _HubConnection
+        self._locks = {}        # event loop -> asyncio.Lock
+
+    async def _connection(self) -> _HubConnection:
+        loop = asyncio.get_running_loop()
+        conn = self._connections.get(loop)
+        if conn is not None and not conn.closed:
+            return conn
+
+        lock = self._locks.setdefault(loop, asyncio.Lock())
+        async with lock:
+            conn = self._connections.get(loop)
+            if conn is None or conn.closed:
+                # Forget connections whose event loop has gone away
+                for old_loop in [l for l in self._connections if l.is_closed()]:
+                    self._connections.pop(old_loop, None)
+                    self._locks.pop(old_loop, None)
+                conn = _HubConnection(self.path, self.request_timeout)
+                await conn.connect(self.connect_timeout)
+                self._connections[loop] = conn
+        return conn
+
+    @staticmethod
+    def _pack_message(message: dict) -> bytes:
+        return msgpack.packb(message, use_bin_type=True)
+
+    # Channel layer API
+
+    async def send(self, channel, message):
+        """Send a message onto a (general or specific) channel."""
+        assert isinstance(message, dict), 'message is not a dict'
+        self.require_valid_channel_name(channel)
+        assert '__asgi_channel__' not in message
+
+        conn = await self._connection()
+        status, _ = await conn.request(OP_SEND, channel, self._pack_message(message))
+        if status == STATUS_FULL:
+            raise ChannelFull(channel)
+
+    async def receive(self, channel):
+        """Receive the first message that arrives on the channel."""
+        self.require_valid_channel_name(channel)
+        conn = await self._connection()
+        payload = await conn.receive(channel)
+        return msgpack.unpackb(payload, raw=False)
+
+    async def new_channel(self, prefix='specific.'):
+        """Return a new channel name unique across every hub client."""
+        return '%s.hub!%s' % (prefix, uuid.uuid4().hex[:12])
+
+    # Flush extension
+
+    async def flush(self):
+        conn = await self._connection()
+        await conn.request(OP_FLUSH)
+
+    async def close(self):
+        conn = self._connections.pop(asyncio.get_running_loop(), None)
+        if conn is not None:
+            conn.close()
+
+    # Groups extension
+
+    async def group_add(self, group, channel):
+        """Add the channel name to a group."""
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        conn = await self._connection()
+        await conn.request(OP_GROUP_ADD, group, channel)
+
+    async def group_discard(self, group, channel):
+        self.require_valid_channel_name(channel)
+        self.require_valid_group_name(group)
+        conn = await self._connection()
+        await conn.request(OP_GROUP_DISCARD, group, channel)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), 'Message is not a dict'
+        self.require_valid_group_name(group)
+        conn = await self._connection()
+        await conn.request(OP_GROUP_SEND, group, self._pack_message(message))
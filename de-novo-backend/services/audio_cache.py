@@ -0,0 +1,229 @@
+"""
+Disk cache for synthesized speech.
+
+MP3s are stored under TTS_CACHE_DIR, named by an HMAC of
+(text, language, voice, rate) under a server secret, so a repeated phrase is
+synthesized once, and a key reveals nothing about the text to anyone without
+the secret. File contents are sealed with AES-GCM under a key derived from
+the same secret, so message audio is not readable on disk. Total size is
+bounded by `max_bytes`: once it is exceeded, the least recently used files
+(mtime, refreshed on every hit) are deleted until the cache is back under 90%
+of the limit.
+
+Audio is served through short-lived signed URLs (sign_key / unsign_token).
+The signing time is rounded down to half the URL lifetime, so a phrase keeps
+the same URL (and the browser's cached copy) for at least that long.
+
+The size is tracked per process and re-measured from disk on eviction, so
+with several workers the cache may briefly overshoot the limit.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import salted_hmac
+
+from .result_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+KEY_RE = re.compile(r'[0-9a-f]{64}')
+EVICT_TO = 0.9  # Fraction of max_bytes kept after an eviction pass
+SUFFIX = '.enc'
+LEGACY_SUFFIX = '.mp3'  # Plaintext files from before encryption; deleted on scan
+NONCE_SIZE = 12
+URL_SALT = 'de_novo.tts_audio.url'
+
+
+class AudioCache:
+    """Content-addressed MP3 files with LRU eviction by total size."""
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, secret: str = None):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self._secret = secret or settings.SECRET_KEY
+        self._aesgcm = AESGCM(
+            salted_hmac('de_novo.tts_audio.encryption', '', secret=self._secret, algorithm='sha256').digest()
+        )
+        self._bytes = None  # Measured on first write
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+    def make_key(self, text: str, language_code: str, voice_name: str, speaking_rate: float) -> str:
+        identity = json.dumps(
+            [normalize_text(text), language_code, voice_name or '', round(float(speaking_rate), 2)],
+            ensure_ascii=False,
+        )
+        return salted_hmac('de_novo.tts_audio.key', identity, secret=self._secret, algorithm='sha256').hexdigest()
+
+    def is_valid_key(self, key: str) -> bool:
+        return bool(KEY_RE.fullmatch(key or ''))
+
+    def path_for(self, key: str) -> str:
+        # Two-level fan-out keeps directories small
+        return os.path.join(self.directory, key[:2], f'{key}{SUFFIX}')
+
+    def _count(self, name: str, value: int = 1):
+        with self._lock:
+            self._stats[name] += value
+
+    def exists(self, key: str) -> bool:
+        """Whether `key` is cached (without decrypting it). Marks it recently used."""
+        try:
+            os.utime(self.path_for(key))
+        except FileNotFoundError:
+            self._count('misses')
+            return False
+        self._count('hits')
+        return True
+
+    def read(self, key: str, count: bool = True):
+        """
+        Decrypted audio for `key`, or None. Marks it recently used. Pass
+        count=False when serving a key already looked up, so the hit rate
+        counts each request once.
+        """
+        path = self.path_for(key)
+        try:
+            with open(path, 'rb') as f:
+                sealed = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            if count:
+                self._count('misses')
+            return None
+        try:
+            audio = self._aesgcm.decrypt(sealed[:NONCE_SIZE], sealed[NONCE_SIZE:], key.encode('ascii'))
+        except (InvalidTag, ValueError):  # Written under another secret, or damaged
+            logger.warning('Discarding unreadable TTS cache file %s', path)
+            if count:
+                self._count('misses')
+            return None
+        if count:
+            self._count('hits')
+        return audio
+
+    def put(self, key: str, audio: bytes) -> str:
+        """Store `audio` under `key` (encrypted, atomically) and evict if over the limit."""
+        path = self.path_for(key)
+        nonce = os.urandom(NONCE_SIZE)
+        sealed = nonce + self._aesgcm.encrypt(nonce, audio, key.encode('ascii'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(sealed)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self._stats['writes'] += 1
+            if self._bytes is not None:
+                self._bytes += len(sealed)
+            over = self._bytes is None or self._bytes > self.max_bytes
+        if over:
+            self.evict()
+        return path
+
+    def _scan(self) -> list:
+        entries = []
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith(LEGACY_SUFFIX):
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                    continue
+                if not name.endswith(SUFFIX):
+                    continue
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self):
+        """Delete least recently used files until the cache fits under the limit."""
+        with self._lock:
+            entries = self._scan()
+            total = sum(size for _mtime, size, _path in entries)
+            if total > self.max_bytes:
+                target = self.max_bytes * EVICT_TO
+                for _mtime, size, path in sorted(entries):
+                    if total <= target:
+                        break
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    self._stats['evictions'] += 1
+            self._bytes = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            values = dict(self._stats)
+            values['bytes'] = self._bytes
+        lookups = values['hits'] + values['misses']
+        values['hit_rate'] = round(values['hits'] / lookups, 4) if lookups else None
+        values.update(max_bytes=self.max_bytes, directory=self.directory)
+        return values
+
+
+class _BucketedSigner(signing.TimestampSigner):
+    """TimestampSigner whose timestamps are rounded down to `bucket` seconds."""
+
+    def __init__(self, bucket: int, **kwargs):
+        super().__init__(**kwargs)
+        self.bucket = max(1, bucket)
+
+    def signed_at(self) -> int:
+        now = int(time.time())
+        return now - now % self.bucket
+
+    def timestamp(self):
+        return signing.b62_encode(self.signed_at())
+
+
+def sign_key(key: str, max_age: int):
+    """
+    (URL token granting access to the audio for `key`, seconds until it
+    expires). The token is the same for every call within a max_age/2 window.
+    """
+    signer = _BucketedSigner(max_age // 2, salt=URL_SALT)
+    signed_at = signer.signed_at()
+    return signer.sign(key), max(0, signed_at + max_age - int(time.time()))
+
+
+def unsign_token(token: str, max_age: int):
+    """The cache key in a URL token, or None if it is forged or expired."""
+    try:
+        key = signing.TimestampSigner(salt=URL_SALT).unsign(token, max_age=max_age)
+    except signing.BadSignature:  # Includes SignatureExpired
+        return None
+    return key if KEY_RE.fullmatch(key) else None
+
+
+# Global instance
+tts_audio_cache = AudioCache(
+    getattr(settings, 'TTS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'de_novo_tts')),
+    getattr(settings, 'TTS_CACHE_MAX_MB', 256) * 1024 * 1024,
+    secret=getattr(settings, 'TTS_CACHE_SECRET', '') or None,
+)
@@ -0,0 +1,163 @@
+"""
+Split long recordings into chunks that synchronous speech:recognize accepts
+(about one minute and 10 MB per request), and stitch the transcripts back.
+
+Audio is worked on as 16-bit mono PCM. LINEAR16 input (raw or WAV) is read
+directly; compressed input (WEBM_OPUS, OGG_OPUS, MP3, FLAC) is decoded with
+ffmpeg when it is on PATH, otherwise it cannot be split.
+
+Each chunk ends at the quietest 20 ms frame in the last `search` seconds of
+its window. If even that frame is louder than `silence_rms`, the cut falls
+at the end of the window and the next chunk starts `overlap` seconds earlier,
+so a word cut in half is heard whole by one side; the words both transcripts
+share are dropped from the second one when stitching.
+"""
+
+import array
+import io
+import math
+import re
+import shutil
+import subprocess
+import sys
+import wave
+
+SAMPLE_WIDTH = 2  # 16-bit PCM
+DECODE_RATE = 16000  # Rate compressed audio is decoded to
+FRAME_SECONDS = 0.02
+MAX_CHUNK_BYTES = 6 * 1024 * 1024  # Raw PCM per request; base64 must stay under 10 MB
+MAX_STITCH_WORDS = 12
+
+COMPRESSED_ENCODINGS = ('WEBM_OPUS', 'OGG_OPUS', 'MP3', 'FLAC')
+# 4 kbps: below any bitrate browsers record speech at (Opus goes down to 6 kbps)
+MIN_COMPRESSED_BYTES_PER_SECOND = 500
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which('ffmpeg') is not None
+
+
+def _samples(pcm: bytes) -> array.array:
+    samples = array.array('h')
+    samples.frombytes(pcm[:len(pcm) - len(pcm) % SAMPLE_WIDTH])
+    if sys.byteorder == 'big':
+        samples.byteswap()  # PCM is little-endian
+    return samples
+
+
+def _read_wav(audio: bytes):
+    with wave.open(io.BytesIO(audio)) as wav:
+        if wav.getsampwidth() != SAMPLE_WIDTH:
+            return None
+        channels, rate = wav.getnchannels(), wav.getframerate()
+        pcm = wav.readframes(wav.getnframes())
+    if channels > 1:
+        # Keep the first channel
+        mono = _samples(pcm)[::channels]
+        if sys.byteorder == 'big':
+            mono.byteswap()
+        pcm = mono.tobytes()
+    return pcm, rate
+
+
+def wav_duration(audio: bytes):
+    """Seconds of audio in a WAV file from its header, or None if it cannot be read."""
+    try:
+        with wave.open(io.BytesIO(audio)) as wav:
+            return wav.getnframes() / wav.getframerate()
+    except (wave.Error, EOFError, ZeroDivisionError):
+        return None
+
+
+def _decode_ffmpeg(audio: bytes, timeout: float):
+    process = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-i', 'pipe:0', '-f', 's16le', '-ac', '1', '-ar', str(DECODE_RATE), 'pipe:1'],
+        input=audio, capture_output=True, timeout=timeout, check=True,
+    )
+    return process.stdout, DECODE_RATE
+
+
+def read_pcm(audio: bytes, encoding: str, sample_rate: int, decode_timeout: float = 60.0):
+    """
+    16-bit mono PCM for `audio` as (pcm, sample_rate), or None when it cannot
+    be decoded here (the caller then sends it as one request).
+    """
+    try:
+        if encoding == 'LINEAR16':
+            if audio[:4] == b'RIFF':
+                return _read_wav(audio)
+            return audio, sample_rate
+        if encoding in COMPRESSED_ENCODINGS and ffmpeg_available():
+            return _decode_ffmpeg(audio, decode_timeout)
+    except (wave.Error, EOFError, subprocess.SubprocessError, OSError):
+        pass
+    return None
+
+
+def duration(pcm: bytes, sample_rate: int) -> float:
+    return len(pcm) / SAMPLE_WIDTH / sample_rate
+
+
+def _quietest_frame(pcm: bytes, start: int, end: int, frame: int):
+    """(sample offset, RMS) of the quietest frame between samples start and end."""
+    best, best_rms = end, math.inf
+    for offset in range(start, end - frame + 1, frame):
+        samples = _samples(pcm[offset * SAMPLE_WIDTH:(offset + frame) * SAMPLE_WIDTH])
+        rms = math.sqrt(sum(sample * sample for sample in samples) / frame)
+        if rms < best_rms:
+            # Cut in the middle of the quiet frame
+            best, best_rms = offset + frame // 2, rms
+    return best, best_rms
+
+
+def plan_chunks(pcm: bytes, sample_rate: int, window: float = 50.0, overlap: float = 1.0,
+                search: float = 10.0, silence_rms: float = 500.0) -> list:
+    """
+    Split PCM into (start, end, overlaps_previous) sample ranges of at most
+    `window` seconds (less if needed to stay under MAX_CHUNK_BYTES).
+    """
+    total = len(pcm) // SAMPLE_WIDTH
+    window_samples = min(int(window * sample_rate), MAX_CHUNK_BYTES // SAMPLE_WIDTH)
+    overlap_samples = int(overlap * sample_rate)
+    search_samples = min(int(search * sample_rate), window_samples // 2)
+    frame = max(1, int(FRAME_SECONDS * sample_rate))
+
+    chunks = []
+    start, overlapped = 0, False
+    while start < total:
+        end = start + window_samples
+        if end >= total:
+            chunks.append((start, total, overlapped))
+            break
+        cut, rms = _quietest_frame(pcm, end - search_samples, end, frame)
+        if rms <= silence_rms:
+            chunks.append((start, cut, overlapped))
+            start, overlapped = cut, False
+        else:
+            chunks.append((start, end, overlapped))
+            start, overlapped = end - overlap_samples, True
+    return chunks
+
+
+def _word_key(word: str) -> str:
+    return re.sub(r'[^\w]', '', word.lower())
+
+
+def stitch_transcripts(parts: list) -> str:
+    """
+    Join (transcript, overlaps_previous) parts in order. Where a part overlaps
+    the previous one, the longest run of words ending the previous part and
+    starting this one (up to MAX_STITCH_WORDS) is kept only once.
+    """
+    words = []
+    for transcript, overlaps_previous in parts:
+        new_words = transcript.split()
+        if overlaps_previous and words:
+            tail = [_word_key(word) for word in words[-MAX_STITCH_WORDS:]]
+            head = [_word_key(word) for word in new_words[:MAX_STITCH_WORDS]]
+            for size in range(min(len(tail), len(head)), 0, -1):
+                if tail[-size:] == head[:size]:
+                    new_words = new_words[size:]
+                    break
+        words.extend(new_words)
+    return ' '.join(words)
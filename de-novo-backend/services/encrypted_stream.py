@@ -0,0 +1,309 @@
+"""
+Streaming, seekable AES-256-GCM encryption for voice messages and files.
+
+Payloads are split into fixed-size chunks that are sealed independently,
+so attachments of any size are encrypted and decrypted in constant memory
+and a reader can seek straight to the chunk holding a byte offset (partial
+playback, HTTP range requests).
+
+Format:
+    header  = MAGIC (4) | version (1) | chunk_size (4, big endian) | nonce_prefix (7)
+    chunk_i = AES-GCM(key, nonce_i, plaintext_i, aad=header) -> ciphertext_i | tag (16)
+    nonce_i = nonce_prefix (7) | i (4, big endian) | last-chunk flag (1)
+
+Every chunk is full-size except the last, which carries the flag (the STREAM
+construction), so reordered, dropped or truncated chunks fail to decrypt.
+"""
+
+import io
+import os
+import struct
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+MAGIC = b'DNS\x00'
+VERSION = 1
+HEADER_FORMAT = '>4sBI7s'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+TAG_SIZE = 16
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_CHUNKS = 2 ** 32
+
+
+class StreamDecryptionError(ValueError):
+    """Raised when an encrypted stream is malformed, truncated or tampered with."""
+
+
+def generate_stream_key() -> bytes:
+    """Return a fresh 256-bit key for an encrypted stream."""
+    return AESGCM.generate_key(bit_length=256)
+
+
+def _nonce(prefix: bytes, index: int, last: bool) -> bytes:
+    if index >= MAX_CHUNKS:
+        raise OverflowError('Encrypted stream exceeds the maximum number of chunks')
+    return prefix + struct.pack('>IB', index, 1 if last else 0)
+
+
+class EncryptedWriter(io.RawIOBase):
+    """
+    Write-only file object that encrypts into `fileobj`.
+    The final chunk is written by close(); always close the writer
+    (or use it as a context manager) or the stream will not decrypt.
+    """
+
+    def __init__(self, fileobj, key: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 close_fileobj: bool = False):
+        super().__init__()
+        if chunk_size <= 0:
+            raise ValueError('chunk_size must be positive')
+        self._fileobj = fileobj
+        self._aesgcm = AESGCM(key)
+        self.chunk_size = chunk_size
+        self._close_fileobj = close_fileobj
+        self._prefix = os.urandom(7)
+        self._header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, chunk_size, self._prefix)
+        self._buffer = bytearray()
+        self._index = 0
+        self._written = 0
+        self._fileobj.write(self._header)
+
+    def writable(self):
+        return True
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError('write to closed EncryptedWriter')
+        view = memoryview(data).cast('B')
+        self._buffer += view
+        # Keep at least one byte back: only close() knows which chunk is last
+        while len(self._buffer) > self.chunk_size:
+            self._seal(bytes(self._buffer[:self.chunk_size]), last=False)
+            del self._buffer[:self.chunk_size]
+        self._written += len(view)
+        return len(view)
+
+    def tell(self) -> int:
+        return self._written
+
+    def _seal(self, plaintext: bytes, last: bool):
+        nonce = _nonce(self._prefix, self._index, last)
+        self._fileobj.write(self._aesgcm.encrypt(nonce, plaintext, self._header))
+        self._index += 1
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self._seal(bytes(self._buffer), last=True)
+            self._buffer = bytearray()
+            if hasattr(self._fileobj, 'flush'):
+                self._fileobj.flush()
+            if self._close_fileobj:
+                self._fileobj.close()
+        finally:
+            super().close()
+
+
+class EncryptedReader(io.RawIOBase):
+    """
+    Read-only, seekable file object that decrypts an encrypted stream.
+    Seeking needs a seekable `fileobj`; otherwise the stream is read in order.
+    """
+
+    def __init__(self, fileobj, key: bytes, close_fileobj: bool = False):
+        super().__init__()
+        self._fileobj = fileobj
+        self._aesgcm = AESGCM(key)
+        self._close_fileobj = close_fileobj
+
+        header = self._read_exact(HEADER_SIZE)
+        if len(header) != HEADER_SIZE:
+            raise StreamDecryptionError('Encrypted stream header is truncated')
+        magic, version, chunk_size, prefix = struct.unpack(HEADER_FORMAT, header)
+        if magic != MAGIC or version != VERSION or chunk_size <= 0:
+            raise StreamDecryptionError('Not a supported encrypted stream')
+        self._header = header
+        self._prefix = prefix
+        self.chunk_size = chunk_size
+        self._record_size = chunk_size + TAG_SIZE
+
+        self._seekable = self._fileobj_seekable()
+        self._chunk_count = None
+        self.size = None  # Plaintext length, when the source is seekable
+        if self._seekable:
+            self._body_start = self._fileobj.tell()  # The stream may sit at an offset
+            self._measure()
+
+        self._pos = 0
+        self._chunk_index = None
+        self._chunk = b''
+        self._next_record = None  # Lookahead for non-seekable sources
+        self._stream_index = 0  # Next chunk index at the source's current position
+
+    def _fileobj_seekable(self) -> bool:
+        try:
+            return bool(self._fileobj.seekable())
+        except (AttributeError, OSError, ValueError):
+            return False
+
+    def _measure(self):
+        end = self._fileobj.seek(0, io.SEEK_END)
+        self._fileobj.seek(self._body_start)
+        body = end - self._body_start
+        if body < TAG_SIZE:
+            raise StreamDecryptionError('Encrypted stream is truncated')
+        self._chunk_count = -(-body // self._record_size)
+        last_record = body - (self._chunk_count - 1) * self._record_size
+        if last_record < TAG_SIZE:
+            raise StreamDecryptionError('Encrypted stream is truncated')
+        self.size = (self._chunk_count - 1) * self.chunk_size + last_record - TAG_SIZE
+
+    def _read_exact(self, size: int) -> bytes:
+        parts = []
+        remaining = size
+        while remaining > 0:
+            part = self._fileobj.read(remaining)
+            if not part:
+                break
+            parts.append(part)
+            remaining -= len(part)
+        return b''.join(parts)
+
+    def _open(self, index: int, record: bytes, last: bool) -> bytes:
+        try:
+            return self._aesgcm.decrypt(_nonce(self._prefix, index, last), record, self._header)
+        except InvalidTag:
+            raise StreamDecryptionError(f'Chunk {index} failed authentication') from None
+
+    def _load_chunk(self, index: int):
+        """Decrypt chunk `index` into the read buffer (returns False past the end)."""
+        if self._seekable:
+            if index >= self._chunk_count:
+                return False
+            self._fileobj.seek(self._body_start + index * self._record_size)
+            record = self._read_exact(self._record_size)
+            self._chunk = self._open(index, record, last=index == self._chunk_count - 1)
+        else:
+            if index != self._stream_index:
+                raise io.UnsupportedOperation('source is not seekable')
+            record = self._next_record if self._next_record is not None else self._read_exact(self._record_size)
+            if not record:
+                return False
+            if len(record) < self._record_size:
+                self._next_record = b''
+                last = True
+            else:
+                self._next_record = self._read_exact(self._record_size)
+                last = not self._next_record
+            self._chunk = self._open(index, record, last)
+            self._stream_index += 1
+            if last:
+                self.size = index * self.chunk_size + len(self._chunk)
+        self._chunk_index = index
+        return True
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return self._seekable
+
+    def readinto(self, buffer) -> int:
+        if self.closed:
+            raise ValueError('read from closed EncryptedReader')
+        view = memoryview(buffer).cast('B')
+        index, offset = divmod(self._pos, self.chunk_size)
+        if index != self._chunk_index and not self._load_chunk(index):
+            return 0
+        available = self._chunk[offset:offset + len(view)]
+        if not available:
+            # Positioned exactly at a chunk boundary past the final (short) chunk
+            return 0
+        view[:len(available)] = available
+        self._pos += len(available)
+        return len(available)
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            return self.readall()
+        out = bytearray()
+        while len(out) < size:
+            chunk = bytearray(min(size - len(out), self.chunk_size))
+            count = self.readinto(chunk)
+            if not count:
+                break
+            out += chunk[:count]
+        return bytes(out)
+
+    def readall(self) -> bytes:
+        out = bytearray()
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return bytes(out)
+            out += chunk
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if not self._seekable:
+            raise io.UnsupportedOperation('source is not seekable')
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._pos + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f'invalid whence ({whence})')
+        if position < 0:
+            raise ValueError('negative seek position')
+        self._pos = position
+        return position
+
+    def read_range(self, start: int, end: int) -> bytes:
+        """Return plaintext bytes [start, end), decrypting only the chunks involved."""
+        self.seek(start)
+        return self.read(max(0, end - start))
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._close_fileobj:
+                self._fileobj.close()
+        finally:
+            super().close()
+
+
+def encrypt_stream(source, destination, key: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Encrypt file object `source` into `destination`. Returns plaintext bytes written."""
+    with EncryptedWriter(destination, key, chunk_size=chunk_size) as writer:
+        while True:
+            data = source.read(chunk_size)
+            if not data:
+                break
+            writer.write(data)
+        return writer.tell()
+
+
+def decrypt_stream(source, destination, key: bytes) -> int:
+    """Decrypt encrypted file object `source` into `destination`. Returns bytes written."""
+    total = 0
+    with EncryptedReader(source, key) as reader:
+        while True:
+            data = reader.read(reader.chunk_size)
+            if not data:
+                break
+            destination.write(data)
+            total += len(data)
+    return total
+
+
+def encrypted_size(plaintext_size: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Size in bytes of the encrypted stream for a payload of `plaintext_size`."""
+    chunks = max(1, -(-plaintext_size // chunk_size))
+    return HEADER_SIZE + plaintext_size + chunks * TAG_SIZE
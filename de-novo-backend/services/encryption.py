@@ -1,32 +1,160 @@
 """
 End-to-End Encryption Service for De-Novo platform.
-Uses RSA for key exchange and AES-GCM for message encryption.
+Uses RSA or X25519 for key exchange and AES-GCM for message encryption.
+
+Each user's key type follows from their public key. The `version` of a
+ciphertext records how its AES key was wrapped:
+    1 (KEY_FORMAT_RSA_OAEP): RSA-OAEP-SHA256; payloads without a version are v1
+    2 (KEY_FORMAT_X25519):   ephemeral X25519 ECDH -> HKDF-SHA256 -> AES-256-GCM
 """
 
 import os
 import base64
+import collections
+import hashlib
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric import rsa, padding, x25519
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.backends import default_backend
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .key_pool import KeyPool
+
+
+def _setting(name, default):
+    try:
+        return getattr(settings, name, default)
+    except ImproperlyConfigured:
+        return default  # Used outside Django (scripts, benchmarks)
+
+
+class ParsedKeyCache:
+    """
+    Bounded LRU of parsed key objects keyed by a SHA-256 fingerprint of the
+    PEM, so repeat encrypt/decrypt calls skip PEM parsing and RSA key setup.
+    """
+    
+    def __init__(self, loader, max_size: int = 256):
+        self._loader = loader
+        self.max_size = max_size
+        self._keys = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, pem: str):
+        """Return the parsed key for `pem`, loading it on a miss."""
+        data = pem.encode('utf-8')
+        if self.max_size <= 0:
+            return self._loader(data)
+        
+        fingerprint = hashlib.sha256(data).digest()
+        with self._lock:
+            key = self._keys.get(fingerprint)
+            if key is not None:
+                self._keys.move_to_end(fingerprint)
+                self.hits += 1
+                return key
+            self.misses += 1
+        
+        # Parse outside the lock; a concurrent miss on the same PEM just parses twice
+        key = self._loader(data)
+        with self._lock:
+            self._keys[fingerprint] = key
+            self._keys.move_to_end(fingerprint)
+            while len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+        return key
+    
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._keys),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_OAEP_SHA256 = padding.OAEP(
+    mgf=padding.MGF1(algorithm=hashes.SHA256()),
+    algorithm=hashes.SHA256(),
+    label=None
+)
+
+KEY_TYPE_RSA = 'rsa-2048'
+KEY_TYPE_X25519 = 'x25519'
+
+KEY_FORMAT_RSA_OAEP = 1
+KEY_FORMAT_X25519 = 2
+
+_X25519_WRAP_INFO = b'de-novo x25519 key wrap v2'
 
 
 class EncryptionService:
     """
     Handles E2E encryption for messages.
-    RSA-2048 for key exchange, AES-256-GCM for messages.
+    RSA-2048 or X25519 for key exchange, AES-256-GCM for messages.
     """
     
     def __init__(self):
         self.key_size = 2048
         self.aes_key_size = 32  # 256 bits
+        self._key_pool = None
+        self._key_pool_lock = threading.Lock()
+        
+        cache_size = _setting('ENCRYPTION_KEY_CACHE_SIZE', 256)
+        self.public_keys = ParsedKeyCache(
+            lambda data: serialization.load_pem_public_key(data, backend=default_backend()),
+            cache_size
+        )
+        self.private_keys = ParsedKeyCache(
+            lambda data: serialization.load_pem_private_key(data, password=None, backend=default_backend()),
+            cache_size
+        )
+        
+        self._executor = None
+        self._executor_lock = threading.Lock()
+    
+    @property
+    def key_pool(self) -> KeyPool:
+        """Pool of pre-generated RSA key pairs, created on first use."""
+        if self._key_pool is None:
+            with self._key_pool_lock:
+                if self._key_pool is None:
+                    self._key_pool = KeyPool(
+                        self._generate_rsa_key_pair,
+                        size=_setting('ENCRYPTION_KEY_POOL_SIZE', 4),
+                        name=f'rsa-{self.key_size}',
+                    )
+        return self._key_pool
     
-    def generate_key_pair(self):
+    def generate_key_pair(self, key_type: str = None):
         """
-        Generate RSA key pair for a user.
-        Returns dict with public_key and private_key as PEM strings.
+        Generate a key pair for a user.
+        Returns dict with public_key and private_key as PEM strings, and key_type.
+        
+        key_type is KEY_TYPE_RSA (default, see ENCRYPTION_DEFAULT_KEY_TYPE)
+        or KEY_TYPE_X25519. RSA pairs are served from the background key pool
+        when one is ready, otherwise generated inline.
         """
+        key_type = key_type or _setting('ENCRYPTION_DEFAULT_KEY_TYPE', KEY_TYPE_RSA)
+        if key_type == KEY_TYPE_RSA:
+            return self.key_pool.take()
+        if key_type == KEY_TYPE_X25519:
+            return self._generate_x25519_key_pair()
+        raise ValueError(f"Unsupported key type: {key_type}")
+    
+    def _generate_rsa_key_pair(self):
         private_key = rsa.generate_private_key(
             public_exponent=65537,
             key_size=self.key_size,
@@ -49,18 +177,89 @@ class EncryptionService:
         
         return {
             'private_key': private_pem,
-            'public_key': public_pem
+            'public_key': public_pem,
+            'key_type': KEY_TYPE_RSA
+        }
+    
+    def _generate_x25519_key_pair(self):
+        private_key = x25519.X25519PrivateKey.generate()
+        return {
+            'private_key': private_key.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption()
+            ).decode('utf-8'),
+            'public_key': private_key.public_key().public_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PublicFormat.SubjectPublicKeyInfo
+            ).decode('utf-8'),
+            'key_type': KEY_TYPE_X25519
         }
     
+    def key_type_of(self, public_key: str):
+        """Return the key type of a PEM public key, or None if it is unusable."""
+        try:
+            key = self.public_keys.get(public_key)
+        except (ValueError, TypeError):
+            return None
+        if isinstance(key, x25519.X25519PublicKey):
+            return KEY_TYPE_X25519
+        if isinstance(key, rsa.RSAPublicKey) and key.key_size >= self.key_size:
+            return KEY_TYPE_RSA
+        return None
+    
+    def _x25519_kek(self, shared_secret: bytes, ephemeral: bytes, recipient: bytes) -> bytes:
+        return HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=_X25519_WRAP_INFO + ephemeral + recipient
+        ).derive(shared_secret)
+    
+    def _wrap_key(self, public_key, aes_key: bytes):
+        """Wrap an AES key for a parsed public key. Returns (wrapped, key format version)."""
+        if isinstance(public_key, rsa.RSAPublicKey):
+            return public_key.encrypt(aes_key, _OAEP_SHA256), KEY_FORMAT_RSA_OAEP
+        if isinstance(public_key, x25519.X25519PublicKey):
+            ephemeral = x25519.X25519PrivateKey.generate()
+            ephemeral_public = ephemeral.public_key().public_bytes_raw()
+            kek = self._x25519_kek(
+                ephemeral.exchange(public_key), ephemeral_public, public_key.public_bytes_raw()
+            )
+            nonce = os.urandom(12)
+            # wrapped = ephemeral public key (32) | nonce (12) | AES-GCM(key) + tag
+            return ephemeral_public + nonce + AESGCM(kek).encrypt(nonce, aes_key, ephemeral_public), KEY_FORMAT_X25519
+        raise ValueError(f"Unsupported public key type: {type(public_key).__name__}")
+    
+    def _unwrap_key(self, private_key, wrapped: bytes, version: int = None) -> bytes:
+        """Recover an AES key wrapped by _wrap_key, checking the key format version."""
+        if isinstance(private_key, rsa.RSAPrivateKey):
+            if version not in (None, KEY_FORMAT_RSA_OAEP):
+                raise ValueError(f"Key format v{version} cannot be opened with an RSA key")
+            return private_key.decrypt(wrapped, _OAEP_SHA256)
+        if isinstance(private_key, x25519.X25519PrivateKey):
+            if version not in (None, KEY_FORMAT_X25519):
+                raise ValueError(f"Key format v{version} cannot be opened with an X25519 key")
+            ephemeral_public, nonce, sealed = wrapped[:32], wrapped[32:44], wrapped[44:]
+            kek = self._x25519_kek(
+                private_key.exchange(x25519.X25519PublicKey.from_public_bytes(ephemeral_public)),
+                ephemeral_public,
+                private_key.public_key().public_bytes_raw()
+            )
+            return AESGCM(kek).decrypt(nonce, sealed, ephemeral_public)
+        raise ValueError(f"Unsupported private key type: {type(private_key).__name__}")
+    
     def encrypt_message(self, message: str, recipient_public_key: str) -> dict:
         """
         Encrypt a message for a recipient.
-        Uses hybrid encryption: AES-GCM for message, RSA for AES key.
+        Uses hybrid encryption: AES-GCM for message, the recipient's RSA or
+        X25519 key for the AES key.
         
         Returns dict with:
         - encrypted_content: Base64 encoded encrypted message
         - encrypted_key: Base64 encoded encrypted AES key
         - nonce: Base64 encoded nonce
+        - version: key format version (KEY_FORMAT_RSA_OAEP or KEY_FORMAT_X25519)
         """
         # Generate random AES key and nonce
         aes_key = AESGCM.generate_key(bit_length=256)
@@ -74,25 +273,15 @@ class EncryptionService:
             None  # No additional authenticated data
         )
         
-        # Encrypt AES key with recipient's RSA public key
-        public_key = serialization.load_pem_public_key(
-            recipient_public_key.encode('utf-8'),
-            backend=default_backend()
-        )
-        
-        encrypted_key = public_key.encrypt(
-            aes_key,
-            padding.OAEP(
-                mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None
-            )
-        )
+        # Wrap AES key for the recipient's public key
+        public_key = self.public_keys.get(recipient_public_key)
+        encrypted_key, version = self._wrap_key(public_key, aes_key)
         
         return {
             'encrypted_content': base64.b64encode(encrypted_content).decode('utf-8'),
             'encrypted_key': base64.b64encode(encrypted_key).decode('utf-8'),
-            'nonce': base64.b64encode(nonce).decode('utf-8')
+            'nonce': base64.b64encode(nonce).decode('utf-8'),
+            'version': version
         }
     
     def decrypt_message(
@@ -100,7 +289,8 @@ class EncryptionService:
         encrypted_content: str,
         encrypted_key: str,
         nonce: str,
-        private_key: str
+        private_key: str,
+        version: int = None
     ) -> str:
         """
         Decrypt a message using the recipient's private key.
@@ -109,7 +299,8 @@ class EncryptionService:
             encrypted_content: Base64 encoded encrypted message
             encrypted_key: Base64 encoded encrypted AES key
             nonce: Base64 encoded nonce
-            private_key: PEM encoded private key
+            private_key: PEM encoded private key (RSA or X25519)
+            version: Key format version from encrypt_message, if known
             
         Returns:
             Decrypted message string
@@ -119,21 +310,9 @@ class EncryptionService:
         encrypted_key_bytes = base64.b64decode(encrypted_key)
         nonce_bytes = base64.b64decode(nonce)
         
-        # Decrypt AES key with RSA private key
-        priv_key = serialization.load_pem_private_key(
-            private_key.encode('utf-8'),
-            password=None,
-            backend=default_backend()
-        )
-        
-        aes_key = priv_key.decrypt(
-            encrypted_key_bytes,
-            padding.OAEP(
-                mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None
-            )
-        )
+        # Unwrap AES key with the private key
+        priv_key = self.private_keys.get(private_key)
+        aes_key = self._unwrap_key(priv_key, encrypted_key_bytes, version)
         
         # Decrypt message with AES-GCM
         aesgcm = AESGCM(aes_key)
@@ -145,6 +324,181 @@ class EncryptionService:
         
         return decrypted_content.decode('utf-8')
     
+    def verify_public_keys(self, recipient_public_keys: dict) -> dict:
+        """
+        Check a batch of recipient public keys in one pass.
+        Returns {recipient_id: reason} for every key that cannot be used.
+        """
+        invalid = {}
+        for recipient_id, pem in recipient_public_keys.items():
+            if not pem:
+                invalid[recipient_id] = 'missing public key'
+                continue
+            try:
+                key = self.public_keys.get(pem)
+            except (ValueError, TypeError):
+                invalid[recipient_id] = 'malformed public key'
+                continue
+            if isinstance(key, x25519.X25519PublicKey):
+                continue
+            if not isinstance(key, rsa.RSAPublicKey):
+                invalid[recipient_id] = 'unsupported key type'
+            elif key.key_size < self.key_size:
+                invalid[recipient_id] = f'key shorter than {self.key_size} bits'
+        return invalid
+    
+    def encrypt_for_recipients(
+        self,
+        message: str,
+        recipient_public_keys: dict,
+        associated_data: str = None,
+        skip_invalid: bool = False
+    ) -> dict:
+        """
+        Encrypt a message once for many recipients (envelope encryption).
+        
+        The message is AES-GCM encrypted a single time; only the 32-byte
+        content key is wrapped per recipient (RSA or X25519, per their key),
+        so a group message costs one encryption plus N key wraps.
+        
+        Args:
+            message: Plaintext message
+            recipient_public_keys: {recipient_id: PEM public key}
+            associated_data: Optional context (e.g. conversation id) bound to the ciphertext
+            skip_invalid: Leave out recipients with unusable keys instead of raising
+            
+        Returns dict with:
+        - encrypted_content: Base64 encoded encrypted message
+        - nonce: Base64 encoded nonce
+        - encrypted_keys: {recipient_id: Base64 encoded wrapped AES key}
+        - invalid_recipients: {recipient_id: reason} (only with skip_invalid)
+        """
+        invalid = self.verify_public_keys(recipient_public_keys)
+        if invalid and not skip_invalid:
+            raise ValueError(f"Unusable public keys for recipients: {sorted(map(str, invalid))}")
+        
+        aes_key = AESGCM.generate_key(bit_length=256)
+        nonce = os.urandom(12)
+        aad = associated_data.encode('utf-8') if associated_data else None
+        encrypted_content = AESGCM(aes_key).encrypt(nonce, message.encode('utf-8'), aad)
+        
+        encrypted_keys = {
+            str(recipient_id): base64.b64encode(
+                self._wrap_key(self.public_keys.get(pem), aes_key)[0]
+            ).decode('utf-8')
+            for recipient_id, pem in recipient_public_keys.items()
+            if recipient_id not in invalid
+        }
+        
+        result = {
+            'encrypted_content': base64.b64encode(encrypted_content).decode('utf-8'),
+            'nonce': base64.b64encode(nonce).decode('utf-8'),
+            'encrypted_keys': encrypted_keys,
+        }
+        if skip_invalid:
+            result['invalid_recipients'] = {str(k): v for k, v in invalid.items()}
+        return result
+    
+    def decrypt_for_recipient(
+        self,
+        envelope: dict,
+        recipient_id,
+        private_key: str,
+        associated_data: str = None
+    ) -> str:
+        """
+        Decrypt an envelope produced by encrypt_for_recipients.
+        Raises KeyError if the envelope has no key for `recipient_id`.
+        """
+        encrypted_key = envelope['encrypted_keys'][str(recipient_id)]
+        aes_key = self._unwrap_key(
+            self.private_keys.get(private_key), base64.b64decode(encrypted_key)
+        )
+        aad = associated_data.encode('utf-8') if associated_data else None
+        decrypted = AESGCM(aes_key).decrypt(
+            base64.b64decode(envelope['nonce']),
+            base64.b64decode(envelope['encrypted_content']),
+            aad
+        )
+        return decrypted.decode('utf-8')
+    
+    @property
+    def batch_workers(self) -> int:
+        return _setting('ENCRYPTION_BATCH_WORKERS', None) or min(8, os.cpu_count() or 1)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.batch_workers,
+                        thread_name_prefix='encryption-batch'
+                    )
+        return self._executor
+    
+    def _run_batch(self, fn, items: list, max_workers: int = None) -> list:
+        """
+        Apply `fn` to every item on the thread pool (cryptography releases
+        the GIL inside its primitives). Results keep the input order; a
+        failing item yields an error entry instead of aborting the batch.
+        """
+        def run_one(item):
+            try:
+                return {'success': True, 'data': fn(item)}
+            except Exception as e:
+                return {'success': False, 'error': {'message': type(e).__name__}}
+        
+        def run_chunk(chunk):
+            return [run_one(item) for item in chunk]
+        
+        workers = max_workers or self.batch_workers
+        if workers <= 1 or len(items) <= 1:
+            return run_chunk(items)
+        
+        # A few chunks per worker balances load without per-item task overhead
+        chunk_size = max(1, -(-len(items) // (workers * 4)))
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        
+        if max_workers and max_workers != self.batch_workers:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='encryption-batch') as executor:
+                results = executor.map(run_chunk, chunks)
+                return [result for chunk in results for result in chunk]
+        
+        results = self._get_executor().map(run_chunk, chunks)
+        return [result for chunk in results for result in chunk]
+    
+    def encrypt_many(self, messages, recipient_public_key: str, max_workers: int = None) -> list:
+        """
+        Encrypt many messages for one recipient in parallel.
+        
+        Returns one entry per message, in order: {'success': True, 'data': <encrypt_message result>}
+        or {'success': False, 'error': {'message': ...}}.
+        """
+        return self._run_batch(
+            lambda message: self.encrypt_message(message, recipient_public_key),
+            list(messages),
+            max_workers
+        )
+    
+    def decrypt_many(self, payloads, private_key: str, max_workers: int = None) -> list:
+        """
+        Decrypt many encrypt_message payloads with one private key in parallel.
+        
+        Returns one entry per payload, in order: {'success': True, 'data': <plaintext>}
+        or {'success': False, 'error': {'message': ...}} (e.g. InvalidTag for a tampered item).
+        """
+        return self._run_batch(
+            lambda payload: self.decrypt_message(
+                payload['encrypted_content'],
+                payload['encrypted_key'],
+                payload['nonce'],
+                private_key,
+                payload.get('version')
+            ),
+            list(payloads),
+            max_workers
+        )
+    
     def encrypt_for_storage(self, data: str, storage_key: bytes = None) -> dict:
         """
         Encrypt data for secure storage (not E2E, just storage encryption).
@@ -207,9 +561,50 @@ class EncryptionService:
 encryption_service = EncryptionService()
 
 
-def generate_user_keys():
+def generate_user_keys(key_type: str = None):
     """Generate encryption keys for a new user."""
-    return encryption_service.generate_key_pair()
+    return encryption_service.generate_key_pair(key_type)
+
+
+def public_key_type(public_key: str):
+    """Return KEY_TYPE_RSA/KEY_TYPE_X25519 for a PEM public key, or None if unusable."""
+    return encryption_service.key_type_of(public_key)
+
+
+def encrypt_many(messages, recipient_public_key: str, max_workers: int = None) -> list:
+    """Encrypt a batch of messages for a recipient (results in input order)."""
+    return encryption_service.encrypt_many(messages, recipient_public_key, max_workers)
+
+
+def decrypt_many(payloads, private_key: str, max_workers: int = None) -> list:
+    """Decrypt a batch of messages (results in input order)."""
+    return encryption_service.decrypt_many(payloads, private_key, max_workers)
+
+
+def encrypt_for_users(message: str, users, associated_data: str = None) -> dict:
+    """
+    Encrypt a message for every user in `users` (e.g. conversation participants).
+    Users without a usable public key are skipped and listed in invalid_recipients.
+    """
+    return encryption_service.encrypt_for_recipients(
+        message,
+        {user.id: user.public_key for user in users},
+        associated_data=associated_data,
+        skip_invalid=True
+    )
+
+
+def get_key_pool_stats():
+    """Get key pool counters for this process."""
+    return encryption_service.key_pool.stats()
+
+
+def get_key_cache_stats():
+    """Get parsed-key cache counters for this process."""
+    return {
+        'public_keys': encryption_service.public_keys.stats(),
+        'private_keys': encryption_service.private_keys.stats(),
+    }
 
 
 def encrypt_message(message: str, recipient_public_key: str) -> dict:
@@ -221,12 +616,14 @@ def decrypt_message(
     encrypted_content: str,
     encrypted_key: str,
     nonce: str,
-    private_key: str
+    private_key: str,
+    version: int = None
 ) -> str:
     """Decrypt a message."""
     return encryption_service.decrypt_message(
         encrypted_content,
         encrypted_key,
         nonce,
-        private_key
+        private_key,
+        version
     )
@@ -0,0 +1,267 @@
+"""
+Async client for the Google Cloud REST APIs (Speech, TTS, Vision, NLP).
+
+Same operations, return values, deadlines and circuit breakers as
+GCPClientManager, awaited natively on the event loop: ASGI code (consumers,
+async views) can keep many calls in flight without a thread per call. Uses
+httpx with a pooled keep-alive client per event loop; cancelling the
+awaiting task aborts the request.
+
+Without httpx installed, calls fall back to the sync client in a worker
+thread, so callers do not need to care which is available.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .gcp_client import gcp_client, sentiment_cache
+from .http_pool import RETRY_STATUSES, retry_delay
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+
+class AsyncGCPClient:
+    """
+    Async transport over GCPClientManager: credentials, endpoints, payloads
+    and response parsing come from the sync manager.
+    """
+
+    def __init__(self, manager=None):
+        self.manager = manager or gcp_client
+        self.pool_size = getattr(settings, 'GCP_HTTP_POOL_SIZE', 10)
+        self.max_connections = getattr(settings, 'GCP_ASYNC_MAX_CONNECTIONS', 200)
+        self.connect_timeout = getattr(settings, 'GCP_HTTP_CONNECT_TIMEOUT', 3.05)
+        self.read_timeout = getattr(settings, 'GCP_HTTP_READ_TIMEOUT', 30.0)
+        self.max_retries = getattr(settings, 'GCP_HTTP_MAX_RETRIES', 2)
+        self.backoff = getattr(settings, 'GCP_HTTP_BACKOFF', 0.5)
+        # httpx clients are bound to the loop they were first used on
+        self._clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'retries': 0,
+            'timeouts': 0,
+            'connection_errors': 0,
+            'http_errors': 0,
+            'cancelled': 0,
+            'in_flight': 0,
+            'max_in_flight': 0,
+            'total_seconds': 0.0,
+        }
+
+    def _count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self._stats[key] += value
+            self._stats['max_in_flight'] = max(self._stats['max_in_flight'], self._stats['in_flight'])
+
+    def _client(self) -> 'httpx.AsyncClient':
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.pool_size,
+                ),
+            )
+            self._clients[loop] = client
+        return client
+
+    async def _post(self, service: str, url: str, payload: dict) -> 'httpx.Response':
+        """
+        POST with the same retry policy, deadline and circuit breaker as the
+        sync client (all calls are idempotent).
+        """
+        breaker = self.manager.breakers[service]
+        breaker.check()
+        try:
+            response = await self._post_with_retries(url, payload, self.manager.deadline_for(service))
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            self.manager.record_outcome(service)
+            raise
+        self.manager.record_outcome(service, response.status_code)
+        return response
+
+    async def _post_with_retries(self, url: str, payload: dict, deadline: float) -> 'httpx.Response':
+        client = self._client()
+        headers = {'X-Goog-Api-Key': self.manager._gcp_api_key}
+        expires = time.monotonic() + deadline if deadline else None
+        attempt = 0
+        while True:
+            connect, read = self.connect_timeout, self.read_timeout
+            if expires is not None:
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    raise httpx.TimeoutException(f'Deadline of {deadline}s exceeded')
+                connect, read = min(connect, remaining), min(read, remaining)
+            started = time.perf_counter()
+            self._count(in_flight=1)
+            try:
+                response = await client.post(url, json=payload, headers=headers,
+                                             timeout=httpx.Timeout(read, connect=connect))
+            except asyncio.CancelledError:
+                self._count(cancelled=1)
+                raise
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                timed_out = isinstance(e, httpx.TimeoutException)
+                self._count(requests=1, timeouts=int(timed_out), connection_errors=int(not timed_out),
+                            total_seconds=time.perf_counter() - started)
+                if attempt >= self.max_retries:
+                    raise
+                response = None
+            else:
+                self._count(requests=1, http_errors=int(response.status_code >= 400),
+                            total_seconds=time.perf_counter() - started)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+            finally:
+                self._count(in_flight=-1)
+            retry_after = response.headers.get('Retry-After') if response is not None else None
+            delay = retry_delay(attempt, self.backoff, retry_after)
+            if expires is not None and time.monotonic() + delay >= expires:
+                # No time left for another attempt
+                if response is not None:
+                    return response
+                raise httpx.TimeoutException(f'Deadline of {deadline}s exceeded')
+            await asyncio.sleep(delay)
+            attempt += 1
+            self._count(retries=1)
+
+    async def _call(self, service: str, url: str, payload: dict, parse, error_result: dict) -> dict:
+        try:
+            response = await self._post(service, url, payload)
+            return parse(response.status_code, response.json())
+        except Exception as e:
+            return {'error': str(e), **error_result, 'success': False}
+
+    async def speech_to_text(self, audio_content: bytes, language_code: str = 'en-US',
+                             encoding: str = 'LINEAR16', sample_rate: int = 16000) -> dict:
+        """Async GCPClientManager.speech_to_text."""
+        if not HTTPX_AVAILABLE:
+            return await sync_to_async(self.manager.speech_to_text, thread_sensitive=False)(
+                audio_content, language_code, encoding, sample_rate
+            )
+        self.manager._ensure_credentials()
+        if not self.manager._gcp_api_key:
+            return {'error': 'GCP API key not configured', 'transcript': ''}
+        return await self._call(
+            'speech',
+            self.manager.SPEECH_TO_TEXT_URL,
+            self.manager._speech_payload(audio_content, language_code, encoding, sample_rate),
+            self.manager._speech_result,
+            {'transcript': ''},
+        )
+
+    async def text_to_speech(self, text: str, language_code: str = 'en-US',
+                             voice_name: str = None, speaking_rate: float = 1.0) -> dict:
+        """Async GCPClientManager.text_to_speech."""
+        if not HTTPX_AVAILABLE:
+            return await sync_to_async(self.manager.text_to_speech, thread_sensitive=False)(
+                text, language_code, voice_name, speaking_rate
+            )
+        self.manager._ensure_credentials()
+        if not self.manager._gcp_api_key:
+            return {'error': 'GCP API key not configured', 'audio_content': None}
+        return await self._call(
+            'tts',
+            self.manager.TEXT_TO_SPEECH_URL,
+            self.manager._tts_payload(text, language_code, voice_name, speaking_rate),
+            self.manager._tts_result,
+            {'audio_content': None},
+        )
+
+    async def detect_faces(self, image_content: bytes) -> dict:
+        """Async GCPClientManager.detect_faces."""
+        if not HTTPX_AVAILABLE:
+            return await sync_to_async(self.manager.detect_faces, thread_sensitive=False)(image_content)
+        self.manager._ensure_credentials()
+        if not self.manager._gcp_api_key:
+            return {'error': 'GCP API key not configured', 'faces': []}
+        return await self._call(
+            'vision',
+            self.manager.VISION_URL,
+            self.manager._faces_payload(image_content),
+            self.manager._faces_result,
+            {'faces': []},
+        )
+
+    async def detect_faces_batch(self, images: list) -> list:
+        """Async GCPClientManager.detect_faces_batch."""
+        if not HTTPX_AVAILABLE:
+            return await sync_to_async(self.manager.detect_faces_batch, thread_sensitive=False)(images)
+        self.manager._ensure_credentials()
+        if not self.manager._gcp_api_key:
+            return [{'error': 'GCP API key not configured', 'faces': []} for _ in images]
+        if not images:
+            return []
+        try:
+            response = await self._post(
+                'vision', self.manager.VISION_URL, self.manager._faces_batch_payload(images)
+            )
+            return self.manager._faces_batch_result(response.status_code, response.json(), len(images))
+        except Exception as e:
+            return [{'error': str(e), 'faces': [], 'success': False} for _ in images]
+
+    async def analyze_sentiment_nlp(self, text: str) -> dict:
+        """Async GCPClientManager.analyze_sentiment_nlp."""
+        if not HTTPX_AVAILABLE:
+            return await sync_to_async(self.manager.analyze_sentiment_nlp, thread_sensitive=False)(text)
+        self.manager._ensure_credentials()
+        if not self.manager._gcp_api_key:
+            return {'error': 'GCP API key not configured'}
+        cache_key = self.manager._sentiment_cache_key(text)
+        cached = await sentiment_cache.aget(cache_key)
+        if cached is not None:
+            return cached
+        result = await self._call(
+            'nlp',
+            self.manager.NLP_URL,
+            self.manager._sentiment_payload(text),
+            self.manager._sentiment_result,
+            {},
+        )
+        if result.get('success'):
+            await sentiment_cache.aset(cache_key, result)
+        return result
+
+    async def aclose(self):
+        """Close the client for the running event loop."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def stats(self) -> dict:
+        with self._lock:
+            values = dict(self._stats)
+        total = values.pop('total_seconds')
+        values['avg_ms'] = round(total / values['requests'] * 1000, 1) if values['requests'] else None
+        values.update(
+            transport='httpx' if HTTPX_AVAILABLE else 'thread',
+            max_connections=self.max_connections,
+            keepalive_connections=self.pool_size,
+            event_loops=len(self._clients),
+        )
+        return values
+
+
+# Global instance
+async_gcp_client = AsyncGCPClient()
+
+
+def get_async_http_stats():
+    """Get request counters for the async Cloud API client."""
+    return async_gcp_client.stats()
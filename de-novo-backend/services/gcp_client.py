@@ -2,13 +2,37 @@
 Google Cloud Platform client manager.
 Centralizes GCP service initialization and configuration.
 Uses API keys for Cloud APIs (Speech, TTS, Vision, NLP).
+Calls go through pooled keep-alive sessions with timeouts and retries
+(see services/http_pool.py). Each service has a deadline and a circuit
+breaker (services/circuit_breaker.py). Natural Language results are cached
+by content (see services/result_cache.py).
 """
 
 import os
-import requests
 import base64
+import threading
+from urllib.parse import urlsplit
 from django.conf import settings
 
+from .circuit_breaker import CircuitBreaker
+from .http_pool import RETRY_STATUSES, HostSessionPool
+from .result_cache import ResultCache
+
+# Seconds a whole call may take, retries included (overridden by settings.GCP_DEADLINES)
+DEFAULT_DEADLINES = {
+    'speech': 30.0,
+    'tts': 10.0,
+    'vision': 10.0,
+    'nlp': 5.0,
+}
+
+# Sentiment results by text; shared by the sync and async clients
+sentiment_cache = ResultCache(
+    'gcp:nlp:sentiment',
+    max_size=getattr(settings, 'NLP_CACHE_SIZE', 2048),
+    ttl=getattr(settings, 'NLP_CACHE_TTL', 7 * 86400),
+)
+
 
 class GCPClientManager:
     """
@@ -23,10 +47,76 @@ class GCPClientManager:
     NLP_URL = "https://language.googleapis.com/v1/documents:analyzeSentiment"
     
     def __init__(self):
+        base_url = getattr(settings, 'GCP_API_BASE_URL', '')
+        if base_url:
+            # Same paths on another host, e.g. the local emulator (services/gcp_emulator.py)
+            for name in ('SPEECH_TO_TEXT_URL', 'TEXT_TO_SPEECH_URL', 'VISION_URL', 'NLP_URL'):
+                setattr(self, name, base_url.rstrip('/') + urlsplit(getattr(self, name)).path)
         self._initialized = False
         self._api_key = None
         self._gcp_api_key = None
         self._genai_model = None
+        self._http = None
+        self._http_lock = threading.Lock()
+        self.breakers = {
+            service: CircuitBreaker(
+                f'gcp-{service}',
+                failure_threshold=getattr(settings, 'GCP_BREAKER_FAILURES', 5),
+                reset_timeout=getattr(settings, 'GCP_BREAKER_RESET_SECONDS', 30.0),
+            )
+            for service in DEFAULT_DEADLINES
+        }
+    
+    @property
+    def http(self) -> HostSessionPool:
+        """Pooled sessions for the Cloud REST APIs, created on first use."""
+        if self._http is None:
+            with self._http_lock:
+                if self._http is None:
+                    self._http = HostSessionPool(
+                        pool_size=getattr(settings, 'GCP_HTTP_POOL_SIZE', 10),
+                        connect_timeout=getattr(settings, 'GCP_HTTP_CONNECT_TIMEOUT', 3.05),
+                        read_timeout=getattr(settings, 'GCP_HTTP_READ_TIMEOUT', 30.0),
+                        max_retries=getattr(settings, 'GCP_HTTP_MAX_RETRIES', 2),
+                        backoff=getattr(settings, 'GCP_HTTP_BACKOFF', 0.5),
+                        name='gcp',
+                    )
+        return self._http
+    
+    def deadline_for(self, service: str) -> float:
+        return getattr(settings, 'GCP_DEADLINES', {}).get(service, DEFAULT_DEADLINES[service])
+    
+    def record_outcome(self, service: str, status_code: int = None):
+        """Feed a call's outcome to the service breaker (None: no response)."""
+        breaker = self.breakers[service]
+        if status_code is None or status_code in RETRY_STATUSES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    
+    def _post(self, service: str, url: str, payload: dict):
+        """
+        POST a JSON request to a Cloud API. These calls have no side effects,
+        so they are safe to retry. The key goes in a header, not the URL,
+        so it never appears in error messages.
+        
+        Raises CircuitOpenError without calling out while the service's
+        breaker is open.
+        """
+        self.breakers[service].check()
+        try:
+            response = self.http.post(
+                url,
+                json=payload,
+                headers={'X-Goog-Api-Key': self._gcp_api_key},
+                idempotent=True,
+                deadline=self.deadline_for(service),
+            )
+        except Exception:
+            self.record_outcome(service)
+            raise
+        self.record_outcome(service, response.status_code)
+        return response
     
     def _ensure_credentials(self):
         """Ensure API keys are configured."""
@@ -42,25 +132,11 @@ class GCPClientManager:
         self._initialized = True
         return True
     
-    def speech_to_text(self, audio_content: bytes, language_code: str = 'en-US', 
-                       encoding: str = 'LINEAR16', sample_rate: int = 16000) -> dict:
-        """
-        Convert speech to text using Cloud Speech-to-Text API.
-        
-        Args:
-            audio_content: Audio bytes
-            language_code: Language code (e.g., 'en-US', 'bn-BD')
-            encoding: Audio encoding (LINEAR16, FLAC, MP3, etc.)
-            sample_rate: Sample rate in Hz
-            
-        Returns:
-            Dict with transcript and confidence
-        """
-        self._ensure_credentials()
-        
-        if not self._gcp_api_key:
-            return {'error': 'GCP API key not configured', 'transcript': ''}
-        
+    # Request payloads and response parsing are shared with the async client
+    # (services/gcp_async_client.py); only the transport differs.
+    
+    def _speech_payload(self, audio_content: bytes, language_code: str,
+                        encoding: str, sample_rate: int) -> dict:
         # Map encoding names
         encoding_map = {
             'LINEAR16': 'LINEAR16',
@@ -70,7 +146,7 @@ class GCPClientManager:
             'WEBM_OPUS': 'WEBM_OPUS',
         }
         
-        payload = {
+        return {
             'config': {
                 'encoding': encoding_map.get(encoding, 'LINEAR16'),
                 'sampleRateHertz': sample_rate,
@@ -81,26 +157,162 @@ class GCPClientManager:
                 'content': base64.b64encode(audio_content).decode('utf-8')
             }
         }
+    
+    def _speech_result(self, status_code: int, result: dict) -> dict:
+        if status_code == 200:
+            # One result per utterance; keep the best alternative of each
+            best = [r['alternatives'][0] for r in result.get('results', []) if r.get('alternatives')]
+            if best:
+                return {
+                    'transcript': ' '.join(
+                        alt.get('transcript', '').strip() for alt in best if alt.get('transcript', '').strip()
+                    ),
+                    'confidence': sum(alt.get('confidence', 0.0) for alt in best) / len(best),
+                    'success': True
+                }
+            return {'transcript': '', 'confidence': 0.0, 'success': True, 'message': 'No speech detected'}
+        return {'error': result, 'transcript': '', 'success': False}
+    
+    def _tts_payload(self, text: str, language_code: str, voice_name: str, speaking_rate: float) -> dict:
+        # Default voice based on language
+        if not voice_name:
+            voice_name = f"{language_code}-Neural2-D"
         
-        try:
-            response = requests.post(
-                f"{self.SPEECH_TO_TEXT_URL}?key={self._gcp_api_key}",
-                json=payload,
-                headers={'Content-Type': 'application/json'}
-            )
+        return {
+            'input': {'text': text},
+            'voice': {
+                'languageCode': language_code,
+                'name': voice_name,
+            },
+            'audioConfig': {
+                'audioEncoding': 'MP3',
+                'speakingRate': speaking_rate,
+            }
+        }
+    
+    def _tts_result(self, status_code: int, result: dict) -> dict:
+        if status_code == 200:
+            return {
+                'audio_content': result.get('audioContent'),
+                'success': True
+            }
+        return {'error': result, 'audio_content': None, 'success': False}
+    
+    def _faces_payload(self, image_content: bytes) -> dict:
+        return self._faces_batch_payload([image_content])
+    
+    def _faces_batch_payload(self, images: list) -> dict:
+        # One annotate request per image; the API answers them in order
+        return {
+            'requests': [{
+                'image': {
+                    'content': base64.b64encode(image_content).decode('utf-8')
+                },
+                'features': [{
+                    'type': 'FACE_DETECTION',
+                    'maxResults': 10
+                }]
+            } for image_content in images]
+        }
+    
+    def _face_annotations(self, response: dict) -> dict:
+        """Parse one entry of an annotate response (entries fail individually)."""
+        if 'error' in response:
+            return {'error': response['error'], 'faces': [], 'success': False}
+        
+        faces = []
+        for face in response.get('faceAnnotations', []):
+            faces.append({
+                'confidence': face.get('detectionConfidence', 0),
+                'joy': face.get('joyLikelihood', 'UNKNOWN'),
+                'sorrow': face.get('sorrowLikelihood', 'UNKNOWN'),
+                'anger': face.get('angerLikelihood', 'UNKNOWN'),
+                'surprise': face.get('surpriseLikelihood', 'UNKNOWN'),
+                'bounds': face.get('boundingPoly', {})
+            })
+        
+        return {
+            'faces': faces,
+            'face_count': len(faces),
+            'success': True
+        }
+    
+    def _faces_result(self, status_code: int, result: dict) -> dict:
+        return self._faces_batch_result(status_code, result, 1)[0]
+    
+    def _faces_batch_result(self, status_code: int, result: dict, count: int) -> list:
+        if status_code == 200:
+            responses = result.get('responses', [])
+            if len(responses) == count:
+                return [self._face_annotations(response) for response in responses]
+            result = f'Expected {count} annotate responses, got {len(responses)}'
+        return [{'error': result, 'faces': [], 'success': False} for _ in range(count)]
+    
+    def _sentiment_payload(self, text: str) -> dict:
+        return {
+            'document': {
+                'type': 'PLAIN_TEXT',
+                'content': text
+            },
+            'encodingType': 'UTF8'
+        }
+    
+    def _sentiment_cache_key(self, text: str) -> str:
+        # The API version (e.g. 'v1') is part of the key: a new version may score differently.
+        # Results from a non-Google host (an emulator) are kept apart from real ones.
+        url = urlsplit(self.NLP_URL)
+        version = url.path.strip('/').split('/')[0]
+        if url.netloc != urlsplit(type(self).NLP_URL).netloc:
+            version = f'{version}@{url.netloc}'
+        return sentiment_cache.make_key(version, text)
+    
+    def _sentiment_result(self, status_code: int, result: dict) -> dict:
+        if status_code == 200:
+            sentiment = result.get('documentSentiment', {})
+            
+            # Convert score to emotion
+            score = sentiment.get('score', 0)
+            magnitude = sentiment.get('magnitude', 0)
             
-            if response.status_code == 200:
-                result = response.json()
-                if 'results' in result and result['results']:
-                    best = result['results'][0]['alternatives'][0]
-                    return {
-                        'transcript': best.get('transcript', ''),
-                        'confidence': best.get('confidence', 0.0),
-                        'success': True
-                    }
-                return {'transcript': '', 'confidence': 0.0, 'success': True, 'message': 'No speech detected'}
+            if score >= 0.5:
+                emotion = 'positive'
+            elif score <= -0.5:
+                emotion = 'negative'
             else:
-                return {'error': response.json(), 'transcript': '', 'success': False}
+                emotion = 'neutral'
+            
+            return {
+                'score': score,
+                'magnitude': magnitude,
+                'emotion': emotion,
+                'success': True
+            }
+        return {'error': result, 'success': False}
+    
+    def speech_to_text(self, audio_content: bytes, language_code: str = 'en-US', 
+                       encoding: str = 'LINEAR16', sample_rate: int = 16000) -> dict:
+        """
+        Convert speech to text using Cloud Speech-to-Text API.
+        
+        Args:
+            audio_content: Audio bytes
+            language_code: Language code (e.g., 'en-US', 'bn-BD')
+            encoding: Audio encoding (LINEAR16, FLAC, MP3, etc.)
+            sample_rate: Sample rate in Hz
+            
+        Returns:
+            Dict with transcript and confidence
+        """
+        self._ensure_credentials()
+        
+        if not self._gcp_api_key:
+            return {'error': 'GCP API key not configured', 'transcript': ''}
+        
+        payload = self._speech_payload(audio_content, language_code, encoding, sample_rate)
+        
+        try:
+            response = self._post('speech', self.SPEECH_TO_TEXT_URL, payload)
+            return self._speech_result(response.status_code, response.json())
         except Exception as e:
             return {'error': str(e), 'transcript': '', 'success': False}
     
@@ -123,37 +335,11 @@ class GCPClientManager:
         if not self._gcp_api_key:
             return {'error': 'GCP API key not configured', 'audio_content': None}
         
-        # Default voice based on language
-        if not voice_name:
-            voice_name = f"{language_code}-Neural2-D"
-        
-        payload = {
-            'input': {'text': text},
-            'voice': {
-                'languageCode': language_code,
-                'name': voice_name,
-            },
-            'audioConfig': {
-                'audioEncoding': 'MP3',
-                'speakingRate': speaking_rate,
-            }
-        }
+        payload = self._tts_payload(text, language_code, voice_name, speaking_rate)
         
         try:
-            response = requests.post(
-                f"{self.TEXT_TO_SPEECH_URL}?key={self._gcp_api_key}",
-                json=payload,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return {
-                    'audio_content': result.get('audioContent'),
-                    'success': True
-                }
-            else:
-                return {'error': response.json(), 'audio_content': None, 'success': False}
+            response = self._post('tts', self.TEXT_TO_SPEECH_URL, payload)
+            return self._tts_result(response.status_code, response.json())
         except Exception as e:
             return {'error': str(e), 'audio_content': None, 'success': False}
     
@@ -172,51 +358,40 @@ class GCPClientManager:
         if not self._gcp_api_key:
             return {'error': 'GCP API key not configured', 'faces': []}
         
-        payload = {
-            'requests': [{
-                'image': {
-                    'content': base64.b64encode(image_content).decode('utf-8')
-                },
-                'features': [{
-                    'type': 'FACE_DETECTION',
-                    'maxResults': 10
-                }]
-            }]
-        }
+        payload = self._faces_payload(image_content)
         
         try:
-            response = requests.post(
-                f"{self.VISION_URL}?key={self._gcp_api_key}",
-                json=payload,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                responses = result.get('responses', [{}])
-                face_annotations = responses[0].get('faceAnnotations', [])
-                
-                faces = []
-                for face in face_annotations:
-                    faces.append({
-                        'confidence': face.get('detectionConfidence', 0),
-                        'joy': face.get('joyLikelihood', 'UNKNOWN'),
-                        'sorrow': face.get('sorrowLikelihood', 'UNKNOWN'),
-                        'anger': face.get('angerLikelihood', 'UNKNOWN'),
-                        'surprise': face.get('surpriseLikelihood', 'UNKNOWN'),
-                        'bounds': face.get('boundingPoly', {})
-                    })
-                
-                return {
-                    'faces': faces,
-                    'face_count': len(faces),
-                    'success': True
-                }
-            else:
-                return {'error': response.json(), 'faces': [], 'success': False}
+            response = self._post('vision', self.VISION_URL, payload)
+            return self._faces_result(response.status_code, response.json())
         except Exception as e:
             return {'error': str(e), 'faces': [], 'success': False}
     
+    def detect_faces_batch(self, images: list) -> list:
+        """
+        Detect faces in several images with one Cloud Vision request
+        (at most 16 images, about 10 MB of JSON, per request).
+        
+        Args:
+            images: List of image bytes
+            
+        Returns:
+            List of detect_faces() results, in the order of `images`
+        """
+        self._ensure_credentials()
+        
+        if not self._gcp_api_key:
+            return [{'error': 'GCP API key not configured', 'faces': []} for _ in images]
+        if not images:
+            return []
+        
+        payload = self._faces_batch_payload(images)
+        
+        try:
+            response = self._post('vision', self.VISION_URL, payload)
+            return self._faces_batch_result(response.status_code, response.json(), len(images))
+        except Exception as e:
+            return [{'error': str(e), 'faces': [], 'success': False} for _ in images]
+    
     def analyze_sentiment_nlp(self, text: str) -> dict:
         """
         Analyze sentiment using Cloud Natural Language API.
@@ -225,53 +400,29 @@ class GCPClientManager:
             text: Text to analyze
             
         Returns:
-            Dict with sentiment score and magnitude
+            Dict with sentiment score and magnitude (cached by text)
         """
         self._ensure_credentials()
         
         if not self._gcp_api_key:
             return {'error': 'GCP API key not configured'}
         
-        payload = {
-            'document': {
-                'type': 'PLAIN_TEXT',
-                'content': text
-            },
-            'encodingType': 'UTF8'
-        }
+        cache_key = self._sentiment_cache_key(text)
+        cached = sentiment_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        payload = self._sentiment_payload(text)
         
         try:
-            response = requests.post(
-                f"{self.NLP_URL}?key={self._gcp_api_key}",
-                json=payload,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                sentiment = result.get('documentSentiment', {})
-                
-                # Convert score to emotion
-                score = sentiment.get('score', 0)
-                magnitude = sentiment.get('magnitude', 0)
-                
-                if score >= 0.5:
-                    emotion = 'positive'
-                elif score <= -0.5:
-                    emotion = 'negative'
-                else:
-                    emotion = 'neutral'
-                
-                return {
-                    'score': score,
-                    'magnitude': magnitude,
-                    'emotion': emotion,
-                    'success': True
-                }
-            else:
-                return {'error': response.json(), 'success': False}
+            response = self._post('nlp', self.NLP_URL, payload)
+            result = self._sentiment_result(response.status_code, response.json())
         except Exception as e:
             return {'error': str(e), 'success': False}
+        
+        if result.get('success'):
+            sentiment_cache.set(cache_key, result)
+        return result
     
     def get_genai_model(self, model_name: str = None):
         """
@@ -291,7 +442,7 @@ class GCPClientManager:
         
         try:
             import google.generativeai as genai
-            genai.configure(api_key=self._api_key)
+            genai.configure(api_key=self._api_key, **genai_options())
             
             model_name = model_name or 'gemini-1.5-flash'
             return genai.GenerativeModel(model_name)
@@ -336,6 +487,21 @@ class GCPClientManager:
             'gcp_api_key_configured': self._gcp_api_key is not None,
             'gemini_api_key_configured': self._api_key is not None,
         }
+    
+    def get_breaker_states(self) -> dict:
+        """Circuit breaker state and counters per Cloud API."""
+        return {service: breaker.stats() for service, breaker in self.breakers.items()}
+
+
+def genai_options() -> dict:
+    """
+    Extra genai.configure() arguments. With GEMINI_API_BASE_URL set, Gemini
+    calls go over REST to that endpoint (e.g. the local emulator).
+    """
+    base_url = getattr(settings, 'GEMINI_API_BASE_URL', '')
+    if not base_url:
+        return {}
+    return {'transport': 'rest', 'client_options': {'api_endpoint': base_url.rstrip('/')}}
 
 
 # Global instance
@@ -350,3 +516,20 @@ def get_service_status():
 def get_genai_model(model_name: str = None):
     """Get Generative AI model."""
     return gcp_client.get_genai_model(model_name)
+
+
+def get_breaker_states():
+    """Get circuit breaker state for each Cloud API."""
+    return gcp_client.get_breaker_states()
+
+
+def get_http_stats():
+    """Get connection pool and retry counters for the Cloud API sessions."""
+    return gcp_client.http.stats()
+
+
+def get_cache_stats():
+    """Get hit/miss counters for the Cloud API result caches."""
+    return {
+        'nlp_sentiment': sentiment_cache.stats(),
+    }
@@ -0,0 +1,334 @@
+"""
+Local stand-in for the Google Cloud REST APIs used by GCPClientManager
+(Speech-to-Text, Text-to-Speech, Vision, Natural Language) and for Gemini
+generateContent.
+
+Responses are deterministic functions of the request content, so runs are
+repeatable and results can be cached like real ones. Latency, error rate
+and per-service rate limits are configurable, so the message pipeline can be
+load-tested offline. Point the app at it with GCP_API_BASE_URL and
+GEMINI_API_BASE_URL (see `manage.py run_gcp_emulator`).
+
+Latency specs (milliseconds):
+    fixed:50            always 50
+    uniform:20,200      uniform between 20 and 200
+    normal:80,20        mean 80, standard deviation 20 (floored at 0)
+    lognormal:80,0.5    median 80, sigma 0.5 (long tail, like real APIs)
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SERVICES = ('speech', 'tts', 'vision', 'nlp', 'gemini')
+
+ROUTES = [
+    ('speech', re.compile(r'^/v1/speech:recognize$')),
+    ('tts', re.compile(r'^/v1/text:synthesize$')),
+    ('vision', re.compile(r'^/v1/images:annotate$')),
+    ('nlp', re.compile(r'^/v1/documents:analyzeSentiment$')),
+    ('gemini', re.compile(r'^/v1(?:beta)?/models/[\w.-]+:generateContent$')),
+]
+
+POSITIVE_WORDS = frozenset({
+    'good', 'great', 'love', 'happy', 'thanks', 'thank', 'awesome', 'nice', 'lovely',
+    'excellent', 'glad', 'wonderful', 'yes', 'cool', 'haha', 'lol', 'best', 'fun',
+})
+NEGATIVE_WORDS = frozenset({
+    'bad', 'sad', 'hate', 'angry', 'sorry', 'terrible', 'awful', 'no', 'worst',
+    'upset', 'tired', 'sick', 'hurt', 'annoyed', 'boring', 'never', 'cry', 'scared',
+})
+TRANSCRIPT_WORDS = [
+    'hello', 'how', 'are', 'you', 'today', 'i', 'am', 'on', 'my', 'way', 'see',
+    'you', 'soon', 'thanks', 'for', 'the', 'message', 'call', 'me', 'later',
+]
+LIKELIHOODS = ['VERY_UNLIKELY', 'UNLIKELY', 'POSSIBLE', 'LIKELY', 'VERY_LIKELY']
+
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz, ~26 ms)
+MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + bytes(413)
+CHARS_PER_SECOND = 15
+
+
+def parse_latency(spec: str):
+    """Parse a latency spec into a sampler returning seconds."""
+    kind, _, params = spec.partition(':')
+    values = [float(v) for v in params.split(',')] if params else []
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == 'normal' and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1])) / 1000
+    if kind == 'lognormal' and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1]) / 1000
+    raise ValueError(f'Invalid latency spec {spec!r}')
+
+
+def _digest(data) -> int:
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return int.from_bytes(hashlib.sha256(data).digest()[:8], 'big')
+
+
+# ── Deterministic responses ──────────────────────────────────────────────────
+
+def recognize(body: dict) -> dict:
+    audio = base64.b64decode(body.get('audio', {}).get('content', '') or b'', validate=True)
+    if not audio:
+        return {}
+    seed = _digest(audio)
+    rng = random.Random(seed)
+    words = [rng.choice(TRANSCRIPT_WORDS) for _ in range(3 + seed % 8)]
+    # Like the real API, one result per utterance (here, every four words)
+    return {'results': [{'alternatives': [{
+        'transcript': ' '.join(words[start:start + 4]),
+        'confidence': round(0.8 + (seed % 20) / 100, 2),
+    }]} for start in range(0, len(words), 4)]}
+
+
+def synthesize(body: dict) -> dict:
+    text = body.get('input', {}).get('text', '')
+    rate = float(body.get('audioConfig', {}).get('speakingRate', 1.0) or 1.0)
+    seconds = max(0.5, len(text) / CHARS_PER_SECOND / rate)
+    frames = int(seconds / 0.026)
+    return {'audioContent': base64.b64encode(MP3_FRAME * frames).decode('ascii')}
+
+
+def annotate(body: dict) -> dict:
+    responses = []
+    for request in body.get('requests', []):
+        image = base64.b64decode(request.get('image', {}).get('content', '') or b'', validate=True)
+        seed = _digest(image)
+        rng = random.Random(seed)
+        faces = []
+        for _ in range(seed % 3):  # 0-2 faces per image
+            x, y = rng.randint(0, 400), rng.randint(0, 300)
+            faces.append({
+                'detectionConfidence': round(rng.uniform(0.6, 0.99), 3),
+                'joyLikelihood': rng.choice(LIKELIHOODS),
+                'sorrowLikelihood': rng.choice(LIKELIHOODS),
+                'angerLikelihood': rng.choice(LIKELIHOODS),
+                'surpriseLikelihood': rng.choice(LIKELIHOODS),
+                'boundingPoly': {'vertices': [
+                    {'x': x, 'y': y}, {'x': x + 120, 'y': y},
+                    {'x': x + 120, 'y': y + 140}, {'x': x, 'y': y + 140},
+                ]},
+            })
+        responses.append({'faceAnnotations': faces} if faces else {})
+    return {'responses': responses}
+
+
+def sentiment_of(text: str) -> dict:
+    words = re.findall(r"[a-z']+", text.lower())
+    positive = sum(word in POSITIVE_WORDS for word in words)
+    negative = sum(word in NEGATIVE_WORDS for word in words)
+    total = positive + negative
+    score = round((positive - negative) / total, 2) if total else 0.0
+    return {'score': score, 'magnitude': round(0.4 * total, 2)}
+
+
+def analyze_sentiment(body: dict) -> dict:
+    text = body.get('document', {}).get('content', '')
+    return {'documentSentiment': sentiment_of(text), 'language': 'en'}
+
+
+def generate_content(body: dict) -> dict:
+    prompt = ' '.join(
+        part.get('text', '')
+        for content in body.get('contents', [])
+        for part in content.get('parts', [])
+    )
+    if 'Analyze the sentiment' in prompt:
+        # The sentiment prompt quotes the message last; answer in the JSON it asks for
+        message = prompt.rsplit('Message:', 1)[-1].strip().strip('"')
+        result = sentiment_of(message)
+        label = 'positive' if result['score'] > 0 else 'negative' if result['score'] < 0 else 'neutral'
+        text = json.dumps({
+            'sentiment': label,
+            'confidence': 0.8,
+            'emotions': [label],
+            'summary': f'The message reads as {label}.',
+        })
+    else:
+        text = f'(emulated reply #{_digest(prompt) % 1000}) I can help with that.'
+    return {
+        'candidates': [{
+            'content': {'parts': [{'text': text}], 'role': 'model'},
+            'finishReason': 'STOP',
+            'index': 0,
+        }],
+        'usageMetadata': {'promptTokenCount': len(prompt.split()), 'candidatesTokenCount': len(text.split())},
+    }
+
+
+HANDLERS = {
+    'speech': recognize,
+    'tts': synthesize,
+    'vision': annotate,
+    'nlp': analyze_sentiment,
+    'gemini': generate_content,
+}
+
+
+# ── Server ───────────────────────────────────────────────────────────────────
+
+class TokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        # Room for at least one request, or rates below 1/s would never admit any
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class EmulatorState:
+    """Configuration, seeded randomness and counters shared by request threads."""
+
+    def __init__(self, latency: dict, error_rate: dict, rate_limit: dict, seed: int = 1):
+        self.latency = latency        # service -> sampler
+        self.error_rate = error_rate  # service -> probability of a 503
+        self.buckets = {service: TokenBucket(rate) for service, rate in rate_limit.items() if rate > 0}
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {service: {'requests': 0, 'errors': 0, 'rate_limited': 0} for service in SERVICES}
+
+    def admit(self, service: str):
+        """Decide the fate of one request: (status or None, delay seconds)."""
+        with self.lock:
+            self.counters[service]['requests'] += 1
+            bucket = self.buckets.get(service)
+            if bucket is not None and not bucket.take():
+                self.counters[service]['rate_limited'] += 1
+                return 429, 0.0
+            delay = self.latency[service](self.rng)
+            if self.rng.random() < self.error_rate.get(service, 0.0):
+                self.counters[service]['errors'] += 1
+                return 503, delay
+            return None, delay
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {service: dict(values) for service, values in self.counters.items()}
+
+
+ERROR_STATUS = {403: 'PERMISSION_DENIED', 404: 'NOT_FOUND', 400: 'INVALID_ARGUMENT',
+                429: 'RESOURCE_EXHAUSTED', 503: 'UNAVAILABLE'}
+
+
+class EmulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'GCPEmulator/1.0'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str, headers: dict = None):
+        self._send(status, {'error': {'code': status, 'message': message, 'status': ERROR_STATUS[status]}}, headers)
+
+    def do_GET(self):
+        if self.path == '/healthz':
+            self._send(200, {'ok': True})
+        elif self.path == '/stats':
+            self._send(200, self.server.state.stats())
+        else:
+            self._error(404, f'Unknown path {self.path}')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length)
+        path = self.path.split('?', 1)[0]
+        service = next((name for name, pattern in ROUTES if pattern.match(path)), None)
+        if service is None:
+            self._error(404, f'Unknown path {path}')
+            return
+        if not (self.headers.get('X-Goog-Api-Key') or 'key=' in self.path):
+            self._error(403, 'Method doesn\'t allow unregistered callers (API key missing).')
+            return
+        try:
+            body = json.loads(raw or b'{}')
+        except ValueError:
+            self._error(400, 'Invalid JSON payload received.')
+            return
+
+        status, delay = self.server.state.admit(service)
+        if delay:
+            time.sleep(delay)
+        if status == 429:
+            self._error(429, 'Quota exceeded (emulated rate limit).', {'Retry-After': '1'})
+        elif status == 503:
+            self._error(503, 'The service is currently unavailable (emulated).')
+        else:
+            try:
+                response = HANDLERS[service](body)
+            except (binascii.Error, TypeError, AttributeError):
+                self._error(400, 'Invalid value in request payload (bad base64 content or field type).')
+                return
+            self._send(200, response)
+
+
+class EmulatorServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # Load tests open many connections at once
+
+    def __init__(self, address, state: EmulatorState):
+        super().__init__(address, EmulatorHandler)
+        self.state = state
+
+
+def make_state(latency: str = 'fixed:0', service_latency: dict = None, error_rate: float = 0.0,
+               service_error_rate: dict = None, rate_limit: float = 0.0,
+               service_rate_limit: dict = None, seed: int = 1) -> EmulatorState:
+    """Build emulator state from defaults plus per-service overrides."""
+    default_sampler = parse_latency(latency)
+    samplers = {service: default_sampler for service in SERVICES}
+    for service, spec in (service_latency or {}).items():
+        samplers[service] = parse_latency(spec)
+    errors = {service: error_rate for service in SERVICES}
+    errors.update(service_error_rate or {})
+    limits = {service: rate_limit for service in SERVICES}
+    limits.update(service_rate_limit or {})
+    return EmulatorState(samplers, errors, limits, seed=seed)
+
+
+def start_emulator(host: str = '127.0.0.1', port: int = 0, **options) -> EmulatorServer:
+    """Start an emulator in a background thread (port 0 picks a free port)."""
+    server = EmulatorServer((host, port), make_state(**options))
+    threading.Thread(target=server.serve_forever, name='gcp-emulator', daemon=True).start()
+    return server
+
+
+def run_emulator(host: str = '127.0.0.1', port: int = 8085, **options):
+    """Run an emulator in the current process until interrupted."""
+    server = EmulatorServer((host, port), make_state(**options))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
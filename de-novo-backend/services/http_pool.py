@@ -0,0 +1,205 @@
+"""
+Pooled, keep-alive HTTP sessions for outbound API calls.
+
+One requests.Session per API host, each with a bounded urllib3 connection
+pool, so repeat calls reuse an open TCP/TLS connection instead of paying a
+new handshake. Every request has connect and read timeouts. Idempotent calls
+are retried on connection errors, timeouts and 429/5xx responses with
+jittered exponential backoff.
+"""
+
+import os
+import random
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_BACKOFF = 8.0  # Seconds; also caps honoured Retry-After values
+
+_pools = weakref.WeakSet()
+
+
+def retry_delay(attempt: int, backoff: float, retry_after: str = None) -> float:
+    """Seconds to wait before retry `attempt` (0-based)."""
+    if retry_after and retry_after.isdigit():
+        return min(MAX_BACKOFF, float(retry_after))
+    # Full jitter: spreads retries from many workers hitting the same outage
+    return random.uniform(0, min(MAX_BACKOFF, backoff * (2 ** attempt)))
+
+
+class HostSessionPool:
+    """
+    Shared sessions keyed by scheme://host, with retry policy and counters.
+    Sessions are thread-safe for concurrent requests; the per-host
+    connection pool holds at most `pool_size` idle connections.
+    """
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 3.05,
+                 read_timeout: float = 30.0, max_retries: int = 2,
+                 backoff: float = 0.5, name: str = 'http'):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.name = name
+        self._sessions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        _pools.add(self)
+
+    def _host(self, url: str) -> str:
+        parts = urlsplit(url)
+        return f'{parts.scheme}://{parts.netloc}'
+
+    def session_for(self, url: str) -> requests.Session:
+        host = self._host(url)
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = requests.Session()
+                    # Retries are handled in request() so they can be counted and jittered
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                                          max_retries=0, pool_block=False)
+                    session.mount(host, adapter)
+                    self._sessions[host] = session
+                    self._stats.setdefault(host, self._empty_stats())
+        return session
+
+    def _empty_stats(self) -> dict:
+        return {
+            'requests': 0,
+            'retries': 0,
+            'timeouts': 0,
+            'connection_errors': 0,
+            'http_errors': 0,
+            'total_seconds': 0.0,
+        }
+
+    def _count(self, host: str, **increments):
+        with self._lock:
+            stats = self._stats.setdefault(host, self._empty_stats())
+            for key, value in increments.items():
+                stats[key] += value
+
+    def _delay(self, attempt: int, response=None) -> float:
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        return retry_delay(attempt, self.backoff, retry_after)
+
+    def request(self, method: str, url: str, idempotent: bool = True,
+                read_timeout: float = None, deadline: float = None, **kwargs) -> requests.Response:
+        """
+        Send a request on the host's pooled session.
+
+        Idempotent requests are retried up to `max_retries` times. Others are
+        only retried when the connection could not be opened (nothing was sent).
+        `deadline` caps the whole call, retries included, in seconds.
+        Raises requests exceptions once retries are exhausted; retryable
+        status responses are returned as-is after the final attempt.
+        """
+        host = self._host(url)
+        session = self.session_for(url)
+        read_timeout = read_timeout or self.read_timeout
+        expires = time.monotonic() + deadline if deadline else None
+        attempt = 0
+        while True:
+            connect, read = self.connect_timeout, read_timeout
+            if expires is not None:
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    raise requests.exceptions.Timeout(f'Deadline of {deadline}s exceeded for {host}')
+                connect, read = min(connect, remaining), min(read, remaining)
+            kwargs['timeout'] = (connect, read)
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                timed_out = isinstance(e, requests.exceptions.Timeout)
+                self._count(host, requests=1, timeouts=int(timed_out), connection_errors=int(not timed_out),
+                            total_seconds=time.perf_counter() - started)
+                # A connect timeout means nothing was sent, so any request may be retried
+                retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                response = None
+            else:
+                self._count(host, requests=1, http_errors=int(response.status_code >= 400),
+                            total_seconds=time.perf_counter() - started)
+                if not (idempotent and response.status_code in RETRY_STATUSES) or attempt >= self.max_retries:
+                    return response
+            delay = self._delay(attempt, response)
+            if expires is not None and time.monotonic() + delay >= expires:
+                # No time left for another attempt
+                if response is not None:
+                    return response
+                raise requests.exceptions.Timeout(f'Deadline of {deadline}s exceeded for {host}')
+            if response is not None:
+                response.close()  # Release the connection back to the pool
+            time.sleep(delay)
+            attempt += 1
+            self._count(host, retries=1)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def _connection_stats(self, session) -> dict:
+        opened = sent = 0
+        for adapter in session.adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    sent += pool.num_requests
+        return {'connections_opened': opened, 'requests_sent': sent}
+
+    def stats(self) -> dict:
+        """Per-host counters, including how often a pooled connection was reused."""
+        with self._lock:
+            hosts = {host: dict(values) for host, values in self._stats.items()}
+            sessions = dict(self._sessions)
+        for host, values in hosts.items():
+            if host in sessions:
+                values.update(self._connection_stats(sessions[host]))
+            else:
+                values.update(connections_opened=0, requests_sent=0)
+            sent = values['requests_sent']
+            values['connections_reused'] = max(0, sent - values['connections_opened'])
+            values['reuse_rate'] = round(values['connections_reused'] / sent, 4) if sent else None
+            total = values.pop('total_seconds')
+            values['avg_ms'] = round(total / values['requests'] * 1000, 1) if values['requests'] else None
+        return {
+            'name': self.name,
+            'pool_size': self.pool_size,
+            'connect_timeout': self.connect_timeout,
+            'read_timeout': self.read_timeout,
+            'max_retries': self.max_retries,
+            'hosts': hosts,
+        }
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+    def _after_fork(self):
+        # Sockets inherited from the parent must not be shared; start fresh
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+
+def _reset_pools_after_fork():
+    for pool in list(_pools):
+        pool._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
@@ -0,0 +1,159 @@
+"""
+Background pool of pre-generated key pairs.
+
+RSA-2048 generation costs ~50-150 ms of CPU. The pool keeps a bounded
+stock of fresh key pairs, refilled by a daemon thread (cryptography
+releases the GIL while generating, so the refill does not stall request
+threads). `take()` pops a pair in O(1) and falls back to generating inline
+when the pool is empty.
+
+Every pair is handed out at most once. After a fork the child discards
+the inherited stock, so two processes can never issue the same key.
+"""
+
+import collections
+import logging
+import os
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+_pools = weakref.WeakSet()
+
+
+class KeyPool:
+    """
+    Bounded stock of key pairs produced by `generate()`.
+    The refill thread starts on first use.
+    """
+
+    def __init__(self, generate, size: int = 8, low_water: int = None, name: str = 'keys'):
+        self._generate = generate
+        self.size = max(0, size)
+        # Refill starts once the stock drops to low_water (default: half)
+        self.low_water = self.size // 2 if low_water is None else min(low_water, self.size)
+        self.name = name
+
+        self._keys = collections.deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+        self._stopped = False
+        self._pid = os.getpid()
+        self._reset_stats()
+        _pools.add(self)
+
+    def _reset_stats(self):
+        self.generated = 0
+        self.served_from_pool = 0
+        self.inline_fallbacks = 0
+        self.refill_errors = 0
+        self.refill_seconds = 0.0
+        self.last_refill_at = None
+
+    def take(self) -> dict:
+        """Return a fresh key pair, from the pool if one is ready."""
+        if self.size == 0:
+            return self._generate()
+
+        self._ensure_worker()
+        try:
+            keys = self._keys.popleft()
+        except IndexError:
+            keys = None
+
+        with self._lock:
+            if keys is None:
+                self.inline_fallbacks += 1
+            else:
+                self.served_from_pool += 1
+        if len(self._keys) <= self.low_water:
+            self._wakeup.set()
+
+        return keys if keys is not None else self._generate()
+
+    def fill(self, count: int = None):
+        """Generate keys in the calling thread until the pool is full (or `count` added)."""
+        target = self.size if count is None else min(self.size, len(self._keys) + count)
+        while len(self._keys) < target and not self._stopped:
+            started = time.perf_counter()
+            try:
+                keys = self._generate()
+            except Exception as e:
+                with self._lock:
+                    self.refill_errors += 1
+                logger.error(f"Key pool '{self.name}' refill failed: {type(e).__name__}")
+                return
+            elapsed = time.perf_counter() - started
+            if os.getpid() != self._pid:
+                return  # Forked mid-generation; the child starts over
+            self._keys.append(keys)
+            with self._lock:
+                self.generated += 1
+                self.refill_seconds += elapsed
+                self.last_refill_at = time.time()
+
+    def start(self):
+        """Start the refill thread (idempotent)."""
+        self._ensure_worker()
+
+    def stop(self):
+        """Stop refilling and drop the stock."""
+        self._stopped = True
+        self._wakeup.set()
+        self._keys.clear()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._stopped or (self._worker is not None and self._worker.is_alive()):
+                return
+            self._worker = threading.Thread(
+                target=self._run, name=f'key-pool-{self.name}', daemon=True
+            )
+            self._worker.start()
+
+    def _run(self):
+        while not self._stopped:
+            self.fill()
+            self._wakeup.wait(timeout=30)
+            self._wakeup.clear()
+
+    def _after_fork(self):
+        # Keys generated in the parent may also be served there: never reuse them
+        self._keys.clear()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+        self._pid = os.getpid()
+        self._reset_stats()
+
+    def stats(self) -> dict:
+        """Return pool counters."""
+        with self._lock:
+            served = self.served_from_pool + self.inline_fallbacks
+            return {
+                'name': self.name,
+                'size': self.size,
+                'available': len(self._keys),
+                'generated': self.generated,
+                'served_from_pool': self.served_from_pool,
+                'inline_fallbacks': self.inline_fallbacks,
+                'hit_rate': round(self.served_from_pool / served, 4) if served else None,
+                'refill_errors': self.refill_errors,
+                'avg_generate_ms': round(self.refill_seconds / self.generated * 1000, 2) if self.generated else None,
+                'last_refill_at': self.last_refill_at,
+                'worker_alive': self._worker is not None and self._worker.is_alive(),
+            }
+
+
+def _reset_pools_after_fork():
+    for pool in list(_pools):
+        pool._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
@@ -0,0 +1,157 @@
+"""
+Content-addressed cache for Cloud API results.
+
+Entries are keyed by a SHA-256 of the normalized request text plus the API
+version, so a phrase like "ok" or "thanks" is sent to Google once no matter
+how many users type it. A bounded in-process LRU sits in front of the Django
+cache (settings.CACHES; 'redis' or 'file' keeps results across restarts and
+shares them between workers). Entries expire after `ttl` seconds in both
+layers. Only successful results should be stored.
+"""
+
+import collections
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form for cache keys: NFC, trimmed, runs of whitespace collapsed."""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+class ResultCache:
+    """
+    Two-level cache of JSON-serializable results: a local LRU of at most
+    `max_size` entries over the shared Django cache. A ttl of 0 disables it.
+    """
+
+    def __init__(self, namespace: str, max_size: int = 2048, ttl: int = 86400):
+        self.namespace = namespace
+        self.max_size = max_size
+        self.ttl = ttl
+        self._local = collections.OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'store_hits': 0, 'misses': 0, 'store_errors': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def make_key(self, version: str, text: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+        return f'{self.namespace}:{version}:{digest}'
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_local(self, key: str):
+        """Cached result from this process's LRU only (no I/O), or None."""
+        if not self.enabled:
+            return None
+        return self._local_get(key)
+
+    def _local_get(self, key: str):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            self._stats['local_hits'] += 1
+            return dict(entry[0])
+
+    def _local_put(self, key: str, value: dict, expires_at: float):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._local[key] = (value, expires_at)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+
+    def _from_store(self, key: str, entry):
+        if entry is None or entry['expires_at'] <= time.time():
+            self._count('misses')
+            return None
+        self._count('store_hits')
+        self._local_put(key, entry['value'], entry['expires_at'])
+        return dict(entry['value'])
+
+    def _entry(self, value: dict) -> dict:
+        return {'value': dict(value), 'expires_at': time.time() + self.ttl}
+
+    def get(self, key: str):
+        """Cached result for `key`, or None."""
+        if not self.enabled:
+            return None
+        value = self._local_get(key)
+        if value is not None:
+            return value
+        try:
+            entry = cache.get(key)
+        except Exception as e:  # The store is an optimization; never fail the call
+            logger.warning('Result cache read failed: %s', e)
+            self._count('store_errors')
+            entry = None
+        return self._from_store(key, entry)
+
+    def set(self, key: str, value: dict):
+        if not self.enabled:
+            return
+        entry = self._entry(value)
+        self._local_put(key, entry['value'], entry['expires_at'])
+        try:
+            cache.set(key, entry, self.ttl)
+        except Exception as e:
+            logger.warning('Result cache write failed: %s', e)
+            self._count('store_errors')
+
+    async def aget(self, key: str):
+        """get() for async callers; local hits do not leave the event loop."""
+        if not self.enabled:
+            return None
+        value = self._local_get(key)
+        if value is not None:
+            return value
+        try:
+            entry = await cache.aget(key)
+        except Exception as e:
+            logger.warning('Result cache read failed: %s', e)
+            self._count('store_errors')
+            entry = None
+        return self._from_store(key, entry)
+
+    async def aset(self, key: str, value: dict):
+        if not self.enabled:
+            return
+        entry = self._entry(value)
+        self._local_put(key, entry['value'], entry['expires_at'])
+        try:
+            await cache.aset(key, entry, self.ttl)
+        except Exception as e:
+            logger.warning('Result cache write failed: %s', e)
+            self._count('store_errors')
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            values = dict(self._stats)
+            values['local_entries'] = len(self._local)
+        values['hits'] = values['local_hits'] + values['store_hits']
+        lookups = values['hits'] + values['misses']
+        values['hit_rate'] = round(values['hits'] / lookups, 4) if lookups else None
+        values.update(max_size=self.max_size, ttl=self.ttl)
+        return values
@@ -0,0 +1,200 @@
+"""
+Micro-batching for Cloud NLP sentiment calls.
+
+Requests arriving within `max_wait_ms` of each other (up to `max_batch`) are
+collected into one batch. The v1 analyzeSentiment API takes a single
+document per call, so a batch is sent as a concurrent burst with at most
+`max_concurrency` requests in flight overall. A text already in flight or
+repeated within the batch is sent once, and the result is handed back to
+every caller waiting on it.
+
+The batcher runs its own event loop in a daemon thread, shared by sync
+callers (WSGI views, worker threads) and async callers (consumers), so
+requests from both are coalesced. Results in this process's cache LRU are
+returned without waiting for a batch.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import weakref
+
+from django.conf import settings
+
+from .gcp_async_client import async_gcp_client
+from .gcp_client import gcp_client, sentiment_cache
+
+_batchers = weakref.WeakSet()
+
+
+class SentimentBatcher:
+    """Coalesces concurrent analyze_sentiment_nlp calls into bounded bursts."""
+
+    def __init__(self, client=None, max_batch: int = 32, max_wait_ms: float = 5,
+                 max_concurrency: int = 32):
+        self.client = client or async_gcp_client
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrency = max_concurrency
+        self._loop = None
+        self._queue = None
+        self._semaphore = None
+        self._in_flight = {}  # cache key -> futures waiting on that call (loop thread only)
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'local_hits': 0,
+            'batches': 0,
+            'batched_requests': 0,
+            'api_calls': 0,
+            'max_batch_seen': 0,
+        }
+        _batchers.add(self)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether calls wait to be batched (otherwise each is dispatched at once)."""
+        return self.max_wait > 0 and self.max_batch > 1
+
+    def _count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self._stats[key] += value
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    ready = threading.Event()
+                    thread = threading.Thread(
+                        target=self._run, args=(loop, ready), name='sentiment-batcher', daemon=True
+                    )
+                    thread.start()
+                    ready.wait()
+                    self._loop = loop
+        return self._loop
+
+    def _run(self, loop, ready):
+        asyncio.set_event_loop(loop)
+        self._queue = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop.create_task(self._collect())
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while self.enabled and len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Drain anything already queued without waiting
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        calls = {}
+        for key, text, future in batch:
+            if key in self._in_flight:
+                self._in_flight[key].append(future)
+            else:
+                calls[key] = text
+                self._in_flight[key] = [future]
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['batched_requests'] += len(batch)
+            self._stats['api_calls'] += len(calls)
+            self._stats['max_batch_seen'] = max(self._stats['max_batch_seen'], len(batch))
+
+        async def analyze(key, text):
+            try:
+                async with self._semaphore:
+                    result = await self.client.analyze_sentiment_nlp(text)
+            except Exception as e:
+                result = {'error': str(e), 'success': False}
+            for future in self._in_flight.pop(key):
+                if not future.done():
+                    future.set_result(dict(result))
+
+        await asyncio.gather(*(analyze(key, text) for key, text in calls.items()))
+
+    def submit(self, text: str) -> concurrent.futures.Future:
+        """
+        Queue `text` for the next batch; the future resolves to the NLP result.
+        Results in the local cache LRU come back as an already completed future.
+        """
+        future = concurrent.futures.Future()
+        key = gcp_client._sentiment_cache_key(text)
+        cached = sentiment_cache.get_local(key)
+        if cached is not None:
+            self._count(requests=1, local_hits=1)
+            future.set_result(cached)
+            return future
+        self._count(requests=1)
+        loop = self._ensure_loop()
+        loop.call_soon_threadsafe(self._queue.put_nowait, (key, text, future))
+        return future
+
+    def analyze(self, text: str, timeout: float = None) -> dict:
+        """
+        Batched gcp_client.analyze_sentiment_nlp for sync callers.
+        Raises concurrent.futures.TimeoutError after `timeout` seconds.
+        """
+        return self.submit(text).result(timeout)
+
+    async def analyze_async(self, text: str) -> dict:
+        """Batched async_gcp_client.analyze_sentiment_nlp for async callers."""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def stats(self) -> dict:
+        with self._lock:
+            values = dict(self._stats)
+        batches = values['batches']
+        values['avg_batch_size'] = round(values['batched_requests'] / batches, 2) if batches else None
+        values.update(
+            enabled=self.enabled,
+            max_batch=self.max_batch,
+            max_wait_ms=self.max_wait * 1000,
+            max_concurrency=self.max_concurrency,
+        )
+        return values
+
+    def _after_fork(self):
+        # The loop thread does not survive fork; start a new one on first use
+        self._lock = threading.Lock()
+        self._loop = None
+        self._queue = None
+        self._semaphore = None
+        self._in_flight = {}
+
+
+def _reset_batchers_after_fork():
+    for batcher in list(_batchers):
+        batcher._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_batchers_after_fork)
+
+
+# Global instance
+sentiment_batcher = SentimentBatcher(
+    max_batch=getattr(settings, 'NLP_BATCH_MAX_SIZE', 32),
+    max_wait_ms=getattr(settings, 'NLP_BATCH_MAX_WAIT_MS', 5),
+    max_concurrency=getattr(settings, 'NLP_BATCH_MAX_CONCURRENCY', 32),
+)
+
+
+def get_batch_stats():
+    """Get batching counters for Cloud NLP sentiment calls."""
+    return sentiment_batcher.stats()
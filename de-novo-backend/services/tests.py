@@ -0,0 +1,121 @@
+import io
+import os
+import unittest
+
+from .encrypted_stream import (
+    HEADER_SIZE, TAG_SIZE, EncryptedReader, StreamDecryptionError, decrypt_stream,
+    encrypt_stream, encrypted_size, generate_stream_key,
+)
+
+CHUNK_SIZE = 16
+
+
+class _NonSeekable(io.RawIOBase):
+    """Read-only wrapper that hides seek() from the reader."""
+
+    def __init__(self, data: bytes):
+        self._source = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._source.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class EncryptedStreamTests(unittest.TestCase):
+
+    def setUp(self):
+        self.key = generate_stream_key()
+
+    def _encrypt(self, plaintext: bytes) -> bytes:
+        destination = io.BytesIO()
+        encrypt_stream(io.BytesIO(plaintext), destination, self.key, chunk_size=CHUNK_SIZE)
+        return destination.getvalue()
+
+    def _decrypt(self, sealed: bytes, key: bytes = None) -> bytes:
+        destination = io.BytesIO()
+        decrypt_stream(io.BytesIO(sealed), destination, key or self.key)
+        return destination.getvalue()
+
+    def _records(self, sealed: bytes) -> list:
+        body = sealed[HEADER_SIZE:]
+        size = CHUNK_SIZE + TAG_SIZE
+        return [body[start:start + size] for start in range(0, len(body), size)]
+
+    def test_round_trip(self):
+        for length in (0, 1, CHUNK_SIZE - 1, CHUNK_SIZE, CHUNK_SIZE + 1, 5 * CHUNK_SIZE, 5 * CHUNK_SIZE + 7):
+            plaintext = os.urandom(length)
+            sealed = self._encrypt(plaintext)
+            self.assertEqual(len(sealed), encrypted_size(length, CHUNK_SIZE))
+            self.assertEqual(self._decrypt(sealed), plaintext)
+            self.assertEqual(EncryptedReader(_NonSeekable(sealed), self.key).read(), plaintext)
+
+    def test_wrong_key_fails(self):
+        sealed = self._encrypt(b'voice message')
+        with self.assertRaises(StreamDecryptionError):
+            self._decrypt(sealed, key=generate_stream_key())
+
+    def test_missing_final_chunk_fails(self):
+        # A whole number of full chunks: dropping the last leaves a valid-looking stream
+        plaintext = os.urandom(4 * CHUNK_SIZE)
+        sealed = self._encrypt(plaintext)
+        header, records = sealed[:HEADER_SIZE], self._records(sealed)
+        truncated = header + b''.join(records[:-1])
+
+        with self.assertRaises(StreamDecryptionError):
+            self._decrypt(truncated)
+        with self.assertRaises(StreamDecryptionError):
+            EncryptedReader(_NonSeekable(truncated), self.key).read()
+
+    def test_cut_inside_a_chunk_fails(self):
+        sealed = self._encrypt(os.urandom(3 * CHUNK_SIZE + 5))
+        with self.assertRaises(StreamDecryptionError):
+            self._decrypt(sealed[:-3])
+
+    def test_reordered_chunks_fail(self):
+        plaintext = os.urandom(4 * CHUNK_SIZE + 3)
+        sealed = self._encrypt(plaintext)
+        header, records = sealed[:HEADER_SIZE], self._records(sealed)
+        swapped = header + b''.join([records[1], records[0]] + records[2:])
+
+        with self.assertRaises(StreamDecryptionError):
+            self._decrypt(swapped)
+
+    def test_chunk_from_another_stream_fails(self):
+        # Same key, different nonce prefix and header
+        first = self._encrypt(os.urandom(3 * CHUNK_SIZE))
+        second = self._encrypt(os.urandom(3 * CHUNK_SIZE))
+        records = self._records(first)
+        spliced = first[:HEADER_SIZE] + records[0] + self._records(second)[1] + records[2]
+
+        with self.assertRaises(StreamDecryptionError):
+            self._decrypt(spliced)
+
+    def test_read_range_at_chunk_boundaries(self):
+        plaintext = os.urandom(4 * CHUNK_SIZE + 5)
+        reader = EncryptedReader(io.BytesIO(self._encrypt(plaintext)), self.key)
+        self.assertEqual(reader.size, len(plaintext))
+
+        ranges = [
+            (0, CHUNK_SIZE),
+            (CHUNK_SIZE, 2 * CHUNK_SIZE),
+            (CHUNK_SIZE - 1, CHUNK_SIZE + 1),
+            (2 * CHUNK_SIZE, 2 * CHUNK_SIZE),
+            (3 * CHUNK_SIZE, len(plaintext)),
+            (4 * CHUNK_SIZE, len(plaintext) + 10),
+            (len(plaintext), len(plaintext) + 10),
+            (5 * CHUNK_SIZE, 6 * CHUNK_SIZE),
+        ]
+        for start, end in ranges:
+            with self.subTest(start=start, end=end):
+                self.assertEqual(reader.read_range(start, end), plaintext[start:end])
+
+    def test_read_range_on_exact_multiple_of_chunk_size(self):
+        plaintext = os.urandom(3 * CHUNK_SIZE)
+        reader = EncryptedReader(io.BytesIO(self._encrypt(plaintext)), self.key)
+
+        self.assertEqual(reader.read_range(2 * CHUNK_SIZE, 3 * CHUNK_SIZE), plaintext[2 * CHUNK_SIZE:])
+        self.assertEqual(reader.read_range(3 * CHUNK_SIZE, 4 * CHUNK_SIZE), b'')
@@ -0,0 +1,209 @@
+"""
+Micro-batching for Cloud Vision face detection.
+
+images:annotate takes up to 16 images per request. Frames arriving within
+`max_wait_ms` of each other (from any user) are collected and sent together,
+split so no request exceeds `max_batch` images or `max_request_bytes` of
+encoded image data, with at most `max_concurrency` requests in flight. Each
+caller gets back the result for its own frame. A caller that stops waiting
+(detect timeout, or a cancelled detect_async) cancels its frame, and frames
+still waiting for a request slot are then dropped rather than sent.
+
+Like SentimentBatcher, the batcher runs its own event loop in a daemon
+thread, shared by sync and async callers.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import weakref
+
+from django.conf import settings
+
+from .gcp_async_client import async_gcp_client
+
+# images:annotate limits: 16 images and ~10 MB of JSON per request
+MAX_IMAGES_PER_REQUEST = 16
+MAX_REQUEST_BYTES = 8 * 1024 * 1024
+
+_batchers = weakref.WeakSet()
+
+
+def split_batch(batch, max_images: int, max_bytes: int) -> list:
+    """Split (image, future) pairs into request-sized groups, keeping order."""
+    groups, group, size = [], [], 0
+    for item in batch:
+        encoded = (len(item[0]) + 2) // 3 * 4  # base64 size
+        if group and (len(group) >= max_images or size + encoded > max_bytes):
+            groups.append(group)
+            group, size = [], 0
+        group.append(item)
+        size += encoded
+    if group:
+        groups.append(group)
+    return groups
+
+
+class FaceDetectionBatcher:
+    """Coalesces concurrent detect_faces calls into multi-image annotate requests."""
+
+    def __init__(self, client=None, max_batch: int = MAX_IMAGES_PER_REQUEST, max_wait_ms: float = 20,
+                 max_concurrency: int = 8, max_request_bytes: int = MAX_REQUEST_BYTES):
+        self.client = client or async_gcp_client
+        self.max_batch = max(1, min(max_batch, MAX_IMAGES_PER_REQUEST))
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrency = max_concurrency
+        self.max_request_bytes = max_request_bytes
+        self._loop = None
+        self._queue = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'api_calls': 0,
+            'images_sent': 0,
+            'max_batch_seen': 0,
+            'abandoned': 0,
+        }
+        _batchers.add(self)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether calls wait to be batched (otherwise each is dispatched at once)."""
+        return self.max_wait > 0 and self.max_batch > 1
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    ready = threading.Event()
+                    thread = threading.Thread(
+                        target=self._run, args=(loop, ready), name='vision-batcher', daemon=True
+                    )
+                    thread.start()
+                    ready.wait()
+                    self._loop = loop
+        return self._loop
+
+    def _run(self, loop, ready):
+        asyncio.set_event_loop(loop)
+        self._queue = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop.create_task(self._collect())
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while self.enabled and len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        groups = split_batch(batch, self.max_batch, self.max_request_bytes)
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['max_batch_seen'] = max(self._stats['max_batch_seen'], len(batch))
+
+        async def annotate(group):
+            async with self._semaphore:
+                # Callers may have given up while this group waited for a slot;
+                # once marked running, their futures can no longer be cancelled
+                live = [(image, future) for image, future in group if future.set_running_or_notify_cancel()]
+                with self._lock:
+                    self._stats['abandoned'] += len(group) - len(live)
+                    if live:
+                        self._stats['api_calls'] += 1
+                        self._stats['images_sent'] += len(live)
+                if not live:
+                    return
+                try:
+                    results = await self.client.detect_faces_batch([image for image, _ in live])
+                except Exception as e:
+                    results = [{'error': str(e), 'faces': [], 'success': False}] * len(live)
+            for (_, future), result in zip(live, results):
+                future.set_result(dict(result))
+
+        await asyncio.gather(*(annotate(group) for group in groups))
+
+    def submit(self, image_content: bytes) -> concurrent.futures.Future:
+        """Queue a frame for the next batch; the future resolves to its detect_faces result."""
+        future = concurrent.futures.Future()
+        with self._lock:
+            self._stats['requests'] += 1
+        loop = self._ensure_loop()
+        loop.call_soon_threadsafe(self._queue.put_nowait, (image_content, future))
+        return future
+
+    def detect(self, image_content: bytes, timeout: float = None) -> dict:
+        """
+        Batched gcp_client.detect_faces for sync callers.
+        Raises concurrent.futures.TimeoutError after `timeout` seconds, and
+        the frame is dropped if it has not been sent yet.
+        """
+        future = self.submit(image_content)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    async def detect_async(self, image_content: bytes) -> dict:
+        """Batched async_gcp_client.detect_faces for async callers."""
+        return await asyncio.wrap_future(self.submit(image_content))
+
+    def stats(self) -> dict:
+        with self._lock:
+            values = dict(self._stats)
+        calls = values['api_calls']
+        values['avg_images_per_call'] = round(values['images_sent'] / calls, 2) if calls else None
+        values.update(
+            enabled=self.enabled,
+            max_batch=self.max_batch,
+            max_wait_ms=self.max_wait * 1000,
+            max_concurrency=self.max_concurrency,
+        )
+        return values
+
+    def _after_fork(self):
+        # The loop thread does not survive fork; start a new one on first use
+        self._lock = threading.Lock()
+        self._loop = None
+        self._queue = None
+        self._semaphore = None
+
+
+def _reset_batchers_after_fork():
+    for batcher in list(_batchers):
+        batcher._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_batchers_after_fork)
+
+
+# Global instance
+face_batcher = FaceDetectionBatcher(
+    max_batch=getattr(settings, 'VISION_BATCH_MAX_SIZE', MAX_IMAGES_PER_REQUEST),
+    max_wait_ms=getattr(settings, 'VISION_BATCH_MAX_WAIT_MS', 20),
+    max_concurrency=getattr(settings, 'VISION_BATCH_MAX_CONCURRENCY', 8),
+)
+
+
+def get_vision_batch_stats():
+    """Get batching counters for Cloud Vision face detection."""
+    return face_batcher.stats()
@@ -123,6 +123,11 @@ export const ChatProvider = ({ children }) => {
 
     const handleWsMessage = useCallback((data, conversationId) => {
         switch (data.type) {
+            case 'batch': {
+                // Server coalesces events that arrive within a short window
+                (data.events || []).forEach(evt => handleWsMessage(evt, conversationId));
+                break;
+            }
             case 'message': {
                 const msg = data.message;
                 const formatted = {
@@ -149,6 +154,35 @@ export const ChatProvider = ({ children }) => {
                 ));
                 break;
             }
+            case 'message_updated': {
+                // Delta: patch the edited message in place
+                setMessages(prev => ({
+                    ...prev,
+                    [conversationId]: (prev[conversationId] || []).map(m =>
+                        m.id === data.message_id
+                            ? { ...m, text: data.content, sentiment: data.sentiment, editedAt: data.edited_at }
+                            : m
+                    )
+                }));
+                break;
+            }
+            case 'sentiment_updated': {
+                // Cloud NLP answered after the message was sent with a local estimate
+                setMessages(prev => ({
+                    ...prev,
+                    [conversationId]: (prev[conversationId] || []).map(m =>
+                        m.id === data.message_id ? { ...m, sentiment: data.sentiment } : m
+                    )
+                }));
+                break;
+            }
+            case 'message_deleted': {
+                setMessages(prev => ({
+                    ...prev,
+                    [conversationId]: (prev[conversationId] || []).filter(m => m.id !== data.message_id)
+                }));
+                break;
+            }
             case 'typing': {
                 const { user_id, username, is_typing } = data;
                 setTypingUsers(prev => {
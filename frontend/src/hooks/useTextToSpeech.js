@@ -79,11 +79,14 @@ export const useTextToSpeech = () => {
                 pitch: pitch
             });
 
-            if (response.success && (response.data?.audio_content || response.data?.audio_base64)) {
-                // Play the audio
+            if (response.success && (response.data?.audio_url || response.data?.audio_content || response.data?.audio_base64)) {
+                // Cached audio is served from a stable URL the browser can cache;
+                // inline base64 is decoded into a temporary object URL
                 const audioContent = response.data.audio_content || response.data.audio_base64;
-                const audioBlob = base64ToBlob(audioContent, 'audio/mp3');
-                const audioUrl = URL.createObjectURL(audioBlob);
+                const audioUrl = response.data.audio_url || URL.createObjectURL(base64ToBlob(audioContent, 'audio/mp3'));
+                const revoke = () => {
+                    if (!response.data.audio_url) URL.revokeObjectURL(audioUrl);
+                };
 
                 // Stop any existing audio
                 if (audioRef.current) {
@@ -93,11 +96,11 @@ export const useTextToSpeech = () => {
                 audioRef.current = new Audio(audioUrl);
                 audioRef.current.onended = () => {
                     setSpeaking(false);
-                    URL.revokeObjectURL(audioUrl);
+                    revoke();
                 };
                 audioRef.current.onerror = () => {
                     setSpeaking(false);
-                    URL.revokeObjectURL(audioUrl);
+                    revoke();
                 };
 
                 await audioRef.current.play();
@@ -268,6 +268,7 @@ export const api = {
             content,
             message_type: messageType
         }),
+        editMessage:   (msgId, content) => api.patch(`/chat/messages/${msgId}/edit/`, { content }),
         deleteMessage: (msgId) => api.delete(`/chat/messages/${msgId}/delete/`),
         markAsRead:    (convId) => api.post(`/chat/conversations/${convId}/read/`),
         markMessageAsRead: (msgId) => api.post(`/chat/messages/${msgId}/read/`),